@@ -0,0 +1,457 @@
+import os
+import sys
+import marshal
+
+from cache import cache_dir, digest
+from ir import Code, OPCODES
+from vm import (Program, VMError, load_code, parse_program, _div, _mod,
+                PUSHI, PUSHL, STOREL, PUSHG, STOREG, ADD, SUB, MUL, DIV, MOD,
+                JZ, JUMP, EQUAL, INF, INFEQ, SUP, SUPEQ, NOT, AND, OR,
+                DUP, POP, SWAP, PUSHS, PUSHN, PUSHFP, PUSHGP, PUSHSP, LOAD, STORE,
+                LOADN, STOREN, ALLOCN, ALLOC, PUSHA, CALL, RETURN, CHARAT, STRLEN,
+                CONCAT, CHRCODE, WRITEI, WRITES, WRITECHR, WRITELN, WRITEF, READ,
+                ATOI, STRI, START, STOP, NOP, ERR)
+
+########################################################################
+# AHEAD-OF-TIME TRANSLATION
+# Turns a compiled program (vm.Program, or the Code of a CodeEmitter)
+# into Python source, compiled once with compile() and then run with no
+# per-instruction decoding at all:
+#
+#  - the code is split in basic blocks (they start at jump/call targets
+#    and after jumps, calls, RETURN, STOP and ERR); every block becomes a
+#    module-level function that runs its instructions and returns the
+#    index of the next block (-1 to stop). Labels are block indices:
+#    PUSHA pushes the index of the called block. The machine state
+#    (stack, fp, calls) lives in the module's globals, set by program()
+#    at the start of every run - one run at a time per translation.
+#    (Nested functions sharing it through closures would be as fast to
+#    run, but compile() takes superlinear time on one huge function.)
+#  - the stack is a Python list, as in vm.py. Inside a block, values
+#    pushed and then consumed by the following instructions never touch
+#    it: they are Python locals (`PUSHL 2 ; PUSHI 1 ; ADD ; STOREL 2`
+#    becomes `t0 = stack[fp + 2]; t1 = t0 + 1; stack[fp + 2] = t1`).
+#    Whatever is still pending when the block ends is pushed then.
+#
+# VM semantics are kept (same output, same errors, same final stack and
+# the same `steps`, counted per block). Translations are cached under
+# cache_dir("aot"), as marshalled code objects keyed by a hash of the
+# program and of this translator, and in memory for the process.
+#
+#   translated = aot.load(program)
+#   translated.run(stdin, stdout)
+########################################################################
+
+# instruções que produzem um valor: opcode -> (operandos tirados da pilha, expressão)
+VALUE_OPS = {
+    PUSHL: (0, "stack[fp + {arg}]"),
+    PUSHG: (0, "stack[{arg}]"),
+    PUSHFP: (0, "fp"),
+    PUSHGP: (0, "0"),
+    PUSHSP: (0, "len(stack)"),
+    ADD: (2, "{0} + {1}"),
+    SUB: (2, "{0} - {1}"),
+    MUL: (2, "{0} * {1}"),
+    DIV: (2, "_div({0}, {1})"),
+    MOD: (2, "_mod({0}, {1})"),
+    INF: (2, "int({0} < {1})"),
+    INFEQ: (2, "int({0} <= {1})"),
+    SUP: (2, "int({0} > {1})"),
+    SUPEQ: (2, "int({0} >= {1})"),
+    EQUAL: (2, "int({0} == {1})"),
+    NOT: (1, "int({0} == 0)"),
+    AND: (2, "int(bool({0}) and bool({1}))"),
+    OR: (2, "int(bool({0}) or bool({1}))"),
+    LOAD: (1, "_load(stack, {0}, {arg})"),
+    LOADN: (2, "_load(stack, {0}, {1})"),
+    ALLOC: (0, "[0] * {arg}"),
+    ALLOCN: (1, "[0] * {0}"),
+    CHARAT: (2, "ord({0}[{1}])"),
+    STRLEN: (1, "len({0})"),
+    CONCAT: (2, "{0} + {1}"),
+    CHRCODE: (1, "ord({0}[0])"),
+    READ: (0, "readline().rstrip('\\n')"),
+    ATOI: (1, "int({0})"),
+    STRI: (1, "str({0})"),
+}
+
+# instruções que só consomem valores: opcode -> (operandos, statement)
+EFFECT_OPS = {
+    STOREL: (1, "stack[fp + {arg}] = {0}"),
+    STOREG: (1, "stack[{arg}] = {0}"),
+    STORE: (2, "_store(stack, {0}, {arg}, {1})"),
+    STOREN: (3, "_store(stack, {0}, {1}, {2})"),
+    WRITEI: (1, "write(str({0}))"),
+    WRITEF: (1, "write(str({0}))"),
+    WRITES: (1, "write({0})"),
+    WRITECHR: (1, "write(chr({0}))"),
+    WRITELN: (0, "write('\\n')"),
+}
+
+# depois destas instruções começa outro bloco
+BLOCK_ENDS = frozenset((JZ, JUMP, CALL, RETURN, STOP, ERR))
+
+
+def _load(stack, a, n):
+    return a[n] if isinstance(a, list) else stack[a + n]
+
+
+def _store(stack, a, n, v):
+    if isinstance(a, list):
+        a[n] = v
+    else:
+        stack[a + n] = v
+
+
+# o que o código gerado usa, além dos builtins
+RUNTIME = {"_div": _div, "_mod": _mod, "_load": _load, "_store": _store, "VMError": VMError}
+
+
+def stack_effect(op, arg) -> int:
+    """How many values an instruction leaves on the stack minus how many it takes (START aside)."""
+    if op in VALUE_OPS:
+        return 1 - VALUE_OPS[op][0]
+    if op in EFFECT_OPS:
+        return -EFFECT_OPS[op][0]
+    if op == PUSHI or op == PUSHS or op == PUSHA:
+        return 1
+    if op == DUP or op == PUSHN:
+        return arg
+    if op == POP:
+        return -arg
+    if op == JZ or op == CALL:
+        return -1 # (a função chamada deixa a pilha como a encontrou)
+    return 0
+
+
+def basic_blocks(code) -> list[int]:
+    """Index of the first instruction of every basic block, in order."""
+    leaders = {0}
+    for idx, (op, arg) in enumerate(code):
+        if op == JZ or op == JUMP or op == PUSHA:
+            leaders.add(arg)
+        if op in BLOCK_ENDS:
+            leaders.add(idx + 1)
+    return sorted(leader for leader in leaders if leader < len(code))
+
+
+def entry_heights(code, leaders) -> list:
+    """
+    Stack height at the start of every block, as (values above fp,
+    values above gp) - each None when it is not the same on every path
+    (or the block is never reached). Used to know, while translating,
+    whether `PUSHL n` reads the list or a value still pending.
+    """
+    block_of = {leader: idx for idx, leader in enumerate(leaders)}
+    heights = [None] * len(leaders)
+    called = {block_of[arg] for op, arg in code if op == PUSHA and arg in block_of}
+
+    def merge(block, height):
+        old = heights[block]
+        if old is None:
+            heights[block] = height
+        elif old != height:
+            height = tuple(a if a == b else None for a, b in zip(old, height))
+            if height == old:
+                return
+            heights[block] = height
+        else:
+            return
+        pending.append(block)
+
+    pending = []
+    if leaders:
+        merge(0, (0, 0))
+    for block in called:
+        merge(block, (0, None)) # CALL: fp = topo da pilha
+    while pending:
+        block = pending.pop()
+        fp_height, gp_height = heights[block]
+        start = leaders[block]
+        end = leaders[block + 1] if block + 1 < len(leaders) else len(code)
+        for pc in range(start, end):
+            op, arg = code[pc]
+            if op == START:
+                fp_height = 0
+                continue
+            effect = stack_effect(op, arg)
+            fp_height = None if fp_height is None else fp_height + effect
+            gp_height = None if gp_height is None else gp_height + effect
+        op, arg = code[end - 1]
+        if op == JZ or op == JUMP:
+            if arg in block_of:
+                merge(block_of[arg], (fp_height, gp_height))
+        if op not in (JUMP, RETURN, STOP, ERR) and end in block_of:
+            merge(block_of[end], (fp_height, gp_height))
+    return heights
+
+
+class BlockWriter:
+    """
+    Python statements of one basic block. Values pushed inside the block
+    stay in `pending` (names of locals or literals) until something needs
+    them in the list; `height`/`gp_height` are the heights of the whole
+    stack (list + pending), when known.
+    """
+
+    def __init__(self, block_of, heights):
+        self.block_of = block_of # índice de instrução -> índice de bloco (-1: fim do programa)
+        self.height, self.gp_height = heights or (None, None)
+        self.lines = []
+        self.pending = []
+        self.temp_count = 0
+        self.sets_fp = False
+
+    def emit(self, line):
+        self.lines.append(line)
+
+    def value(self, expression) -> str:
+        name = f"t{self.temp_count}"
+        self.temp_count += 1
+        self.emit(f"{name} = {expression}")
+        return name
+
+    def operands(self, count) -> list[str]:
+        """The `count` values on top of the stack (pending ones first, then popped)."""
+        taken = self.pending[max(0, len(self.pending) - count):] if count else []
+        del self.pending[len(self.pending) - len(taken):]
+        popped = [self.value("pop()") for _ in range(count - len(taken))]
+        return popped[::-1] + taken
+
+    def flush(self):
+        if len(self.pending) == 1:
+            self.emit(f"push({self.pending[0]})")
+        elif self.pending:
+            self.emit(f"stack.extend(({', '.join(self.pending)}))")
+        self.pending = []
+
+    def pending_slot(self, slot, height):
+        """Index in `pending` of stack slot `slot` (relative to fp or gp), or None if it's in the list."""
+        if height is None:
+            self.flush() # não se sabe onde está: tudo para a lista
+            return None
+        idx = slot - (height - len(self.pending))
+        if idx < 0:
+            return None
+        if idx >= len(self.pending):
+            self.flush() # acima do topo: falha como na VM
+            return None
+        return idx
+
+    def jump(self, target) -> int:
+        return self.block_of.get(target, -1)
+
+    def instruction(self, op, arg, next_idx):
+        if op == START:
+            self.flush()
+            self.emit("fp = len(stack)")
+            self.sets_fp = True
+            self.height = 0
+            return
+        self.translate(op, arg, next_idx)
+        effect = stack_effect(op, arg)
+        if self.height is not None:
+            self.height += effect
+        if self.gp_height is not None:
+            self.gp_height += effect
+
+    def translate(self, op, arg, next_idx):
+        if op == PUSHI or op == PUSHS:
+            self.pending.append(repr(arg))
+        elif op == PUSHA:
+            self.pending.append(str(self.jump(arg)))
+        elif op == PUSHL or op == PUSHG:
+            idx = self.pending_slot(arg, self.height if op == PUSHL else self.gp_height)
+            if idx is None:
+                self.pending.append(self.value(VALUE_OPS[op][1].format(arg=arg)))
+            else:
+                self.pending.append(self.pending[idx])
+        elif op == STOREL or op == STOREG:
+            value, = self.operands(1)
+            height = self.height if op == STOREL else self.gp_height
+            idx = self.pending_slot(arg, None if height is None else height - 1)
+            if idx is None:
+                self.emit(EFFECT_OPS[op][1].format(value, arg=arg))
+            else:
+                self.pending[idx] = value
+        elif op in VALUE_OPS:
+            count, template = VALUE_OPS[op]
+            operands = self.operands(count)
+            if op in (PUSHSP, LOAD, LOADN):
+                self.flush() # acedem à pilha por endereço
+            self.pending.append(self.value(template.format(*operands, arg=arg)))
+        elif op in EFFECT_OPS:
+            count, template = EFFECT_OPS[op]
+            operands = self.operands(count)
+            if op in (STORE, STOREN):
+                self.flush()
+            self.emit(template.format(*operands, arg=arg))
+        elif op == DUP:
+            if arg <= len(self.pending):
+                self.pending += self.pending[-arg:]
+            else:
+                self.flush()
+                self.emit(f"stack.extend(stack[-{arg}:])")
+        elif op == POP:
+            dropped = min(arg, len(self.pending))
+            del self.pending[len(self.pending) - dropped:]
+            if arg > dropped:
+                self.emit(f"del stack[len(stack) - {arg - dropped}:]")
+        elif op == SWAP:
+            a, b = self.operands(2)
+            self.pending += [b, a]
+        elif op == PUSHN:
+            self.pending += ["0"] * arg
+        elif op == JZ:
+            condition, = self.operands(1)
+            self.flush()
+            self.emit(f"if {condition} == 0: return {self.jump(arg)}")
+            self.emit(f"return {self.jump(next_idx)}")
+        elif op == JUMP:
+            self.flush()
+            self.emit(f"return {self.jump(arg)}")
+        elif op == CALL:
+            target, = self.operands(1)
+            self.flush()
+            self.emit(f"calls.append(({self.jump(next_idx)}, fp))")
+            self.emit("fp = len(stack)")
+            self.emit(f"return {target}")
+            self.sets_fp = True
+        elif op == RETURN:
+            self.flush()
+            self.emit("del stack[fp:]")
+            self.emit("block, fp = calls.pop()")
+            self.emit("return block")
+            self.sets_fp = True
+        elif op == STOP:
+            self.flush()
+            self.emit("return -1")
+        elif op == ERR:
+            self.flush()
+            self.emit(f"raise VMError({arg!r})")
+        elif op == NOP:
+            pass
+        else:
+            raise VMError(f"instruction {OPCODES[op]} not supported")
+
+    def source(self, name) -> list[str]:
+        body = (["global fp"] if self.sets_fp else []) + (self.lines or ["pass"])
+        return [f"def {name}():"] + [f"    {line}" for line in body]
+
+
+def translate(program: Program) -> str:
+    """Python source of a program (a module with program(), BLOCKS and SIZES)."""
+    code = program.code
+    leaders = basic_blocks(code)
+    block_of = {leader: idx for idx, leader in enumerate(leaders)}
+    heights = entry_heights(code, leaders)
+
+    lines = ["def program(stack_, write_, readline_):",
+             "    global stack, push, pop, calls, fp, write, readline",
+             "    stack, write, readline = stack_, write_, readline_",
+             "    push, pop = stack.append, stack.pop",
+             "    calls = []",
+             "    fp = 0",
+             "    return BLOCKS"]
+    sizes = []
+    for idx, start in enumerate(leaders):
+        end = leaders[idx + 1] if idx + 1 < len(leaders) else len(code)
+        block = BlockWriter(block_of, heights[idx])
+        for pc in range(start, end):
+            op, arg = code[pc]
+            block.instruction(op, arg, pc + 1)
+        if code[end - 1][0] not in BLOCK_ENDS:
+            # o bloco seguinte começa numa label: continua nele
+            block.flush()
+            block.emit(f"return {block.jump(end)}")
+        lines += block.source(f"b{idx}")
+        sizes.append(end - start)
+    lines.append(f"BLOCKS = ({''.join(f'b{idx}, ' for idx in range(len(leaders)))})")
+    lines.append(f"SIZES = {tuple(sizes)!r}")
+    return "\n".join(lines) + "\n"
+
+
+########################################################################
+# LOADING AND RUNNING
+########################################################################
+
+_translator_fingerprint = None
+_loaded = {} # chave -> TranslatedProgram (traduções já carregadas neste processo)
+
+
+def translation_key(program: Program) -> str:
+    """Hash of the program and of this translator (and of the Python that marshals it)."""
+    global _translator_fingerprint
+    if _translator_fingerprint is None:
+        with open(os.path.abspath(__file__), "rb") as f:
+            _translator_fingerprint = digest(f.read(), sys.implementation.cache_tag)
+    return digest(_translator_fingerprint, repr(program.code))
+
+
+class TranslatedProgram:
+    def __init__(self, factory, sizes, cached=False):
+        self.factory = factory  # program(stack, write, readline) -> funções dos blocos (BLOCKS)
+        self.sizes = sizes      # instruções de cada bloco
+        self.cached = cached
+        self.steps = 0
+
+    def run(self, stdin=None, stdout=None):
+        """Runs the program like vm.VM.run; returns the final stack."""
+        stdin = stdin if stdin is not None else sys.stdin
+        stdout = stdout if stdout is not None else sys.stdout
+        stack = []
+        blocks = self.factory(stack, stdout.write, stdin.readline)
+        sizes = self.sizes
+        steps = 0
+        block = 0 if blocks else -1
+        while block >= 0:
+            steps += sizes[block]
+            block = blocks[block]()
+        self.steps = steps
+        return stack
+
+
+def _instantiate(code_object, cached):
+    namespace = dict(RUNTIME)
+    exec(code_object, namespace)
+    return TranslatedProgram(namespace["program"], namespace["SIZES"], cached)
+
+
+def load(program, use_cache=True) -> TranslatedProgram:
+    """The translation of a vm.Program (or of IR Code), from the caches when possible."""
+    if isinstance(program, Code):
+        program = load_code(program)
+    if not use_cache:
+        return _instantiate(compile(translate(program), "<aot>", "exec"), False)
+
+    key = translation_key(program)
+    translated = _loaded.get(key)
+    if translated is not None:
+        return translated
+
+    path = os.path.join(cache_dir("aot"), f"{key}.bin")
+    try:
+        with open(path, "rb") as f:
+            translated = _instantiate(marshal.loads(f.read()), True)
+    except (OSError, ValueError, EOFError, TypeError):
+        code_object = compile(translate(program), f"<aot {key[:12]}>", "exec")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(marshal.dumps(code_object))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass # sem cache em disco: a tradução serve na mesma
+        translated = _instantiate(code_object, False)
+
+    _loaded[key] = translated
+    return translated
+
+
+if __name__ == "__main__":
+    # python aot.py programa.out: mostra o código Python gerado
+    import bytecode
+    with open(sys.argv[1], "rb") as f:
+        data = f.read()
+    program = bytecode.load(data) if bytecode.is_bytecode(data) else parse_program(data.decode("utf-8"))
+    print(translate(program))
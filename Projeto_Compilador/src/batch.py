@@ -0,0 +1,104 @@
+import os
+import glob
+import time
+import multiprocessing
+
+from compiler import Compiler, compile_to_file
+from optimizer import INLINE_MAX_SIZE
+from errors import CompilationError
+from cache import BuildCache
+
+########################################################################
+# BATCH COMPILATION
+# Compiles many .pas files on a pool of worker processes. Each worker
+# builds one Compiler when it starts (warm lexer/parser tables) and
+# reuses it for every file it is given. Unless disabled, workers share
+# the on-disk build cache, so unchanged files are not recompiled.
+########################################################################
+
+def find_sources(target):
+    if os.path.isdir(target):
+        pattern = os.path.join(target, "**", "*.pas")
+    else:
+        pattern = target
+    return sorted(glob.glob(pattern, recursive=True))
+
+
+class BatchResult:
+    def __init__(self, source, ok, output=None, error=None, elapsed=0.0, cached=False):
+        self.source = source
+        self.ok = ok
+        self.output = output    # caminho do .out (ou .ewvb) escrito
+        self.error = error      # mensagem de erro (se falhou)
+        self.elapsed = elapsed  # segundos
+        self.cached = cached    # resultado veio da cache de compilação
+
+
+_worker_compiler = None
+_worker_outdir = None
+_worker_stream = False
+
+def _init_worker(outdir, use_cache, optimize, output_format="text", inline=False, comments=True, stream=False):
+    global _worker_compiler, _worker_outdir, _worker_stream
+    _worker_compiler = Compiler(cache=BuildCache() if use_cache else None, optimize=optimize,
+                                comments=comments, output_format=output_format, inline=bool(inline),
+                                inline_size=inline or INLINE_MAX_SIZE)
+    _worker_outdir = outdir
+    _worker_stream = stream
+
+
+def _compile_one(source):
+    start = time.perf_counter()
+    try:
+        with open(source) as input_file:
+            text = input_file.read()
+        if _worker_stream:
+            result = compile_to_file(_worker_compiler, text, _worker_outdir)
+            output = os.path.join(_worker_outdir, result.output_name)
+        else:
+            result = _worker_compiler.compile(text)
+            output = os.path.join(_worker_outdir, result.output_name)
+            with open(output, "wb" if isinstance(result.code, bytes) else "w") as output_file:
+                output_file.write(result.code)
+    except CompilationError as e:
+        return BatchResult(source, False, error=str(e), elapsed=time.perf_counter() - start)
+    except Exception as e:
+        # um erro interno num ficheiro não deve parar o lote inteiro
+        return BatchResult(source, False, error=f"{type(e).__name__}: {e}", elapsed=time.perf_counter() - start)
+    return BatchResult(source, True, output=output, elapsed=time.perf_counter() - start,
+                       cached=result.cached)
+
+
+def compile_batch(sources, outdir=".", jobs=None, use_cache=True, optimize=False, output_format="text",
+                  inline=False, comments=True, stream=False):
+    """
+    Compile every path in `sources`, writing <program>.out files into
+    `outdir`. Returns one BatchResult per source, in the same order.
+    `inline` is False or the size limit for inlined functions;
+    `comments` and `stream` are passed on as in main.py's single-file mode.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(sources)))
+
+    if jobs == 1:
+        _init_worker(outdir, use_cache, optimize, output_format, inline, comments, stream)
+        return [_compile_one(source) for source in sources]
+
+    chunksize = max(1, len(sources) // (jobs * 8))
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(outdir, use_cache, optimize, output_format, inline, comments, stream)) as pool:
+        return pool.map(_compile_one, sources, chunksize)
+
+
+def print_summary(results, elapsed):
+    width = max((len(r.source) for r in results), default=0)
+    for r in results:
+        status = ("CACHE" if r.cached else "OK") if r.ok else "ERRO"
+        detail = r.output if r.ok else r.error.strip().splitlines()[0]
+        print(f"{status:<5} {r.elapsed * 1000:8.2f} ms  {r.source:<{width}}  {detail}")
+
+    failed = sum(1 for r in results if not r.ok)
+    cached = sum(1 for r in results if r.cached)
+    print(f"\n{len(results)} ficheiros, {len(results) - failed} compilados ({cached} da cache), "
+          f"{failed} com erros em {elapsed:.2f} s")
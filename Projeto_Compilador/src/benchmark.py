@@ -0,0 +1,509 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUTS_DIR = os.path.join(SRC_DIR, "..", "inputs")
+
+
+def report(name, samples):
+    samples_ms = [s * 1000 for s in samples]
+    print(f"{name:<28} min {min(samples_ms):8.2f} ms   "
+          f"median {statistics.median(samples_ms):8.2f} ms   "
+          f"max {max(samples_ms):8.2f} ms   (n={len(samples_ms)})")
+
+
+########################################################################
+# STARTUP
+# Time complete `main.py` runs: "cold" starts with an empty cache
+# directory (lexer and parser tables generated from scratch), "warm"
+# reuses the tables written by the previous run. Then, in this process,
+# just the construction of the lexer (from its rules vs from the cached
+# lextab) and of the parser (from the cached tables).
+########################################################################
+
+def run_main(source, cache, workdir):
+    env = dict(os.environ, PASCAL_CACHE_DIR=cache)
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(SRC_DIR, "main.py"), source],
+        cwd=workdir, env=env, check=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def bench_startup(args):
+    source = os.path.abspath(args.source)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "cache")
+
+        cold = []
+        for _ in range(args.runs):
+            shutil.rmtree(cache, ignore_errors=True)
+            cold.append(run_main(source, cache, tmp))
+
+        warm = [run_main(source, cache, tmp) for _ in range(args.runs)]
+
+    report("main.py cold (no tables)", cold)
+    report("main.py warm (cached)", warm)
+    print(f"speedup (median): {statistics.median(cold) / statistics.median(warm):.2f}x")
+
+    import re
+    import lexer
+    import parser
+    for name, build in (("lexer from rules", lambda: lexer.build_lexer(use_cache=False)),
+                        ("lexer from lextab", lexer.build_lexer),
+                        ("parser from tables", parser.build_parser)):
+        samples = []
+        for _ in range(args.runs):
+            re.purge() # (senão as regex compiladas vêm da cache do módulo re)
+            start = time.perf_counter()
+            build()
+            samples.append(time.perf_counter() - start)
+        report(name, samples)
+
+
+########################################################################
+# LEXER THROUGHPUT
+# Tokenize a large generated program and report tokens/s and MB/s.
+########################################################################
+
+def generate_lexer_program(target_bytes):
+    # mistura de palavras reservadas, identificadores (alguns com prefixo
+    # de palavra reservada, ex. "dox", "format"), literais e comentários
+    lines = [
+        "program LexerBench;",
+        "var",
+        "  dox, format, tox, i, total: integer;",
+        "  name: string;",
+        "begin",
+    ]
+    size = sum(len(line) + 1 for line in lines)
+    i = 0
+    while size < target_bytes:
+        block = [
+            f"  {{ bloco {i} }}",
+            f"  for i := 1 to {i % 97 + 3} do",
+            "  begin",
+            f"    dox := (dox + i) * {i % 7 + 1} div 2;",
+            f"    if (format mod 3 = 0) and (tox <> {i}) then",
+            f"      total := total - dox",
+            "    else",
+            f"      name := 'linha {i}';",
+            "  end;",
+            f"  // comentario {i}",
+        ]
+        lines.extend(block)
+        size += sum(len(line) + 1 for line in block)
+        i += 1
+    lines.append("end.")
+    return "\n".join(lines)
+
+
+def bench_lexer(args):
+    from lexer import new_lexer
+
+    text = generate_lexer_program(args.size * 1024 * 1024)
+    with tempfile.NamedTemporaryFile("w", suffix=".pas", delete=False) as tmp:
+        tmp.write(text)
+    with open(tmp.name) as f:
+        text = f.read()
+    os.unlink(tmp.name)
+
+    samples = []
+    count = 0
+    for _ in range(args.runs):
+        lexer = new_lexer()
+        lexer.input(text)
+        token = lexer.token
+        count = 0
+        start = time.perf_counter()
+        while token():
+            count += 1
+        samples.append(time.perf_counter() - start)
+
+    best = min(samples)
+    report(f"lexer ({len(text) / 1e6:.1f} MB)", samples)
+    print(f"{count} tokens   {count / best:,.0f} tokens/s   {len(text) / 1e6 / best:.2f} MB/s")
+
+
+########################################################################
+# AST MEMORY
+# Parse a long generated program and report how many nodes its AST has
+# and how much memory it keeps alive (measured with tracemalloc, on a
+# separate run from the timed one).
+########################################################################
+
+def count_nodes(root):
+    from tree import Node
+
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(arg for arg in node.args if isinstance(arg, Node))
+    return count
+
+
+def bench_ast(args):
+    import tracemalloc
+    from compiler import Compiler
+
+    text, _ = generate_long_statements(args.statements)
+    compiler = Compiler()
+
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        compiler.parse(text)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    ast = compiler.parse(text)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report(f"parse ({args.statements} statements)", samples)
+    nodes = count_nodes(ast)
+    print(f"{nodes} nós   {retained / 1e6:.1f} MB retidos ({retained / nodes:.0f} B/nó)   pico {peak / 1e6:.1f} MB")
+
+
+########################################################################
+# CODEGEN
+# Microbenchmark of CodeGenerator.generate alone (parsing done once,
+# outside the timings), driving the visitors recursively and from the
+# explicit stack, on the samples and on the generated programs.
+########################################################################
+
+def bench_codegen(args):
+    from compiler import Compiler
+    from emitter import CodeEmitter
+    from generator import CodeGenerator
+
+    compiler = Compiler()
+    print(f"{'programa':<24} {'nós':>8} {'recursivo (ms)':>15} {'pilha (ms)':>11} {'ns/nó':>7}")
+    for name, text, _ in suite_programs(args.scale):
+        ast = compiler.parse(text)
+        nodes = count_nodes(ast)
+        times = []
+        for explicit_stack in (False, True):
+            try:
+                best, _ = best_of(args.runs, lambda: CodeGenerator(CodeEmitter(), explicit_stack).generate(ast))
+            except RecursionError:
+                best = float("nan")
+            times.append(best)
+        print(f"{name:<24} {nodes:>8} {times[0] * 1000:>15.3f} {times[1] * 1000:>11.3f} "
+              f"{min(times) * 1e9 / nodes:>7.0f}")
+
+
+########################################################################
+# SUITE
+# Compiles (and runs, on vm.py) every sample in inputs/ plus programs
+# generated at a given size, timing each stage on its own:
+#
+#   lexer.token      tokenizing the whole source
+#   parser.parse     building the AST (includes its own lexing)
+#   optimize         AST passes + peephole (only with -O)
+#   generate         CodeGenerator.generate
+#   dump             CodeEmitter.dump
+#   vm.run           running the program on vm.py
+#   aot.run          running its translation to Python (aot.py; the
+#                    translation itself, cached, is not timed)
+#
+# Each stage is run --runs times and the best time is kept. Results can
+# be written as JSON, stored as a baseline and compared against one
+# later; a stage that got slower than --threshold (and by more than
+# NOISE_FLOOR), or more instructions/VM steps for the same program,
+# count as regressions and make the run exit with 1.
+########################################################################
+
+NOISE_FLOOR = 0.0005 # s: diferenças menores do que isto são ruído
+
+def generate_deep_nesting(depth):
+    lines = ["program DeepNesting;", "var", "  x, s: Integer;", "begin", "  x := 0;", "  s := 0;",
+             "  while x < 20 do", "  begin"]
+    for level in range(depth):
+        indent = "  " * (level + 2)
+        lines.append(f"{indent}if s >= {-level - 1} then")
+        lines.append(f"{indent}begin")
+        lines.append(f"{indent}  s := s + {level % 5};")
+    for level in reversed(range(depth)):
+        lines.append("  " * (level + 2) + "end;")
+    lines += ["    x := x + 1", "  end;", "  writeln(s)", "end."]
+    return "\n".join(lines), ""
+
+
+def generate_long_statements(count):
+    lines = ["program LongStatements;", "var", "  a, b, c: Integer;", "begin",
+             "  a := 1;", "  b := 2;", "  c := 0;"]
+    for i in range(count):
+        if i % 3 == 0:
+            lines.append(f"  a := (a + {i}) mod 1000;")
+        elif i % 3 == 1:
+            lines.append(f"  b := (b * 3 + a) mod 7919;")
+        else:
+            lines.append(f"  if a > b then c := c + {i % 7} else c := c - 1;")
+    lines += ["  writeln(a);", "  writeln(b);", "  writeln(c)", "end."]
+    return "\n".join(lines), ""
+
+
+def generate_many_functions(count):
+    lines = ["program ManyFunctions;"]
+    for i in range(count):
+        lines += [f"function F{i}(a, b: Integer): Integer;",
+                  "begin",
+                  f"  F{i} := a * {i % 13 + 1} + b;",
+                  "end;"]
+    lines += ["var", "  s: Integer;", "begin", "  s := 1;"]
+    for i in range(count):
+        lines.append(f"  s := F{i}(s, {i}) mod 10007;")
+    lines += ["  writeln(s)", "end."]
+    return "\n".join(lines), ""
+
+
+def generate_large_arrays(size):
+    lines = ["program LargeArrays;", "var",
+             f"  v: array[1..{size}] of Integer;",
+             "  i, s: Integer;",
+             "begin",
+             "  s := 0;",
+             f"  for i := 1 to {size} do",
+             "    readln(v[i]);",
+             f"  for i := 1 to {size} do",
+             f"    s := (s + v[i] * v[{size} - i + 1]) mod 100003;",
+             "  writeln(s)",
+             "end."]
+    stdin = "".join(f"{i % 100}\n" for i in range(size))
+    return "\n".join(lines), stdin
+
+
+GENERATORS = {
+    "deep_nesting": (generate_deep_nesting, 80),
+    "long_statements": (generate_long_statements, 3000),
+    "many_functions": (generate_many_functions, 300),
+    "large_arrays": (generate_large_arrays, 5000),
+}
+
+SAMPLE_STDIN = "101\n" * 16 # serve como número e como string binária
+
+
+def suite_programs(scale):
+    programs = []
+    for path in sorted(glob.glob(os.path.join(INPUTS_DIR, "*.pas"))):
+        with open(path) as f:
+            programs.append((os.path.basename(path), f.read(), SAMPLE_STDIN))
+    for name, (generator, size) in GENERATORS.items():
+        text, stdin = generator(max(1, int(size * scale)))
+        programs.append((name, text, stdin))
+    return programs
+
+
+def best_of(runs, stage):
+    """Runs `stage()` `runs` times; returns (best time, last result)."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        value = stage()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def bench_program(text, stdin, runs, optimize):
+    from compiler import Compiler
+    from emitter import CodeEmitter
+    from generator import CodeGenerator
+    from typecheck import TypeChecker
+    import peephole
+    import vm
+    import aot
+
+    compiler = Compiler(optimize=optimize)
+    times = {}
+
+    def lex():
+        lexer = compiler.lexer
+        lexer.lineno = 1
+        lexer.input(text)
+        token = lexer.token
+        count = 0
+        while token():
+            count += 1
+        return count
+
+    times["lexer.token"], tokens = best_of(runs, lex)
+    times["parser.parse"], ast = best_of(runs, lambda: compiler.parse(text))
+    times["typecheck"], _ = best_of(runs, lambda: TypeChecker().run(ast))
+
+    def optimize_ast():
+        tree = compiler.parse(text) # as passagens alteram a árvore
+        TypeChecker().run(tree)
+        # os mesmos passos que o -O do compilador (e depois o peephole)
+        ast_passes = compiler.ast_passes()
+        start = time.perf_counter()
+        for _, ast_pass in ast_passes:
+            ast_pass.run(tree)
+        return tree, time.perf_counter() - start
+
+    if optimize:
+        ast, ast_time = optimize_ast()
+
+    def generate():
+        em = CodeEmitter()
+        CodeGenerator(em).generate(ast)
+        return em
+
+    times["generate"], em = best_of(runs, generate)
+
+    if optimize:
+        peephole_time, (code, _) = best_of(runs, lambda: peephole.optimize(em.code))
+        times["optimize"] = ast_time + peephole_time
+        em.code = code
+
+    times["dump"], code = best_of(runs, em.dump)
+
+    program = vm.load_code(em.code)
+    def run_vm():
+        machine = vm.VM(program, stdin=io.StringIO(stdin), stdout=io.StringIO())
+        machine.run()
+        return machine.steps
+    times["vm.run"], steps = best_of(runs, run_vm)
+
+    translated = aot.load(program)
+    def run_aot():
+        translated.run(stdin=io.StringIO(stdin), stdout=io.StringIO())
+        return translated.steps
+    times["aot.run"], aot_steps = best_of(runs, run_aot)
+    if aot_steps != steps:
+        raise RuntimeError(f"aot.py executou {aot_steps} instruções, a VM {steps}")
+
+    return {
+        "bytes": len(text),
+        "tokens": tokens,
+        "instructions": len(program.code),
+        "steps": steps,
+        "times": times,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Prints a comparison with the baseline; returns the number of regressions."""
+    regressions = 0
+    print(f"\n{'programa':<24} {'etapa':<14} {'base (ms)':>10} {'agora (ms)':>11} {'dif':>8}")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        for stage, now in result["times"].items():
+            before = base["times"].get(stage)
+            if before is None:
+                continue
+            change = (now - before) / before if before else 0.0
+            flag = ""
+            if change > threshold and now - before > NOISE_FLOOR:
+                flag = "  REGRESSÃO"
+                regressions += 1
+            elif change < -threshold and before - now > NOISE_FLOOR:
+                flag = "  melhoria"
+            print(f"{name:<24} {stage:<14} {before * 1000:>10.3f} {now * 1000:>11.3f} {change:>+8.1%}{flag}")
+
+        # contagens não têm ruído: qualquer aumento é uma regressão
+        for counter in ("instructions", "steps"):
+            before, now = base.get(counter), result[counter]
+            if before is None or before == now:
+                continue
+            flag = "  REGRESSÃO" if now > before else "  melhoria"
+            regressions += now > before
+            print(f"{name:<24} {counter:<14} {before:>10} {now:>11} {(now - before) / before:>+8.1%}{flag}")
+    return regressions
+
+
+def bench_suite(args):
+    from compiler import compiler_version
+
+    results = {}
+    for name, text, stdin in suite_programs(args.scale):
+        result = bench_program(text, stdin, args.runs, args.optimize)
+        results[name] = result
+        stages = "  ".join(f"{stage} {seconds * 1000:.2f}" for stage, seconds in result["times"].items())
+        print(f"{name:<24} {result['tokens']:>7} tok {result['instructions']:>7} instr "
+              f"{result['steps']:>9} steps   {stages}")
+
+    document = {
+        "meta": {
+            "compiler": compiler_version(),
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            "scale": args.scale,
+            "optimize": args.optimize,
+        },
+        "results": results,
+    }
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(document, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{regressions} regressões (limite {args.threshold:.0%})")
+            return 1
+        print("\nsem regressões")
+    return 0
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmarks do compilador de Pascal")
+    sub = argparser.add_subparsers(dest="bench", required=True)
+
+    startup = sub.add_parser("startup", help="arranque a frio vs a quente do main.py")
+    startup.add_argument("source", nargs="?", default=os.path.join(INPUTS_DIR, "prime_number.pas"))
+    startup.add_argument("-n", "--runs", type=int, default=10)
+    startup.set_defaults(func=bench_startup)
+
+    lexer = sub.add_parser("lexer", help="débito do lexer num programa gerado")
+    lexer.add_argument("-s", "--size", type=int, default=2, help="tamanho do programa em MB")
+    lexer.add_argument("-n", "--runs", type=int, default=3)
+    lexer.set_defaults(func=bench_lexer)
+
+    ast = sub.add_parser("ast", help="nós e memória da AST de um programa gerado")
+    ast.add_argument("-s", "--statements", type=int, default=20000)
+    ast.add_argument("-n", "--runs", type=int, default=1)
+    ast.set_defaults(func=bench_ast)
+
+    codegen = sub.add_parser("codegen", help="CodeGenerator.generate, recursivo vs pilha explícita")
+    codegen.add_argument("-n", "--runs", type=int, default=20)
+    codegen.add_argument("--scale", type=float, default=1.0, help="multiplica o tamanho dos programas gerados")
+    codegen.set_defaults(func=bench_codegen)
+
+    suite = sub.add_parser("suite", help="tempos por etapa em exemplos e programas gerados")
+    suite.add_argument("-n", "--runs", type=int, default=3)
+    suite.add_argument("--scale", type=float, default=1.0, help="multiplica o tamanho dos programas gerados")
+    suite.add_argument("-O", "--optimize", action="store_true", help="inclui as passagens de otimização")
+    suite.add_argument("--json", metavar="FICHEIRO", help="escreve os resultados em JSON")
+    suite.add_argument("--save-baseline", metavar="FICHEIRO", help="guarda os resultados como referência")
+    suite.add_argument("--compare", metavar="FICHEIRO", help="compara com uma referência guardada")
+    suite.add_argument("--threshold", type=float, default=0.10,
+                       help="abrandamento relativo que conta como regressão (default 0.10)")
+    suite.set_defaults(func=bench_suite)
+
+    args = argparser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    exit(main())
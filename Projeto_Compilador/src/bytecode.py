@@ -0,0 +1,151 @@
+from ir import Code, Op, JUMP_OPS, STRING_OPS
+from vm import Program, VMError, INT_OPS
+
+########################################################################
+# BINARY BYTECODE
+# A compact binary form of a compiled program, loaded by the VM without
+# parsing any text:
+#
+#   "EWVB" version
+#   strings: count, then (length, UTF-8 bytes) for each string
+#   labels:  count, then (name: string index, instruction index)
+#   code:    count, then opcode byte [operand] per instruction
+#
+# Every number is a varint (LEB128: 7 bits per byte, low bits first).
+# Operands depend on the opcode:
+#  - JZ/JUMP/PUSHA:      index of the target instruction (already resolved)
+#  - PUSHS/ERR:          index into the string pool (each literal once)
+#  - integer operands:   zigzag varint (-1 -> 1, 1 -> 2, -2 -> 3, ...)
+#  - everything else:    no operand
+# Comments are dropped. Label names are kept only for the VM profiler
+# and error messages: jumps don't use them.
+########################################################################
+
+MAGIC = b"EWVB"
+VERSION = 1
+
+class BytecodeError(VMError):
+    pass
+
+
+def _write_varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def encode(code: Code) -> bytes:
+    """Bytecode of IR instructions (emitter.code)."""
+    strings = {}  # texto -> índice na pool
+    def intern(text):
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    # 1ª passagem: posição de cada label (as labels e os comentários não ocupam instruções)
+    labels = {}
+    count = 0
+    for op, arg in zip(code.ops, code.args):
+        if op == Op.LABEL:
+            labels[arg] = count
+        elif op != Op.COMMENT:
+            count += 1
+
+    body = bytearray()
+    write_varint = _write_varint
+    for op, arg in zip(code.ops, code.args):
+        if op >= Op.LABEL:
+            continue
+        body.append(op)
+        if op in JUMP_OPS:
+            if arg not in labels:
+                raise BytecodeError(f"undefined label '{arg}'")
+            write_varint(body, labels[arg])
+        elif op in STRING_OPS:
+            write_varint(body, intern(arg))
+        elif op in INT_OPS:
+            n = 1 if arg is None else arg # como na VM: `POP` é `POP 1`
+            write_varint(body, n * 2 if n >= 0 else -n * 2 - 1)
+
+    label_table = bytearray()
+    _write_varint(label_table, len(labels))
+    for name, index in labels.items():
+        _write_varint(label_table, intern(name))
+        _write_varint(label_table, index)
+
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    _write_varint(out, len(strings))
+    for text in strings: # (os dicts mantêm a ordem de inserção = índice)
+        data = text.encode("utf-8")
+        _write_varint(out, len(data))
+        out += data
+    out += label_table
+    _write_varint(out, count)
+    out += body
+    return bytes(out)
+
+
+def is_bytecode(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+
+def load(data: bytes) -> Program:
+    """Program (for vm.VM) from bytecode."""
+    if not is_bytecode(data):
+        raise BytecodeError("not an EWVM bytecode file")
+    if data[len(MAGIC)] != VERSION:
+        raise BytecodeError(f"unsupported bytecode version {data[len(MAGIC)]}")
+    pos = len(MAGIC) + 1
+
+    def read_varint():
+        nonlocal pos
+        byte = data[pos]
+        pos += 1
+        n = byte & 0x7F
+        shift = 7
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            n |= (byte & 0x7F) << shift
+            shift += 7
+        return n
+
+    try:
+        strings = []
+        for _ in range(read_varint()):
+            length = read_varint()
+            strings.append(data[pos:pos + length].decode("utf-8"))
+            pos += length
+
+        labels = {}
+        for _ in range(read_varint()):
+            name = strings[read_varint()]
+            labels[name] = read_varint()
+
+        count = read_varint()
+        code = []
+        append = code.append
+        jump_ops, string_ops, int_ops = JUMP_OPS, STRING_OPS, INT_OPS
+        for _ in range(count):
+            op = data[pos]
+            pos += 1
+            if op in jump_ops:
+                append((op, read_varint()))
+            elif op in string_ops:
+                append((op, strings[read_varint()]))
+            elif op in int_ops:
+                z = read_varint()
+                append((op, (z >> 1) ^ -(z & 1)))
+            elif op < Op.LABEL:
+                append((op, None))
+            else:
+                raise BytecodeError(f"invalid opcode {op} at byte {pos - 1}")
+    except IndexError:
+        raise BytecodeError("truncated bytecode file") from None
+
+    if pos != len(data):
+        raise BytecodeError(f"{len(data) - pos} unexpected bytes after the code")
+    return Program(code, labels)
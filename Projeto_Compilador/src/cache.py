@@ -0,0 +1,128 @@
+import os
+import json
+import base64
+import hashlib
+
+########################################################################
+# CACHE DIRECTORY
+# Everything the compiler persists between runs (parser tables, build
+# cache, ...)
+# lives under one directory, by default `src/.cache`.
+# It can be moved with the PASCAL_CACHE_DIR environment variable
+# (useful in CI, where the source tree may be read-only).
+########################################################################
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+
+def cache_dir(*parts):
+    path = os.path.join(os.environ.get("PASCAL_CACHE_DIR", DEFAULT_CACHE_DIR), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def digest(*chunks) -> str:
+    h = hashlib.sha256()
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+########################################################################
+# BUILD CACHE
+# Compiled programs, keyed by a hash of the source text, the compiler
+# version and the compilation options. Entries are small JSON files
+# (binary code is stored in base64);
+# when the directory grows past `max_bytes` the least recently used
+# entries (by mtime, refreshed on every hit) are deleted.
+########################################################################
+
+DEFAULT_BUILD_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class BuildCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_BUILD_CACHE_BYTES):
+        self.directory = directory or cache_dir("build")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._size = None # estimativa do tamanho total (calculada na 1ª escrita)
+
+    def key(self, text, version, *options) -> str:
+        return digest(version, *map(repr, options), text)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Returns (program_name, code) or None."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path) # marca como usado recentemente
+        except (OSError, ValueError):
+            return None
+        code = entry["code"]
+        if entry.get("binary"):
+            code = base64.b64decode(code)
+        return entry["program_name"], code
+
+    def put(self, key, program_name, code):
+        path = self._path(key)
+        if isinstance(code, bytes):
+            entry = {"program_name": program_name, "code": base64.b64encode(code).decode("ascii"), "binary": True}
+        else:
+            entry = {"program_name": program_name, "code": code}
+        data = json.dumps(entry).encode("utf-8") # (o tamanho conta em bytes, como no disco)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        if self._size is None:
+            self._size = self._entries_size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue # apagado por outro processo entretanto
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _entries_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        # remove os menos usados até ficar abaixo de 3/4 do limite,
+        # para não ter de varrer a diretoria a cada escrita
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 3 // 4
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self._size = total
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._size = 0
@@ -0,0 +1,203 @@
+import os
+import glob
+import tempfile
+
+from lexer import new_lexer
+from parser import new_parser, reset_state, raise_syntax_errors
+from generator import CodeGenerator
+from emitter import CodeEmitter, StreamingEmitter
+from cache import digest
+import peephole
+import bytecode
+from optimizer import ConstantFolder, AlgebraicSimplifier, DeadCodeEliminator, LoopInvariantMotion, FunctionInliner, INLINE_MAX_SIZE
+from typecheck import TypeChecker
+
+########################################################################
+# COMPILER API
+# A Compiler owns its lexer, parser and symbol state, so one process can
+# compile any number of programs (one after the other) without leaking
+# state between them. Errors in the source program are raised as
+# errors.CompilationError (see errors.py), never by exiting.
+#
+#   result = compile_source(text)
+#   result.program_name, result.code, result.ast
+#
+# compile_to_file(compiler, text, outdir) streams the code straight into
+# <outdir>/<program>.out (see `out` below).
+#
+# Given a cache.BuildCache, the whole pipeline is skipped for sources
+# already compiled by the same compiler version (result.cached is True
+# and result.ast is None in that case).
+#
+# Before anything else the AST is type checked once (typecheck.py),
+# which annotates every expression with its type.
+#
+# compile(text, out=f) streams the code into the open file `f` while it
+# is generated, instead of returning it (result.code is None then, and
+# the program is not stored in the cache). With comments=False the
+# `// ...` lines of the generated code are left out.
+#
+# With output_format="binary" the result is EWVM bytecode (bytes, see
+# bytecode.py) instead of text, written to <program>.ewvb.
+#
+# With optimize=True the AST goes through the optimization passes in
+# optimizer.py before code generation, and the generated code through
+# peephole.py; what they did is reported in result.stats.
+#
+# With inline=True calls to small functions (at most inline_size AST
+# nodes) are replaced by their bodies first (optimizer.FunctionInliner).
+########################################################################
+
+__version__ = "1.0"
+
+_version_fingerprint = None
+
+def compiler_version() -> str:
+    """
+    __version__ plus a hash of the compiler's own modules, so cached
+    builds are invalidated whenever the compiler itself changes.
+    """
+    global _version_fingerprint
+    if _version_fingerprint is None:
+        chunks = []
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(src_dir, "*.py"))):
+            with open(path, "rb") as f:
+                chunks.append(f.read())
+        _version_fingerprint = f"{__version__}+{digest(*chunks)[:12]}"
+    return _version_fingerprint
+
+
+OUTPUT_EXTENSIONS = {"text": ".out", "binary": ".ewvb"}
+
+class CompilationResult:
+    def __init__(self, program_name, code, ast, cached=False, stats=None, output_format="text"):
+        self.program_name = program_name
+        self.code = code    # EWVM code (str, or bytes if binary), as written to the output file (None if streamed)
+        self.ast = ast
+        self.cached = cached
+        self.stats = stats if stats is not None else {} # "passo.métrica" -> valor
+        self.output_format = output_format
+
+    @property
+    def output_name(self):
+        return f"{self.program_name}{OUTPUT_EXTENSIONS[self.output_format]}"
+
+
+class Compiler:
+    def __init__(self, cache=None, optimize=False, comments=True, output_format="text",
+                 inline=False, inline_size=INLINE_MAX_SIZE):
+        if output_format not in OUTPUT_EXTENSIONS:
+            raise ValueError(f"unknown output format '{output_format}'")
+        self.lexer = new_lexer()
+        self.parser = new_parser()
+        self.cache = cache
+        self.optimize = optimize
+        self.comments = comments
+        self.output_format = output_format
+        self.inline = inline
+        self.inline_size = inline_size
+
+    def options(self):
+        return {"optimize": self.optimize, "comments": self.comments, "output_format": self.output_format,
+                "inline": self.inline and self.inline_size}
+
+    def parse(self, text):
+        self.lexer.lineno = 1
+        reset_state(self.parser, text)
+        ast = self.parser.parse(text, lexer=self.lexer)
+        raise_syntax_errors(self.parser) # todos os erros de sintaxe, num só ParseError
+        return ast
+
+    def ast_passes(self):
+        """(stats prefix, pass) of the AST passes these options run, in order (new instances)."""
+        ast_passes = []
+        if self.inline:
+            ast_passes.append(("inline", FunctionInliner(self.inline_size)))
+        if self.optimize:
+            ast_passes += [("fold", ConstantFolder()), ("algebra", AlgebraicSimplifier()),
+                           ("dce", DeadCodeEliminator()), ("licm", LoopInvariantMotion())]
+        return ast_passes
+
+    def compile(self, text, out=None) -> CompilationResult:
+        if self.cache is not None:
+            key = self.cache.key(text, compiler_version(), sorted(self.options().items()))
+            hit = self.cache.get(key)
+            if hit is not None:
+                program_name, code = hit
+                if out is not None:
+                    out.write(code)
+                    code = None
+                return CompilationResult(program_name, code, None, cached=True,
+                                         output_format=self.output_format)
+
+        ast = self.parse(text)
+        TypeChecker().run(ast) # anota os tipos; reúne todos os erros de tipos num só SemanticError
+
+        stats = {}
+        for prefix, ast_pass in self.ast_passes():
+            for name, value in ast_pass.run(ast).items():
+                stats[f"{prefix}.{name}"] = value
+
+        # o peephole precisa do programa inteiro: com -O o código só é escrito no fim
+        if out is not None and not self.optimize and self.output_format == "text":
+            em = StreamingEmitter(out, comments=self.comments)
+        else:
+            em = CodeEmitter(comments=self.comments)
+        gen = CodeGenerator(em)
+        try:
+            gen.generate(ast)
+        except RecursionError:
+            # árvore demasiado funda para visitar recursivamente: repete com a pilha explícita
+            em.rewind()
+            gen = CodeGenerator(em, explicit_stack=True)
+            gen.generate(ast)
+
+        if self.optimize:
+            em.code, peephole_stats = peephole.optimize(em.code)
+            for name, value in peephole_stats.items():
+                stats[f"peephole.{name}"] = value
+
+        if self.output_format == "binary":
+            code = bytecode.encode(em.code)
+            if out is not None:
+                out.write(code)
+                code = None
+        elif out is None:
+            code = em.dump()
+        else:
+            if not isinstance(em, StreamingEmitter):
+                code, em = em.code, StreamingEmitter(out)
+                em.write_code(code)
+            em.close()
+            code = None
+
+        result = CompilationResult(gen.program_name, code, ast, stats=stats,
+                                   output_format=self.output_format)
+
+        if self.cache is not None and code is not None:
+            self.cache.put(key, result.program_name, result.code)
+        return result
+
+
+_default_compiler = None
+
+def compile_source(text) -> CompilationResult:
+    global _default_compiler
+    if _default_compiler is None:
+        _default_compiler = Compiler()
+    return _default_compiler.compile(text)
+
+
+def compile_to_file(compiler, text, outdir):
+    # o nome do .out só se sabe depois de gerar o código: escreve num
+    # temporário da mesma diretoria e renomeia no fim
+    fd, tmp_path = tempfile.mkstemp(dir=outdir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if compiler.output_format == "binary" else "w") as tmp_file:
+            result = compiler.compile(text, out=tmp_file)
+        os.replace(tmp_path, os.path.join(outdir, result.output_name))
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return result
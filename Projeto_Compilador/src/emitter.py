@@ -1,16 +1,110 @@
+from ir import Code, Op
+
+########################################################################
+# CODE EMITTERS
+# The generator emits IR instructions (ir.py), never text:
+#   em.emit(Op.PUSHL, 3)    em.label("L1")    em.comment("for")
+# set_line(n) records n as the source line of the instructions emitted
+# from then on.
+#
+# CodeEmitter keeps the instructions in a Code (`code`), for the
+# peephole optimizer and for dump(). StreamingEmitter writes them to a
+# file-like sink as they are produced, in chunks of BUFFER_LINES lines,
+# so the program is never held in memory in full (nor joined into one
+# big string). Labels are symbolic in EWVM code (`JZ L3` ... `L3:`), so
+# nothing has to be patched after it is written.
+#
+# With comments=False the comments are dropped as they are emitted.
+########################################################################
+
+BUFFER_LINES = 4096
+
+LABEL, COMMENT = Op.LABEL, Op.COMMENT
+
 class CodeEmitter:
-    def __init__(self):
-        self.code = []
+    def __init__(self, comments=True):
         self.label_count = 0
         self.temp_count = 0
-    
+        self.comments = comments
+        self._start(Code())
+
+    def _start(self, code):
+        self.code = code
+        # emit() é chamado por cada instrução: appends já resolvidos
+        self._append_op = code.ops.append
+        self._append_arg = code.args.append
+
     def new_label(self, base="L"):
         new_label = f"{base}{self.label_count}"
         self.label_count += 1
         return new_label
 
-    def emit(self, instruction: str):
-        self.code.append(instruction)
-    
+    def emit(self, op: Op, arg=None):
+        self._append_op(op)
+        self._append_arg(arg)
+
+    def set_line(self, line: int):
+        self.code.set_line(line)
+
+    def label(self, name: str):
+        self.emit(LABEL, name)
+
+    def comment(self, text: str):
+        if self.comments:
+            self.emit(COMMENT, text)
+
+    def rewind(self):
+        """Discards everything emitted so far (to generate the program again)."""
+        self._start(Code())
+        self.label_count = 0
+        self.temp_count = 0
+
+    def dump(self):
+        return self.code.dump()
+
+
+class StreamingEmitter(CodeEmitter):
+    def __init__(self, sink, comments=True, buffer_lines=BUFFER_LINES):
+        super().__init__(comments)
+        self.sink = sink
+        self.start = sink.tell() if sink.seekable() else None
+        self.buffer_lines = buffer_lines
+        self.lines_written = 0
+
+    def emit(self, op: Op, arg=None):
+        self._append_op(op)
+        self._append_arg(arg)
+        if len(self.code.ops) >= self.buffer_lines:
+            self.flush()
+
+    def write_code(self, code: Code):
+        """Writes code generated elsewhere (e.g. after the peephole optimizer)."""
+        self.flush()
+        self._start(code)
+        self.flush()
+
+    def flush(self):
+        if not len(self.code):
+            return
+        # mesmo formato do dump(): linhas separadas por "\n", sem "\n" no fim
+        self.sink.write(("\n" if self.lines_written else "") + self.code.dump())
+        self.lines_written += len(self.code)
+        line = self.code.line_numbers[-1] if self.code.line_numbers else 0
+        self._start(Code())
+        self.code.set_line(line)
+
+    def close(self):
+        """Writes what is left in the buffer (the sink stays open)."""
+        self.flush()
+        self.sink.flush()
+
+    def rewind(self):
+        if self.start is None:
+            raise ValueError("o destino do código não permite recomeçar (não é seekable)")
+        super().rewind()
+        self.sink.seek(self.start)
+        self.sink.truncate()
+        self.lines_written = 0
+
     def dump(self):
-        return "\n".join(self.code)
+        raise TypeError("StreamingEmitter writes its code to the sink; there is nothing to dump")
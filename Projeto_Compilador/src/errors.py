@@ -0,0 +1,86 @@
+from bisect import bisect_right
+
+########################################################################
+# COMPILATION ERRORS
+# Every stage reports problems in the source program by raising a
+# CompilationError (never by calling exit), so the compiler can be used
+# as a library. Each error carries one or more Diagnostics.
+########################################################################
+
+class Diagnostic:
+    def __init__(self, kind, message, line=None):
+        self.kind = kind        # "lexical" | "syntax" | "semantic"
+        self.message = message
+        self.line = line
+
+    def __str__(self):
+        if self.line is None:
+            return self.message
+        return f"[Ln {self.line}] {self.message}"
+
+    def __repr__(self):
+        return f"Diagnostic({self.kind!r}, {self.message!r}, line={self.line})"
+
+
+class CompilationError(Exception):
+    kind = "error"
+
+    def __init__(self, message, line=None, diagnostics=None):
+        if diagnostics is None:
+            diagnostics = [Diagnostic(self.kind, message, line)]
+        self.diagnostics = diagnostics
+        super().__init__("\n".join(str(d) for d in diagnostics))
+
+
+class LexicalError(CompilationError):
+    kind = "lexical"
+
+
+class ParseError(CompilationError):
+    kind = "syntax"
+
+
+class SemanticError(CompilationError):
+    kind = "semantic"
+
+
+########################################################################
+# SOURCE POSITIONS
+# Maps character offsets in a source text (PLY's lexpos) to lines and
+# columns. The offsets where each line starts are found once, on the
+# first lookup, and then every position is a binary search, so reporting
+# many errors costs nothing like re-splitting the file for each one.
+########################################################################
+
+class SourceMap:
+    def __init__(self, text):
+        self.text = text
+        self._line_starts = None
+
+    @property
+    def line_starts(self):
+        if self._line_starts is None:
+            starts = [0]
+            find = self.text.find
+            pos = find("\n")
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = find("\n", pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def line(self, offset):
+        """Line (from 1) of the character at `offset`."""
+        return bisect_right(self.line_starts, offset)
+
+    def column(self, offset):
+        """Column (from 0) of the character at `offset`."""
+        return offset - self.line_starts[self.line(offset) - 1]
+
+    def line_text(self, line):
+        """Text of line `line` (from 1), without the newline."""
+        starts = self.line_starts
+        if not 1 <= line <= len(starts):
+            return ""
+        end = starts[line] - 1 if line < len(starts) else len(self.text)
+        return self.text[starts[line - 1]:end]
@@ -1,9 +1,53 @@
-from tree import Node
+from tree import Node, unwrap, hidden_name
 from emitter import CodeEmitter
-from scope import Scope
+from ir import Op
+from scope import Scope, type_name
+from errors import SemanticError
+
+_visitor_tables = {}
+
+def visitor_table(cls):
+    """label -> gen_<label> function of a generator class (computed once per class)."""
+    table = _visitor_tables.get(cls)
+    if table is None:
+        table = {name[len("gen_"):]: getattr(cls, name) for name in dir(cls) if name.startswith("gen_")}
+        _visitor_tables[cls] = table
+    return table
+
+
+def chain_operands(node: Node) -> list:
+    """Operands of `a and b and c` (or of an `or` chain), left to right."""
+    operands = []
+    label = node.label
+    while node.label == label:
+        operands.append(node.args[1])
+        node = node.args[0]
+    operands.append(node)
+    operands.reverse()
+    return operands
+
+
+def is_not(node: Node) -> bool:
+    return node.label == "UnaryExpression" and node.args[0].args[0].lower() == "not"
+
+
+########################################################################
+# VISITORS
+# Each gen_<label> method emits the code of one kind of node. A method
+# that needs the code of a child node in the middle of its own does not
+# call itself recursively: it yields the child (`yield node.args[1]`)
+# and carries on once the child's code has been emitted. generate()
+# drives the visitors:
+#  - by default recursively, one Python call per level of the tree;
+#  - with explicit_stack=True from an explicit stack of suspended
+#    visitors, so a deep tree (long else-if chains, long expressions)
+#    can't hit Python's recursion limit.
+# Visitors are looked up in a label -> bound method table built once
+# per generator.
+########################################################################
 
 class CodeGenerator:
-    def __init__(self, emitter: CodeEmitter):
+    def __init__(self, emitter: CodeEmitter, explicit_stack=False):
         self.program_name = None
         self.em = emitter
         # self.global_vars = dict()
@@ -15,12 +59,45 @@ class CodeGenerator:
             'readln': self._gen_readln,
             'length': self._gen_length,
         }
-        self.declared_funcs = dict()
+        self.explicit_stack = explicit_stack
+        self.for_limits = dict() # nó For -> nome do local com o seu limite
+        self.visitors = {label: function.__get__(self) for label, function in visitor_table(type(self)).items()}
+
+
+    def visitor(self, node: Node):
+        return self.visitors.get(node.label, self.not_implemented)
 
 
     def generate(self, node: Node):
-        method = getattr(self, f"gen_{node.label}", self.not_implemented)
-        return method(node)
+        if self.explicit_stack:
+            self.generate_iterative(node)
+            return
+
+        children = self.visitors.get(node.label, self.not_implemented)(node)
+        if children is not None:
+            for child in children:
+                self.generate(child)
+
+
+    def generate_iterative(self, node: Node):
+        visitors = self.visitors
+        not_implemented = self.not_implemented
+        # pilha de visitors suspensos, cada um à espera do código de um filho
+        stack = []
+        push = stack.append
+
+        children = visitors.get(node.label, not_implemented)(node)
+        if children is not None:
+            push(children)
+
+        while stack:
+            for child in stack[-1]:
+                children = visitors.get(child.label, not_implemented)(child)
+                if children is not None:
+                    push(children)
+                    break # continua pelo filho
+            else:
+                stack.pop() # visitor terminou
     
 
     def not_implemented(self, node):
@@ -28,7 +105,7 @@ class CodeGenerator:
 
 
     def gen_Program(self, node):
-        self.generate(node.args[1])
+        yield node.args[1]
 
 
     def gen_ProgramDeclaration(self, node: Node):
@@ -37,7 +114,7 @@ class CodeGenerator:
         program_scope_node = node.args[1]  # <Scope> ou similar
 
         # 2) Primeiro, pular para main (para não cair nas funções imediatamente)
-        self.em.emit("JUMP main")
+        self.em.emit(Op.JUMP, "main")
 
         # 3) Identificar se existe um nó ManyDeclarations ou não
         # Se existir, será o primeiro filho; senão, o primeiro filho é 
@@ -54,30 +131,30 @@ class CodeGenerator:
 
             # 4.1) Gerar apenas funções antes do main:
             def gerar_funcoes(node):
-                if node.label == "FunctionDeclaration":
-                    self.generate(node)
+                if node.label in ("FunctionDeclaration", "ConstDeclaration"):
+                    yield node
                 elif node.label == "ManyDeclarations":
                     for child in node.args:
-                        gerar_funcoes(child)
+                        yield from gerar_funcoes(child)
                 # ignora VarDeclaration aqui
 
-            gerar_funcoes(decls)
+            yield from gerar_funcoes(decls)
 
         # 5) Agora escrevemos o rótulo de entrada do main e o START
-        self.em.emit("main:")
-        self.em.emit("START")
+        self.em.label("main")
+        self.em.emit(Op.START)
 
         # 6) Se houver declarações, gerar VarDeclaration antes do bloco de statements
         if has_decls:
             def gerar_variaveis_main(node):
                 if node.label == "VarDeclaration":
-                    self.generate(node)
+                    yield node
                 elif node.label == "ManyDeclarations":
                     for child in node.args:
-                        gerar_variaveis_main(child)
+                        yield from gerar_variaveis_main(child)
                 # ignora FunctionDeclaration aqui
 
-            gerar_variaveis_main(decls)
+            yield from gerar_variaveis_main(decls)
 
         # 7) Gerar o StatementBlock do main, que será:
         #    - Se tinha declarações, segundo filho de program_scope_node (args[1])
@@ -88,29 +165,53 @@ class CodeGenerator:
             main_block = program_scope_node.args[0]
 
         # 8) Gerar o conteúdo do bloco principal
-        self.generate(main_block)
+        self.declare_for_limits(main_block)
+        yield main_block
 
         # 9) Por fim, emitir STOP
-        self.em.emit("STOP")
+        self.em.emit(Op.STOP)
 
 
 
     def gen_Scope(self, node):
         for stmt in node.args:
-            self.generate(stmt)
+            if stmt.label == "StatementBlock":
+                self.declare_for_limits(stmt)
+            yield stmt
+
+
+    def declare_for_limits(self, block: Node):
+        """
+        Allocates one hidden local for the limit of each `for` in `block`
+        (its limit is evaluated once, before the loop, and kept there).
+        Literal and constant limits don't need one.
+        """
+        pending = [block]
+        while pending:
+            node = pending.pop()
+            if node.label == "For" and not self.is_constant_expression(node.args[2]):
+                name = hidden_name("lim", len(self.for_limits))
+                self.em.comment(f"limite do for em {name}")
+                self.em.emit(Op.PUSHI, 0)
+                self.scope.declare(name, "Integer")
+                self.for_limits[node] = name
+            pending.extend(arg for arg in reversed(node.args) if isinstance(arg, Node))
 
 
     def gen_StatementBlock(self, node):
+        set_line = self.em.set_line
         for stmt in node.args:
-            self.generate(stmt)
+            if stmt.line is not None:
+                set_line(stmt.line) # linha de origem das instruções (tabela de linhas do ir.Code)
+            yield stmt
 
 
     def gen_Statement(self, node):
-        self.generate(node.args[0])
+        yield node.args[0]
 
 
     def gen_NoTailStatement(self, node):
-        self.generate(node.args[0])
+        yield node.args[0]
 
 
     def gen_VarDeclaration(self, node):
@@ -139,52 +240,76 @@ class CodeGenerator:
 
             for declared_node in many_declared_node.args:
                 var_name = declared_node.args[0]
-                self.em.emit(f"// declaração da variável {var_name}")
+                self.em.comment(f"declaração da variável {var_name}")
                 
                 if var_type_node.label == 'SimpleType' and var_type_node.args[0].lower() == 'integer':
-                    self.em.emit(f"PUSHI 0")
+                    self.em.emit(Op.PUSHI, 0)
                 elif var_type_node.label == 'SimpleType' and var_type_node.args[0].lower() == 'string':
-                    self.em.emit('PUSHS ""')
+                    self.em.emit(Op.PUSHS, "")
                 elif var_type_node.label == 'SimpleType' and var_type_node.args[0].lower() == 'boolean':
-                    self.em.emit('PUSHI 0')
+                    self.em.emit(Op.PUSHI, 0)
                 elif var_type_node.label == 'ArrayType':
                     range_node = var_type_node.args[0]
-                    self.generate(range_node) # calcula range em runtime
-                    self.em.emit("ALLOCN")
+                    yield range_node # calcula range em runtime
+                    self.em.emit(Op.ALLOCN)
                 else:
-                    raise Exception(f"Variable type '{var_type_node.label}::{var_type_node.args[0]}' not accepted in declaration.")
+                    raise SemanticError(f"Variable type '{var_type_node.label}::{var_type_node.args[0]}' not accepted in declaration.")
 
-                self.scope.declare(var_name)
+                self.scope.declare(var_name, type_name(var_type_node))
                 # # Salva a variável no global_vars dict com o respectivo index
                 # self.global_vars[var_name] = self.global_var_counter
                 # self.global_var_counter += 1
 
 
+    def gen_ConstDeclaration(self, node):
+        # constantes não geram código: cada uso é substituído pelo valor
+        for const_def in node.args:
+            const_name = const_def.args[0]
+            value_node = const_def.args[1]
+            if not self.is_constant_expression(value_node):
+                raise SemanticError(f"Constant '{const_name}' must be initialized with a constant expression.")
+            self.scope.declare_const(const_name, value_node)
+
+
+    def is_constant_expression(self, node) -> bool:
+        if node.label == "LiteralValue":
+            return True
+        if node.label == "DeclaredName":
+            return self.scope.lookup_const(node.args[0]) is not None
+        if node.label in ("RoutineCall", "ArrayAccess"):
+            return False
+        return all(self.is_constant_expression(arg) for arg in node.args
+                   if isinstance(arg, Node) and not arg.label.endswith("Operator"))
+
+
     def gen_DeclaredName(self, node):
         var_name = node.args[0]
-        var_idx = self.scope.lookup(var_name)
+        symbol = self.scope.resolve(var_name)
 
-        if var_idx is None:
-            print(self.scope.scopes)
-            raise Exception(f"Variable '{var_name}' not declared.")
+        if symbol is not None and symbol.kind == 'const':
+            self.em.comment(f"constante {var_name}")
+            yield symbol.value
+            return
 
-        self.em.emit(f"// ler variável {var_name}")
-        self.em.emit(f"PUSHL {var_idx}")
+        if symbol is None or symbol.kind not in ('var', 'param'):
+            raise SemanticError(f"Variable '{var_name}' not declared.")
+
+        self.em.comment(f"ler variável {var_name}")
+        self.em.emit(Op.PUSHL, symbol.slot)
 
 
     def gen_Assignment(self, node):
-        self.generate(node.args[1]) # resolve the right-side expression 
+        yield node.args[1] # resolve the right-side expression 
         var_name = node.args[0].args[0] # left-side variable name
-        var_idx = self.scope.lookup(var_name)
+        symbol = self.scope.resolve(var_name)
 
-        if var_idx is not None:
-            self.em.emit(f"// assign da var {var_name}")
-            self.em.emit(f"STOREL {var_idx}")
-        elif var_name in self.declared_funcs:
-            return # faça nada
+        if symbol is not None and symbol.kind in ('var', 'param'):
+            self.em.comment(f"assign da var {var_name}")
+            self.em.emit(Op.STOREL, symbol.slot)
+        elif symbol is not None and symbol.kind == 'function':
+            return # faça nada: o valor fica na stack como retorno
         else:
-            print(self.scope.scopes)
-            raise Exception(f"Assignment to undeclared variable '{var_name}'")
+            raise SemanticError(f"Assignment to undeclared variable '{var_name}'")
 
 
 ########################################################################
@@ -194,45 +319,42 @@ class CodeGenerator:
 
     def gen_IfThenElse(self, node):
         condition_node = node.args[0]
-        self.generate(condition_node) # resolve condition
 
         else_label = self.em.new_label()
         endif_label = self.em.new_label()
 
-        self.em.emit(f"JZ {else_label}")
+        yield from self.jump_if_false(condition_node, else_label) # resolve condition
 
-        self.em.emit("// then")
-        self.generate(node.args[1])
-        self.em.emit(f"JUMP {endif_label}")
+        self.em.comment("then")
+        yield node.args[1]
+        self.em.emit(Op.JUMP, endif_label)
 
-        self.em.emit("// else")
-        self.em.emit(f"{else_label}:") # else label
-        self.generate(node.args[2])
+        self.em.comment("else")
+        self.em.label(else_label) # else label
+        yield node.args[2]
 
-        self.em.emit("// endif")
-        self.em.emit(f"{endif_label}:") # code after the if condition
+        self.em.comment("endif")
+        self.em.label(endif_label) # code after the if condition
 
 
     def gen_IfThen(self, node):
         condition_node = node.args[0]
-        self.generate(condition_node) # resolve condition
 
         # else_label = self.em.new_label()
         endif_label = self.em.new_label()
 
-        self.em.emit("// if")
-        self.em.emit(f"JZ {endif_label}")
+        self.em.comment("if")
+        yield from self.jump_if_false(condition_node, endif_label) # resolve condition
 
-        self.em.emit("// then")
-        self.generate(node.args[1])
-        self.em.emit(f"JUMP {endif_label}")
+        self.em.comment("then")
+        yield node.args[1] # (sem else: segue direto para o endif)
 
-        # self.em.emit("// else")
-        # self.em.emit(f"{else_label}:") # else label
+        # self.em.comment("else")
+        # self.em.label(else_label) # else label
         # self.generate(node.args[2])
 
-        self.em.emit("// endif")
-        self.em.emit(f"{endif_label}:") # code after the if condition
+        self.em.comment("endif")
+        self.em.label(endif_label) # code after the if condition
 
     
     def gen_For(self, node: Node):
@@ -248,48 +370,58 @@ class CodeGenerator:
         for_label = self.em.new_label()
         end_for_label = self.em.new_label()
 
+        # o limite é avaliado uma só vez, antes do assign, para o local
+        # reservado por declare_for_limits (literais/constantes não precisam)
+        self.em.comment("for")
+        limit_name = self.for_limits.get(node)
+        if limit_name is not None:
+            yield iter_limit_node
+            self.em.emit(Op.STOREL, self.scope.lookup(limit_name))
+
         # ao inicio, resolve primeiro o assign
-        self.em.emit("// for")
-        self.generate(assign_node) # resolve left-side
+        yield assign_node # resolve left-side
 
         # cria label
-        self.em.emit(f"{for_label}:")
+        self.em.label(for_label)
 
         # verifica condicao do loop
-        self.generate(iterable_var_node) # resolve declared name
-        self.generate(iter_limit_node) # resolve declared name
+        yield iterable_var_node # resolve declared name
+        if limit_name is not None:
+            self.em.emit(Op.PUSHL, self.scope.lookup(limit_name))
+        else:
+            yield iter_limit_node # literal ou constante
 
-        if for_loop_type == 'to': self.em.emit("INFEQ")
-        else: self.em.emit("SUPEQ")
+        if for_loop_type == 'to': self.em.emit(Op.INFEQ)
+        else: self.em.emit(Op.SUPEQ)
 
         # caso falhe, sai do loop
-        self.em.emit(f"JZ {end_for_label}")
+        self.em.emit(Op.JZ, end_for_label)
 
         # corpo do loop
-        self.generate(body_node)
+        yield body_node
 
         # incrementa variável do loop e volta ao inicio
         iterable_var_idx = self.scope.lookup(iterable_var_name)
         # if iterable_var_name not in self.global_vars:
         if iterable_var_idx is None:
-            raise Exception(f"Variable '{iterable_var_name}' not declared.")
+            raise SemanticError(f"Variable '{iterable_var_name}' not declared.")
 
-        self.em.emit("// atualiza variável do foor loop")
-        self.em.emit(f"// ler variável {iterable_var_name}")
-        self.em.emit(f"PUSHL {iterable_var_idx}")
-        self.em.emit("PUSHI 1")
+        self.em.comment("atualiza variável do foor loop")
+        self.em.comment(f"ler variável {iterable_var_name}")
+        self.em.emit(Op.PUSHL, iterable_var_idx)
+        self.em.emit(Op.PUSHI, 1)
 
-        if for_loop_type == 'to': self.em.emit("ADD")
-        else: self.em.emit("SUB")
+        if for_loop_type == 'to': self.em.emit(Op.ADD)
+        else: self.em.emit(Op.SUB)
 
-        self.em.emit(f"STOREL {iterable_var_idx}")
+        self.em.emit(Op.STOREL, iterable_var_idx)
 
-        self.em.emit(f"// voltar ao inicio do loop {for_label}")
-        self.em.emit(f"JUMP {for_label}")
+        self.em.comment(f"voltar ao inicio do loop {for_label}")
+        self.em.emit(Op.JUMP, for_label)
 
         # fim do loop
-        self.em.emit(f"// fim do loop {for_label}")
-        self.em.emit(f"{end_for_label}:")
+        self.em.comment(f"fim do loop {for_label}")
+        self.em.label(end_for_label)
 
 
     def gen_While(self, node: Node):
@@ -299,41 +431,46 @@ class CodeGenerator:
         while_label = self.em.new_label()
         end_while_label = self.em.new_label()
 
-        self.em.emit("// while loop")
-        self.em.emit(f"{while_label}:")
+        self.em.comment("while loop")
+        self.em.label(while_label)
 
         # 1) resolve condition
-        self.em.emit("// condição")
-        self.generate(condition_exp_node)
-        self.em.emit(f"JZ {end_while_label}")
+        self.em.comment("condição")
+        yield from self.jump_if_false(condition_exp_node, end_while_label)
 
         # 2) compila o body
-        self.generate(body_stmt_node)
+        yield body_stmt_node
 
         # 3) retorna ao início do loop
-        self.em.emit(f"JUMP {while_label}")
+        self.em.emit(Op.JUMP, while_label)
 
         # 4) fim do loop
-        self.em.emit(f"// fim do loop {while_label}")
-        self.em.emit(f"{end_while_label}:")
+        self.em.comment(f"fim do loop {while_label}")
+        self.em.label(end_while_label)
     
 
+    def gen_Repeat(self, node: Node):
+        repeat_label = self.em.new_label()
+
+        self.em.comment("repeat")
+        self.em.label(repeat_label)
+        yield node.args[0]
+
+        # volta ao início enquanto a condição for falsa
+        self.em.comment("until")
+        yield from self.jump_if_false(node.args[1], repeat_label)
+
+
     def gen_RoutineCall(self, node: Node):
         func_name = node.args[0].args[0]
         func_return = node.args[0].args[1]
-        func_params = reversed(node.args[1].args)  # ManyExpressions reversed
-
-        # empilha parâmetros em reversed e verifica se os tipos estão corretos
-        for param_idx, param in enumerate(func_params):
-            # verifica se o tipo do parâmetro corresponde ao esperado na declaração da função
-            if func_name in self.declared_funcs:
-                expected_types = self.declared_funcs[func_name]["params"]
-                if param_idx < len(expected_types):
-                    actual_type = self.infer_type(param)
-                    expected_type = expected_types[param_idx]
-                    if actual_type != expected_type:
-                        raise Exception(f"Parameter {len(list(func_params))-param_idx+1} in call to '{func_name}' expected '{expected_type}', but got '{actual_type}'.")
-            self.generate(param)
+        func_params = node.args[1].args if len(node.args) > 1 else ()
+        func_symbol = self.scope.lookup_function(func_name)
+
+        # empilha parâmetros em reversed (os tipos já foram verificados pelo TypeChecker)
+        for param_pos in range(len(func_params), 0, -1):
+            param = func_params[param_pos - 1]
+            yield param
             # # Verifica se o tipo do parâmetro corresponde ao esperado na declaração da função
             # if func_name in self.declared_funcs:
             #     expected_types = self.declared_funcs[func_name]["params"]
@@ -342,21 +479,22 @@ class CodeGenerator:
             #         actual_type = self.infer_type(param)
             #         expected_type = expected_types[param_index]
             #         if actual_type != expected_type:
-            #             raise Exception(f"Tipo do parâmetro {param_index+1} na chamada de '{func_name}' esperado '{expected_type}', mas recebeu '{actual_type}'.")
+            #             raise SemanticError(f"Tipo do parâmetro {param_index+1} na chamada de '{func_name}' esperado '{expected_type}', mas recebeu '{actual_type}'.")
             # self.generate(param)
         if func_return != "Unknown":
-            self.em.emit("// empilha slot para retorno")
-            self.em.emit("PUSHI 0")
+            self.em.comment("empilha slot para retorno")
+            self.em.emit(Op.PUSHI, 0)
 
         # call built-in func
         if func_name in self.builtin_funcs:
-            return self.builtin_funcs[func_name](node)
-        if func_name in self.declared_funcs:
-            self.em.emit(f"// chama função {func_name}")
-            self.em.emit(f"PUSHA {func_name}")
-            self.em.emit("CALL")
+            yield from self.builtin_funcs[func_name](node) or ()
+            return
+        if func_symbol is not None:
+            self.em.comment(f"chama função {func_name}")
+            self.em.emit(Op.PUSHA, func_name)
+            self.em.emit(Op.CALL)
         else:
-            raise NotImplementedError(f"Function {func_name} not defined")
+            raise SemanticError(f"Function {func_name} not defined")
 
 
 ########################################################################
@@ -368,7 +506,7 @@ class CodeGenerator:
 
     def gen_ManyDeclarations(self, node: Node):
         for declaration in node.args:
-            self.generate(declaration)
+            yield declaration
     
 
     def gen_FunctionDeclaration(self, node: Node):
@@ -378,23 +516,20 @@ class CodeGenerator:
 
         # 2) Extrair o tipo de retorno da função
         return_type_node = node.args[1]
-        func_return_type = return_type_node.args[0].args[0]
+        func_return_type = type_name(return_type_node.args[0])
 
-        # 3) extrair tipos dos parâmetros da árvore AST
+        # 3) extrair tipos dos parâmetros da árvore AST (um por nome declarado)
         param_types: list[str] = []
         routine_params_node = func_heading_node.args[1]
         if len(routine_params_node.args) > 0:
             many_param_tuples = routine_params_node.args[0]
             for param_tuple in many_param_tuples.args:
-                return_type = param_tuple.args[1].args[0].args[0]
-                for _ in param_tuple.args:
-                    param_types.append(return_type)
+                param_type = type_name(param_tuple.args[1].args[0])
+                for _ in param_tuple.args[0].args:
+                    param_types.append(param_type)
 
         # 4) registrar a função com retorno e assinatura
-        self.declared_funcs[func_name] = {
-            "return_type": func_return_type,
-            "params": param_types
-        }
+        self.scope.declare_function(func_name, func_return_type, param_types)
 
         # 2) entrar em escopo local
         self.scope.push()
@@ -416,55 +551,56 @@ class CodeGenerator:
                     var_name = declared_name_node.args[0]
                     # 2.1) Garantir que não haja colisão
                     if self.scope.lookup(var_name):
-                        raise Exception(f"Parâmetro '{var_name}' já declarado em outro lugar.")
+                        raise SemanticError(f"Parâmetro '{var_name}' já declarado em outro lugar.")
                     # 2.2) “Alocar” esse parâmetro em gp[] (mesma lógica de variável)
-                    self.em.emit(f"// declaração de parâmetro {var_name} da função {func_name}")
-                    self.em.emit("PUSHI 0") # valor inicial
-                    self.em.emit(f"STOREG {self.scope.declare(var_name)}")
+                    self.em.comment(f"declaração de parâmetro {var_name} da função {func_name}")
+                    self.em.emit(Op.PUSHI, 0) # valor inicial
+                    param_type = type_name(param_tuple.args[1].args[0])
+                    self.em.emit(Op.STOREG, self.scope.declare(var_name, param_type, kind='param'))
         
         # 3) Agora podemos emitir o label da função e gerar todo o corpo
-        self.em.emit(f"// declaração da função {func_name}")
+        self.em.comment(f"declaração da função {func_name}")
 
-        self.em.emit(f"{func_name}:")
+        self.em.label(func_name)
 
         # 4) Empilhar parâmetros:
         if len(routine_params.args) > 0:
-            self.em.emit(f"// Empilhar parâmetros")
+            self.em.comment("Empilhar parâmetros")
             many_param_tuples = routine_params.args[0]
             for param_tuple in many_param_tuples.args:
                 many_declared = param_tuple.args[0]
                 # para cada parâmetro
                 for param_index, declared_name_node in enumerate(many_declared.args):
-                    self.em.emit("PUSHFP")
+                    self.em.emit(Op.PUSHFP)
                     # Para cada parâmetro, empilha o valor correto do frame pointer
                     # O primeiro parâmetro está em FP-2, o segundo em FP-3, etc.
                     # param_index = many_declared.args.index(declared_name_node)
-                    self.em.emit(f"LOAD {-2 - param_index}")
+                    self.em.emit(Op.LOAD, -2 - param_index)
 
         # 4) Gerar o corpo da função (Scope)
         func_scope_node = node.args[2]
-        self.generate(func_scope_node)
+        yield func_scope_node
 
         # 5) salva no return
-        self.em.emit("// salva no return slot")
-        self.em.emit("STOREL -1")
+        self.em.comment("salva no return slot")
+        self.em.emit(Op.STOREL, -1)
 
         # 6) clean-up
         # para cada parâmetro, faz POP para limpar a stack
         if len(routine_params.args) > 0:
-            self.em.emit("// clean-up")
+            self.em.comment("clean-up")
             many_param_tuples = routine_params.args[0]
             for param_tuple in many_param_tuples.args:
                 many_declared = param_tuple.args[0]
                 for _ in many_declared.args:
-                    self.em.emit("POP 1")
+                    self.em.emit(Op.POP, 1)
 
         # 5) Epílogo: ao final, se o programador não tiver atribuído
         #    nenhum valor de retorno, talvez você queira emitir erro ou
         #    simplesmente retornar 0 por padrão. Supondo que o retorno
         #    já tenha sido colocado em gp[] pelo STOREL (ou deixou em pilha),
         #    basta chamar RETURN.
-        self.em.emit("RETURN")
+        self.em.emit(Op.RETURN)
 
         # 6) sair do escopo
         self.scope.pop()
@@ -483,16 +619,16 @@ class CodeGenerator:
         min_node = node.args[0]
         max_node = node.args[1]
         
-        self.generate(max_node) # resolve max value
-        self.generate(min_node) # resolve min value
-        self.em.emit("SUB") # subtrai valores
+        yield max_node # resolve max value
+        yield min_node # resolve min value
+        self.em.emit(Op.SUB) # subtrai valores
         # adiciona 1
-        self.em.emit("PUSHI 1")
-        self.em.emit("ADD")
+        self.em.emit(Op.PUSHI, 1)
+        self.em.emit(Op.ADD)
     
 
     def gen_ConstantValue(self, node: Node):
-        self.generate(node.args[0])
+        yield node.args[0]
 
 
 ########################################################################
@@ -503,7 +639,7 @@ class CodeGenerator:
 
 
     def gen_Expression(self, node):
-        self.generate(node.args[0])
+        yield node.args[0]
 
 
     def gen_MultExpression(self, node: Node):
@@ -511,9 +647,9 @@ class CodeGenerator:
         right_node = node.args[2]
         mult_operator = node.args[1] # TIMES | INTDIV | REALDIV | MOD
 
-        self.generate(left_node)
-        self.generate(right_node)
-        self.generate(mult_operator)
+        yield left_node
+        yield right_node
+        yield mult_operator
     
 
     def gen_LiteralValue(self, node):
@@ -527,37 +663,110 @@ class CodeGenerator:
         literal_value = node.args[1]
 
         # FIXME: criar para outros literal values
-        self.em.emit(f'// literal value {literal_value}')
+        self.em.comment(f'literal value {literal_value}')
         if literal_type == "STRINGVALUE":
-            self.em.emit(f'PUSHS "{literal_value}"')
+            self.em.emit(Op.PUSHS, literal_value)
         elif literal_type == 'CHARVALUE':
             # remove as aspas simples
             ch = literal_value.strip("'")
             ascii_code = ord(ch)  # código ASCII
-            self.em.emit(f"PUSHI {ascii_code}") # empilha código ASCII
+            self.em.emit(Op.PUSHI, ascii_code) # empilha código ASCII
         elif literal_type == "INTVALUE":
-            self.em.emit(f'PUSHI {literal_value}')
+            self.em.emit(Op.PUSHI, literal_value)
         elif literal_type == "TRUE":
-            self.em.emit(f'PUSHI 1')
+            self.em.emit(Op.PUSHI, 1)
         elif literal_type == "FALSE":
-            self.em.emit(f'PUSHI 0')
+            self.em.emit(Op.PUSHI, 0)
         else:
-            raise Exception(f"Literal type '{literal_type}' not supported.")
+            raise SemanticError(f"Literal type '{literal_type}' not supported.")
 
 
     def gen_RelOperator(self, node: Node):
-        self.generate(node.args[0])
+        yield node.args[0]
 
     
     def gen_AndExpression(self, node: Node):
-        # 1) Gera código para o operando esquerdo (deixa 0 ou 1 na pilha)
-        self.generate(node.args[0])
-
-        # 2) Gera código para o operando direito (deixa 0 ou 1 na pilha)
-        self.generate(node.args[1])
-
-        # 3) Emite MUL, que empilha (x * y)
-        self.em.emit("MUL")
+        # valor de `a and b and c`: se um operando é falso, os seguintes
+        # não são avaliados e o resultado é 0; senão é o valor do último
+        operands = chain_operands(node)
+        false_label = self.em.new_label()
+        end_label = self.em.new_label()
+
+        self.em.comment("and")
+        for operand in operands[:-1]:
+            yield from self.jump_if_false(operand, false_label)
+        yield operands[-1]
+        self.em.emit(Op.JUMP, end_label)
+        self.em.label(false_label)
+        self.em.emit(Op.PUSHI, 0)
+        self.em.label(end_label)
+
+
+    def gen_OrExpression(self, node: Node):
+        # valor de `a or b or c`: 1 logo que um operando seja verdadeiro
+        operands = chain_operands(node)
+        true_label = self.em.new_label()
+        end_label = self.em.new_label()
+
+        self.em.comment("or")
+        for operand in operands[:-1]:
+            yield from self.jump_if_true(operand, true_label)
+        yield operands[-1]
+        self.em.emit(Op.JUMP, end_label)
+        self.em.label(true_label)
+        self.em.emit(Op.PUSHI, 1)
+        self.em.label(end_label)
+
+
+    ####################################################################
+    # CONDITIONS
+    # In if/while/repeat the value of the condition is never needed,
+    # only where to go next: and/or/not become jumps, and an operand
+    # that decides the result skips the ones after it
+    #   if (i <= n) and primo then ...   ->   i <= n; JZ else; primo; JZ else
+    # Chains (`a and b and c`, parsed as ((a and b) and c)) are walked in
+    # a loop, so their length doesn't nest generators.
+    ####################################################################
+
+    def jump_if_false(self, node: Node, label):
+        """Code that jumps to `label` when the condition is false (and falls through when true)."""
+        node = unwrap(node)
+        if node.label == "AndExpression":
+            for operand in chain_operands(node):
+                yield from self.jump_if_false(operand, label)
+        elif node.label == "OrExpression":
+            operands = chain_operands(node)
+            true_label = self.em.new_label()
+            for operand in operands[:-1]:
+                yield from self.jump_if_true(operand, true_label)
+            yield from self.jump_if_false(operands[-1], label)
+            self.em.label(true_label)
+        elif is_not(node):
+            yield from self.jump_if_true(node.args[1], label)
+        else:
+            yield node
+            self.em.emit(Op.JZ, label)
+
+
+    def jump_if_true(self, node: Node, label):
+        """Code that jumps to `label` when the condition is true (and falls through when false)."""
+        node = unwrap(node)
+        if node.label == "OrExpression":
+            for operand in chain_operands(node):
+                yield from self.jump_if_true(operand, label)
+        elif node.label == "AndExpression":
+            operands = chain_operands(node)
+            false_label = self.em.new_label()
+            for operand in operands[:-1]:
+                yield from self.jump_if_false(operand, false_label)
+            yield from self.jump_if_true(operands[-1], label)
+            self.em.label(false_label)
+        elif is_not(node):
+            yield from self.jump_if_false(node.args[1], label)
+        else:
+            yield node
+            self.em.emit(Op.NOT)
+            self.em.emit(Op.JZ, label)
 
 
     def gen_RelExpression(self, node: Node):
@@ -565,22 +774,38 @@ class CodeGenerator:
         right_node = node.args[2]
         logic_op_node = node.args[1]
 
-        self.generate(left_node) # resolve left-side
-        self.generate(right_node) # resolve right-side
-        self.generate(logic_op_node)
+        yield left_node # resolve left-side
+        yield right_node # resolve right-side
+        yield logic_op_node
 
     
     def gen_AddExpression(self, node: Node):
         left_node = node.args[0]
         right_node = node.args[2]
+        add_operator = node.args[1].args[0] # + | -
+
+        yield left_node
+        yield right_node
+        self.em.emit(Op.ADD if add_operator == "+" else Op.SUB)
 
-        self.generate(left_node)
-        self.generate(right_node)
-        self.em.emit("ADD")
+
+    def gen_UnaryExpression(self, node: Node):
+        unary_operator = node.args[0].args[0] # + | - | not
+        operand_node = node.args[1]
+
+        if unary_operator == "-":
+            self.em.emit(Op.PUSHI, 0)
+            yield operand_node
+            self.em.emit(Op.SUB)
+        elif unary_operator == "+":
+            yield operand_node
+        else:
+            yield operand_node
+            self.em.emit(Op.NOT)
 
     
     def gen_PrimaryExpression(self, node: Node):
-        self.generate(node.args[0])
+        yield node.args[0]
 
 
     def gen_ArrayAccess(self, node: Node):
@@ -591,37 +816,37 @@ class CodeGenerator:
             # empilha string
             # empilha índice
             # CHARAT
-            self.em.emit("// string index access")
-            self.em.emit("// empilha endereço")
+            self.em.comment("string index access")
+            self.em.comment("empilha endereço")
             declared_node = node.args[0]
-            self.generate(declared_node)
+            yield declared_node
 
-            self.em.emit("// empilha índice")
+            self.em.comment("empilha índice")
             access_index_expr = node.args[1]
-            self.generate(access_index_expr)
+            yield access_index_expr
 
-            self.em.emit("// ajusta para o offset 0-based")
-            self.em.emit("PUSHI 1")
-            self.em.emit("SUB")
+            self.em.comment("ajusta para o offset 0-based")
+            self.em.emit(Op.PUSHI, 1)
+            self.em.emit(Op.SUB)
 
-            self.em.emit("CHARAT")
+            self.em.emit(Op.CHARAT)
         else:
-            self.em.emit("// array access")
+            self.em.comment("array access")
             # empilha endereço
-            self.em.emit("// empilha endereço")
-            self.generate(declared_node)
+            self.em.comment("empilha endereço")
+            yield declared_node
 
             # empilha índice
-            self.em.emit("// empilha índice")
+            self.em.comment("empilha índice")
             access_index_expr = node.args[1]
-            self.generate(access_index_expr)
+            yield access_index_expr
 
-            self.em.emit("// ajusta para o offset 0-based")
+            self.em.comment("ajusta para o offset 0-based")
             lower_bound_node = declared_node.args[1].args[0].args[0]
-            self.generate(lower_bound_node)
-            self.em.emit("SUB")
+            yield lower_bound_node
+            self.em.emit(Op.SUB)
 
-            self.em.emit("LOADN")
+            self.em.emit(Op.LOADN)
         # // leitura no array
         # PUSHG 0 push do endereco
         # PUSHI 1 push do indice
@@ -629,79 +854,80 @@ class CodeGenerator:
 
 
     def _gen_write(self, node):
-        self.em.emit("// builtin function write")
+        self.em.comment("builtin function write")
         for expr in node.args[1].args:
-            if expr.args[0].label == 'LiteralValue':
-                literal_expr = expr.args[0]
+            expr = unwrap(expr)
+            if expr.label == 'LiteralValue':
+                literal_expr = expr
 
                 if literal_expr.args[0] == 'STRINGVALUE':
-                    self.em.emit(f"WRITES")
+                    self.em.emit(Op.WRITES)
                 elif literal_expr.args[0] == 'INTVALUE':
-                    self.em.emit(f"WRITEI")
-            elif expr.args[0].label == 'DeclaredName':
-                declared_type = expr.args[0].args[1]
+                    self.em.emit(Op.WRITEI)
+            elif expr.label == 'DeclaredName':
+                declared_type = expr.args[1]
 
                 if declared_type == 'Integer':
-                    self.em.emit(f"WRITEI")
+                    self.em.emit(Op.WRITEI)
 
             else:
-                raise Exception(f'WRITE - SemanticError: Expected "LiteralValue" or whitespace but {expr.args[0].label} found')
+                raise SemanticError(f'WRITE - SemanticError: Expected "LiteralValue" or whitespace but {expr.label} found')
 
 
     def _gen_writeln(self, node):
-        self.em.emit("// builtin function writeln")
+        self.em.comment("builtin function writeln")
         many_expr = node.args[1]
 
         for expr in many_expr.args:
-            expr_type_node = expr.args[0]
+            expr_type_node = unwrap(expr)
 
             declared_type_node = expr_type_node.args[1]
 
             if expr_type_node.label == 'LiteralValue':
-                literal_expr = expr.args[0]
+                literal_expr = expr_type_node
 
                 if literal_expr.args[0] == 'STRINGVALUE':
-                    self.em.emit(f"WRITES")
+                    self.em.emit(Op.WRITES)
                 elif literal_expr.args[0] == 'INTVALUE':
-                    self.em.emit(f"WRITEI")
+                    self.em.emit(Op.WRITEI)
                 else:
-                    raise Exception(f"WRITELN - SemanticError: Literal type '{literal_expr.args[0]}' not supported.")
+                    raise SemanticError(f"WRITELN - SemanticError: Literal type '{literal_expr.args[0]}' not supported.")
             elif expr_type_node.label == 'DeclaredName' and declared_type_node.label == 'SimpleType':
                 type_label = declared_type_node.args[0]
 
                 if type_label.lower() == 'integer':
-                    self.em.emit(f"WRITEI")
+                    self.em.emit(Op.WRITEI)
                 elif type_label.lower() == 'string':
-                    self.em.emit(f"WRITES")
+                    self.em.emit(Op.WRITES)
                 else:
-                    raise Exception(f"WRITELN - SemanticError: Declared type '{type_label}' not supported.")
+                    raise SemanticError(f"WRITELN - SemanticError: Declared type '{type_label}' not supported.")
             elif expr_type_node.label == "ArrayAccess":
                 array_type = expr_type_node.args[0].args[1].args[0]
                 if array_type.lower() == 'integer':
-                    self.em.emit(f"WRITEI")
+                    self.em.emit(Op.WRITEI)
                 elif array_type.lower() == 'string':
-                    self.em.emit(f"WRITECHR")
+                    self.em.emit(Op.WRITECHR)
                 else:
-                    raise Exception(f"WRITELN - SemanticError: Array type '{type_label}' not supported.")
+                    raise SemanticError(f"WRITELN - SemanticError: Array type '{type_label}' not supported.")
             elif expr_type_node.label == "RoutineCall":
-                routine_return_type = self.infer_type(expr_type_node)
+                routine_return_type = expr_type_node.type # anotado pelo TypeChecker
                 if routine_return_type == "Integer":
-                    self.em.emit("WRITEI")
+                    self.em.emit(Op.WRITEI)
                 else:
-                    raise Exception(f"WRITELN - SemanticError: RoutineCall return type '{routine_return_type}' not supported.")
+                    raise SemanticError(f"WRITELN - SemanticError: RoutineCall return type '{routine_return_type}' not supported.")
 
             else:
-                raise Exception(f'WRITELN - SemanticError: Expected ["LiteralValue"|"DeclaredName"|"ArrayAccess"|"RoutineCall"] or whitespace but "{expr_type_node.label}" found')
+                raise SemanticError(f'WRITELN - SemanticError: Expected ["LiteralValue"|"DeclaredName"|"ArrayAccess"|"RoutineCall"] or whitespace but "{expr_type_node.label}" found')
 
-        self.em.emit("WRITELN")
+        self.em.emit(Op.WRITELN)
 
 
     def _gen_readln(self, node):
-        self.em.emit("// builtin function readln")
+        self.em.comment("builtin function readln")
         many_expr = node.args[1]
 
         for expr in many_expr.args:
-            expr_type_node = expr.args[0]
+            expr_type_node = unwrap(expr)
 
             declared_name = expr_type_node.args[0]
             declared_type_node = expr_type_node.args[1]
@@ -710,54 +936,54 @@ class CodeGenerator:
                 type_label = declared_type_node.args[0]
 
                 if type_label.lower() == 'integer':
-                    self.em.emit(f"READ")
-                    self.em.emit(f"ATOI")
+                    self.em.emit(Op.READ)
+                    self.em.emit(Op.ATOI)
 
                     var_global_pointer = self.scope.lookup(declared_name)
-                    self.em.emit(f"STOREG {var_global_pointer}")
+                    self.em.emit(Op.STOREG, var_global_pointer)
                 elif type_label.lower() == 'string':
-                    self.em.emit("READ")
+                    self.em.emit(Op.READ)
                     var_global_pointer = self.scope.lookup(declared_name)
-                    self.em.emit(f"STOREG {var_global_pointer}")
+                    self.em.emit(Op.STOREG, var_global_pointer)
                 else:
-                    raise Exception(f"READLN - SemanticError: Variable type '{declared_type_node.label}::{type_label}' not supported for readln.")
+                    raise SemanticError(f"READLN - SemanticError: Variable type '{declared_type_node.label}::{type_label}' not supported for readln.")
             
             elif expr_type_node.label == 'ArrayAccess':
                 array_type = declared_name.args[1].args[1].args[0]
                 index_expr_node = expr_type_node.args[1]
 
                 if array_type.lower() != 'integer':
-                    raise Exception(f"READLN - SemanticError: Array type '{array_type}' not supported for readln.")
+                    raise SemanticError(f"READLN - SemanticError: Array type '{array_type}' not supported for readln.")
 
-                self.em.emit("// array access")
+                self.em.comment("array access")
 
-                self.em.emit("// empilha endereço")
-                self.generate(declared_name) # põe endereço na stack
+                self.em.comment("empilha endereço")
+                yield declared_name # põe endereço na stack
 
-                self.em.emit("// empilha índice")
-                self.generate(index_expr_node) # resolve valor do index em runtime
+                self.em.comment("empilha índice")
+                yield index_expr_node # resolve valor do index em runtime
 
                 # ajusta para 0-based
-                self.em.emit("// ajusta para o offset 0-based")
+                self.em.comment("ajusta para o offset 0-based")
                 lower_bound_node = declared_name.args[1].args[0].args[0]
-                self.generate(lower_bound_node)
-                self.em.emit("SUB")
+                yield lower_bound_node
+                self.em.emit(Op.SUB)
 
                 # lê do input e põe valor na stack
-                self.em.emit(f"READ")
-                self.em.emit(f"ATOI")
+                self.em.emit(Op.READ)
+                self.em.emit(Op.ATOI)
 
-                self.em.emit("STOREN")
+                self.em.emit(Op.STOREN)
 
             else:
-                raise Exception(f'READLN - SemanticError: Expected "DeclaredName" of ["SimpleType"|"ArrayAccess"] but {expr.args[0].label} of {declared_type_node.label} found.')
+                raise SemanticError(f'READLN - SemanticError: Expected "DeclaredName" of ["SimpleType"|"ArrayAccess"] but {expr_type_node.label} of {declared_type_node.label} found.')
 
-        self.em.emit("WRITELN")
+        self.em.emit(Op.WRITELN)
 
 
     def _gen_length(self, node):
-        self.em.emit("// builtin function length")
-        self.em.emit("STRLEN")
+        self.em.comment("builtin function length")
+        self.em.emit(Op.STRLEN)
 
 
 ########################################################################
@@ -766,184 +992,51 @@ class CodeGenerator:
 
 
     def gen_MultOperator(self, node: Node):
-        self.generate(node.args[0])
+        yield node.args[0]
 
 
     def gen_STRING(self, node):
         value = node.args[0]
-        self.em.emit(f"PUSHS \"{value}\"")
+        self.em.emit(Op.PUSHS, value)
 
 
     def gen_NUMBER(self, node):
         value = int(node.args[0])
-        self.em.emit(f"PUSHI {value}")
+        self.em.emit(Op.PUSHI, value)
 
 
     def gen_TIMES(self, node):
-        self.em.emit("MUL")
+        self.em.emit(Op.MUL)
 
 
     def gen_INTDIV(self, node):
-        self.em.emit("DIV")
+        self.em.emit(Op.DIV)
 
 
     def gen_MOD(self, node):
-        self.em.emit("MOD")
+        self.em.emit(Op.MOD)
     
 
     def gen_GT(self, node):
-        self.em.emit("SUP")
+        self.em.emit(Op.SUP)
 
 
     def gen_LT(self, node):
-        self.em.emit("INF")
+        self.em.emit(Op.INF)
 
 
     def gen_LTE(self, node):
-        self.em.emit("INFEQ")
+        self.em.emit(Op.INFEQ)
 
 
-    def gen_EQ(self, node):
-        self.em.emit("EQUAL")
+    def gen_GTE(self, node):
+        self.em.emit(Op.SUPEQ)
 
 
-    def infer_type(self, node: Node) -> str:
-        label = node.label
+    def gen_EQ(self, node):
+        self.em.emit(Op.EQUAL)
 
-        # 1) Literais
-        if label == "LiteralValue":
-            lit_kind = node.args[0] # ex.: "INTVALUE", "STRINGVALUE", "TRUE", "FALSE"
-            if lit_kind == "INTVALUE":
-                return "Integer"
-            elif lit_kind == "STRINGVALUE":
-                return "String"
-            elif lit_kind == "TRUE" or lit_kind == "FALSE":
-                return "Boolean"
-            else:
-                raise Exception(f"Literal '{lit_kind}' não suportado em infer_type.")
-
-        # 2) DeclaredName: pode ser variável (local ou global) ou função (uso em expr)
-        if label == "DeclaredName":
-            name = node.args[0]
-            # 2.1) primeiro, verificar se é variável no escopo atual
-            idx = self.scope.lookup(name)
-            if idx is not None:
-                return node.args[1].args[0]
-                # # se estiver em 'declared_dict', seu tipo foi registrado no parser ou em VarDeclaration
-                # if name in self.declared_dict:
-                #     return self.declared_dict[name]
-                # else:
-                #     # se não houver tipo em declared_dict, assumimos 'Unknown' (não deveria ocorrer)
-                #     raise Exception(f"Variável '{name}' declarada mas sem tipo registrado.")
-            # 2.2) senão, verificar se é função
-            if name in self.declared_funcs:
-                return self.declared_funcs[name]["return_type"]
-            # 2.3) não foi declarado em nenhuma das duas
-            raise Exception(f"Identificador '{name}' não declarado em nenhum escopo.")
-
-        # 3) AddExpression: soma de dois inteiros -> inteiro
-        if label == "AddExpression":
-            left = node.args[0]
-            right = node.args[2]
-            t_left = self.infer_type(left)
-            t_right = self.infer_type(right)
-            if t_left != "Integer" or t_right != "Integer":
-                raise Exception(f"Operador '+' exige Integer + Integer, mas recebeu {t_left} + {t_right}.")
-            return "Integer"
-
-        # 4) MultExpression: multiplicação, DIV, MOD -> inteiro
-        if label == "MultExpression":
-            left = node.args[0]
-            right = node.args[2]
-            # o próprio nó filho <MultOperator> define qual instrução (MUL, DIV, MOD)
-            t_left = self.infer_type(left)
-            t_right = self.infer_type(right)
-            if t_left != "Integer" or t_right != "Integer":
-                raise Exception(f"Operador '{node.args[1].args[0]}' exige Integer + Integer, mas recebeu {t_left} e {t_right}.")
-            return "Integer"
-
-        # 5) RelExpression: m < n, m > n, m = n etc. -> Boolean
-        if label == "RelExpression":
-            left = node.args[0]
-            op_node = node.args[1]
-            right = node.args[2]
-            t_left = self.infer_type(left)
-            t_right = self.infer_type(right)
-
-            # para comparar strings (EQUAL) ou inteiros
-            if op_node.label == "EQ":
-                # igualdade genérica: só strings == strings ou inteiros == inteiros
-                if t_left == t_right and (t_left in ("Integer", "String")):
-                    return "Boolean"
-                else:
-                    raise Exception(f"Operador '=' exige ambos operandos do mesmo tipo (Integer ou String), mas recebeu {t_left} e {t_right}.")
-            else:
-                # comparações numéricas: <, >, <=, >=, <>
-                if t_left == "Integer" and t_right == "Integer":
-                    return "Boolean"
-                else:
-                    raise Exception(f"Operador relacional '{op_node.args[0]}' exige Integer, mas recebeu {t_left} e {t_right}.")
-
-        # 6) AndExpression: lógica AND -> Boolean
-        if label == "AndExpression":
-            left = node.args[0]
-            right = node.args[1]
-            t_left = self.infer_type(left)
-            t_right = self.infer_type(right)
-            if t_left != "Boolean" or t_right != "Boolean":
-                raise Exception(f"Operador 'and' exige Boolean AND Boolean, mas recebeu {t_left} e {t_right}.")
-            return "Boolean"
-
-        # 7) Expression ou PrimaryExpression encapsulam um único filho
-        if label in ("Expression", "PrimaryExpression"):
-            return self.infer_type(node.args[0])
-
-        # 8) RoutineCall: chamar função -> tipo de retorno da função
-        if label == "RoutineCall":
-            func_node = node.args[0]          # <DeclaredName> com nome da função
-            func_name = func_node.args[0]
-            if func_name not in self.declared_funcs:
-                raise Exception(f"'{func_name}' não é função conhecida.")
-            func_info = self.declared_funcs[func_name]
-            expected_params = func_info["params"] # ex.: ["Integer", "Integer"]
-            actual_args = []
-            if len(node.args) > 1:
-                for expr_node in node.args[1].args:
-                    # cada expr_node é <Expression>; o filho é <LiteralValue> ou <DeclaredName> etc.
-                    actual_args.append(self.infer_type(expr_node.args[0]))
-            if len(actual_args) != len(expected_params):
-                raise Exception(f"Função '{func_name}' esperava {len(expected_params)} parâmetros, recebeu {len(actual_args)}.")
-            for exp_t, act_t in zip(expected_params, actual_args):
-                if exp_t != act_t:
-                    raise Exception(f"Na chamada '{func_name}', parâmetro esperava '{exp_t}', mas recebeu '{act_t}'.")
-            return func_info["return_type"]
-
-        # 9) ArrayAccess: arr[i] ou s[i] -> tipo do elemento
-        if label == "ArrayAccess":
-            declared = node.args[0] # <DeclaredName> com nome do array ou string
-            idx_expr = node.args[1]
-            t_idx = self.infer_type(idx_expr)
-            if t_idx != "Integer":
-                raise Exception(f"Índice de acesso deve ser Integer, mas recebeu {t_idx}.")
-            arr_name = declared.args[0]
-            # verificar se existe variável
-            idx = self.scope.lookup(arr_name)
-            if idx is not None:
-                # tipo vem de declared_dict, que para array seria algo como "Array<Integer>"
-                if arr_name not in self.declared_dict:
-                    raise Exception(f"'{arr_name}' declarado mas sem tipo registrado.")
-                arr_type = self.declared_dict[arr_name]       # ex.: "Array<Integer>" ou "String"
-                if arr_type.startswith("Array<"):
-                    # extrair tipo de dentro de "Array<...>"
-                    elem_type = arr_type[len("Array<") : -1]
-                    return elem_type
-                elif arr_type == "String":
-                    # acesso a caractere de string retorna Integer (código ASCII)
-                    return "Integer"
-                else:
-                    raise Exception(f"'{arr_name}' não é array nem string (é {arr_type}).")
-            else:
-                raise Exception(f"'{arr_name}' não declarado em nenhum escopo.")
 
-        # 10) outros casos (caso estenda para NotExpression etc.)
-        raise Exception(f"infer_type não implementado para nó '{label}'.")
\ No newline at end of file
+    def gen_NEQ(self, node):
+        self.em.emit(Op.EQUAL)
+        self.em.emit(Op.NOT)
@@ -0,0 +1,126 @@
+from array import array
+
+########################################################################
+# INSTRUCTION IR
+# The code generator produces instructions, not text: every instruction
+# is an opcode (Op), an operand and the line of the source program it
+# came from (0 when unknown). A Code keeps opcodes in a bytearray and
+# operands in a parallel list; source lines are kept as a table of the
+# positions where the line changes. The EWVM text is only produced by dump(), so passes over the code
+# (peephole.py, the VM loader) never have to parse strings.
+#
+# Operands are ints, label names (JUMP/JZ/PUSHA) or the unquoted text of
+# PUSHS/ERR. Labels and comments are pseudo-instructions (Op.LABEL and
+# Op.COMMENT, with the name/text as operand).
+########################################################################
+
+OPCODES = (
+    'PUSHI', 'PUSHL', 'STOREL', 'PUSHG', 'STOREG', 'ADD', 'SUB', 'MUL', 'DIV', 'MOD',
+    'JZ', 'JUMP', 'EQUAL', 'INF', 'INFEQ', 'SUP', 'SUPEQ', 'NOT', 'AND', 'OR',
+    'DUP', 'POP', 'SWAP', 'PUSHS', 'PUSHN', 'PUSHFP', 'PUSHGP', 'PUSHSP', 'LOAD', 'STORE',
+    'LOADN', 'STOREN', 'ALLOCN', 'ALLOC', 'PUSHA', 'CALL', 'RETURN', 'CHARAT', 'STRLEN',
+    'CONCAT', 'CHRCODE', 'WRITEI', 'WRITES', 'WRITECHR', 'WRITELN', 'WRITEF', 'READ',
+    'ATOI', 'STRI', 'START', 'STOP', 'NOP', 'ERR',
+)
+
+# as instruções da EWVM e, depois delas, as pseudo-instruções
+NAMES = OPCODES + ("LABEL", "COMMENT")
+
+class Op:
+    """Opcodes: Op.PUSHI, Op.JZ, ... are small ints, indexes into NAMES."""
+    # (ints simples e não um enum.IntEnum: o gerador lê-os a cada instrução
+    #  e o acesso a membros de um IntEnum é uma ordem de grandeza mais lento)
+
+for _code, _name in enumerate(NAMES):
+    setattr(Op, _name, _code)
+
+JUMP_OPS = frozenset((Op.JZ, Op.JUMP, Op.PUSHA))    # operando é uma label
+STRING_OPS = frozenset((Op.PUSHS, Op.ERR))          # operando é texto entre aspas
+
+
+# texto de uma instrução com operando: PREFIXES[op] + operando + SUFFIXES[op]
+PREFIXES = tuple("" if name == "LABEL" else
+                 "// " if name == "COMMENT" else
+                 f'{name} "' if code in STRING_OPS else
+                 f"{name} "
+                 for code, name in enumerate(NAMES))
+SUFFIXES = tuple(":" if name == "LABEL" else
+                 '"' if code in STRING_OPS else
+                 ""
+                 for code, name in enumerate(NAMES))
+
+def format_instr(op, arg) -> str:
+    if arg is None:
+        return NAMES[op]
+    return PREFIXES[op] + str(arg) + SUFFIXES[op]
+
+
+class Code:
+    __slots__ = ("ops", "args", "line_starts", "line_numbers")
+
+    def __init__(self):
+        self.ops = bytearray()
+        self.args = []
+        # tabela de linhas: a instrução line_starts[k] e as seguintes vieram
+        # da linha line_numbers[k] (só se regista quando a linha muda)
+        self.line_starts = array("l")
+        self.line_numbers = array("l")
+
+    def set_line(self, line):
+        """Source line of the instructions appended from now on."""
+        if self.line_numbers and self.line_numbers[-1] == line:
+            return
+        if self.line_starts and self.line_starts[-1] == len(self.ops):
+            self.line_numbers[-1] = line
+        else:
+            self.line_starts.append(len(self.ops))
+            self.line_numbers.append(line)
+
+    def append(self, op, arg=None):
+        self.ops.append(op)
+        self.args.append(arg)
+
+    def extend(self, other):
+        for op, arg, line in other:
+            self.set_line(line)
+            self.append(op, arg)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def lines(self):
+        """Source line of every instruction (0 when unknown)."""
+        lines = array("l", bytes(len(self.ops) * array("l").itemsize))
+        starts = list(self.line_starts) + [len(self.ops)]
+        for k, line in enumerate(self.line_numbers):
+            lines[starts[k]:starts[k + 1]] = array("l", [line]) * (starts[k + 1] - starts[k])
+        return lines
+
+    def __iter__(self):
+        """(op, arg, line) triples."""
+        return zip(self.ops, self.args, self.lines())
+
+    def instructions(self) -> int:
+        """Number of real instructions (without labels and comments)."""
+        return sum(1 for op in self.ops if op < Op.LABEL)
+
+    def text_lines(self) -> list[str]:
+        names, prefixes, suffixes = NAMES, PREFIXES, SUFFIXES
+        # os operandos inteiros repetem-se muito (slots, 0, 1): converte cada um uma vez
+        int_text = {}
+        lines = []
+        append = lines.append
+        for op, arg in zip(self.ops, self.args):
+            if arg is None:
+                append(names[op])
+                continue
+            if arg.__class__ is int:
+                text = int_text.get(arg)
+                if text is None:
+                    text = int_text[arg] = str(arg)
+                arg = text
+            append(prefixes[op] + arg + suffixes[op])
+        return lines
+
+    def dump(self) -> str:
+        return "\n".join(self.text_lines())
@@ -1,5 +1,10 @@
 from ply import lex
+import os
 import sys
+import importlib.util
+
+from errors import LexicalError
+from cache import cache_dir, digest
 
 keyword_tokens = (
     'IF', 'THEN', 'ELSE',
@@ -40,43 +45,30 @@ tokens = keyword_tokens + punctuation_tokens + operator_tokens + datatype_tokens
     'IDENTIFIER', #'SLASHCOMMENT', 'BRACECOMMENT', 'PARENCOMMENT'
 )
 
+# reserved words are matched as identifiers and then looked up here
+# (pascal is case-insensitive, so the lookup uses the lowercase spelling)
+reserved = {
+    'if': 'IF', 'then': 'THEN', 'else': 'ELSE',
+
+    'for': 'FOR', 'while': 'WHILE', 'repeat': 'REPEAT', 'until': 'UNTIL',
+    'do': 'DO', 'to': 'TO', 'downto': 'DOWNTO', 'of': 'OF',
+
+    'var': 'VAR', 'const': 'CONST', 'begin': 'BEGIN', 'end': 'END',
+
+    'program': 'PROGRAM', 'procedure': 'PROCEDURE', 'function': 'FUNCTION',
+    'array': 'ARRAY', 'return': 'RETURN',
+
+    'boolean': 'TYPEBOOL', 'false': 'FALSE', 'true': 'TRUE',
+    'real': 'TYPEREAL', 'integer': 'TYPEINT', 'string': 'TYPESTRING', 'char': 'TYPECHAR',
+
+    'div': 'INTDIV', 'mod': 'MOD', 'and': 'AND', 'or': 'OR', 'not': 'NOT',
+}
+
 
 def t_BRACECOMMENT(t): r'\{[^}]*\}';         t.lexer.lineno += t.value.count('\n'); pass
 def t_PARENCOMMENT(t): r'\(\*[.\s\S]*?\*\)'; t.lexer.lineno += t.value.count('\n'); pass
 def t_SLASHCOMMENT(t): r'\/\/.*?\n';         t.lexer.lineno += 1; pass
 
-def t_PROCEDURE(t):  r'[pP][rR][oO][cC][eE][dD][uU][rR][eE]'; return t
-def t_FUNCTION(t):   r'[fF][uU][nN][cC][tT][iI][oO][nN]'; return t
-def t_TYPEBOOL(t):   r'[bB][oO][oO][lL][eE][aA][nN]'; return t
-def t_PROGRAM(t):    r'[pP][rR][oO][gG][rR][aA][mM]'; return t
-def t_TYPEINT(t):    r'[iI][nN][tT][eE][gG][eE][rR]'; return t 
-def t_RETURN(t):     r'[rR][eE][tT][uU][rR][nN]'; return t
-def t_REPEAT(t):     r'[rR][eE][pP][eE][aA][tT]'; return t
-def t_DOWNTO(t):     r'[dD][oO][wW][nN][tT][oO]'; return t
-def t_TYPESTRING(t): r'[sS][tT][rR][iI][nN][gG]'; return t
-def t_WHILE(t):      r'[wW][hH][iI][lL][eE]'; return t
-def t_UNTIL(t):      r'[uU][nN][tT][iI][lL]'; return t
-def t_CONST(t):      r'[cC][oO][nN][sS][tT]'; return t
-def t_BEGIN(t):      r'[bB][eE][gG][iI][nN]'; return t
-def t_FALSE(t):      r'[fF][aA][lL][sS][eE]'; return t
-def t_ARRAY(t):      r'[aA][rR][rR][aA][yY]'; return t
-def t_TYPEREAL(t):   r'[rR][eE][aA][lL]'; return t
-def t_TYPECHAR(t):   r'[cC][hH][aA][rR]'; return t
-def t_THEN(t):       r'[tT][hH][eE][nN]'; return t
-def t_TRUE(t):       r'[tT][rR][uU][eE]'; return t
-def t_ELSE(t):       r'[eE][lL][sS][eE]'; return t
-def t_VAR(t):        r'[vV][aA][rR]'; return t
-def t_AND(t):        r'[aA][nN][dD]'; return t
-def t_FOR(t):        r'[fF][oO][rR]'; return t
-def t_END(t):        r'[eE][nN][dD]'; return t
-def t_NOT(t):        r'[nN][oO][tT]'; return t
-def t_MOD(t):        r'[mM][oO][dD]'; return t
-def t_INTDIV(t):     r'[dD][iI][vV]'; return t
-def t_DO(t):         r'[dD][oO]'; return t
-def t_IF(t):         r'[iI][fF]'; return t
-def t_TO(t):         r'[tT][oO]'; return t
-def t_OR(t):         r'[oO][rR]'; return t
-def t_OF(t):         r'[oO][fF]'; return t
 def t_DOTDOT(t):     r'\.\.'; return t
 def t_NEQ(t):        r'\<\>'; return t
 def t_LTE(t):        r'\<\='; return t
@@ -122,7 +114,9 @@ def t_STRINGVALUE(t):
 
 def t_IDENTIFIER(t):
     r'[a-zA-Z_\$][a-zA-Z_0-9\$]*'
+    # o valor também fica em minúsculas nas palavras reservadas ('TO' -> 'to')
     t.value = t.value.lower()
+    t.type = reserved.get(t.value, 'IDENTIFIER')
     return t
 
 def t_newline(t):
@@ -132,11 +126,77 @@ def t_newline(t):
 t_ignore = ' \t'
 
 def t_error(t):
-    print(f"[Ln {t.lineno}] Lexical Error: \'{t.value[0]}\'")
     # t.lexer.skip(1)
-    exit(1)
-
-lexer = lex.lex()
+    raise LexicalError(f"Lexical Error: \'{t.value[0]}\'", t.lineno)
+
+########################################################################
+# LEXER TABLES
+# lex.lex() validates every rule (reading this file's source) and joins
+# them into the master regular expression on every start. From a
+# "lextab" (the rules PLY has already checked and joined) it only has to
+# compile that regex, so the lextab is written to the cache directory on
+# the first start and read back on the next ones. The file name carries
+# a hash of every rule (regex, order and the token list), so changing
+# the rules picks a new file; a lextab whose tokens don't match `tokens`
+# is rebuilt as well.
+#
+# Each compilation takes its own lexer from new_lexer(), a clone of the
+# module-level one: clones share the compiled regexes, nothing is rebuilt.
+########################################################################
+
+def rules_hash() -> str:
+    module = sys.modules[__name__]
+    rules = [getattr(module, name) for name in dir(module) if name.startswith("t_")]
+    # as regras-função são tentadas pela ordem em que aparecem no ficheiro
+    functions = sorted((rule for rule in rules if callable(rule)), key=lambda f: f.__code__.co_firstlineno)
+    strings = sorted(f"{name}:{getattr(module, name)}" for name in dir(module)
+                     if name.startswith("t_") and not callable(getattr(module, name)))
+    return digest(lex.__tabversion__, " ".join(tokens),
+                  *(f"{f.__name__}:{f.__doc__}" for f in functions), *strings)[:16]
+
+
+def table_cache_path() -> str:
+    return os.path.join(cache_dir("tables"), f"lextab_{rules_hash()}.py")
+
+
+def load_table(path):
+    spec = importlib.util.spec_from_file_location(os.path.basename(path)[:-3], path)
+    table = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(table)
+    return table
+
+
+def build_lexer(use_cache=True):
+    module = sys.modules[__name__]
+    if not use_cache:
+        return lex.lex(module=module)
+
+    path = table_cache_path()
+    if os.path.exists(path):
+        try:
+            table = load_table(path)
+            if table._lextokens == set(tokens):
+                return lex.lex(module=module, optimize=True, lextab=table)
+        except (ImportError, SyntaxError, AttributeError, KeyError):
+            pass # lextab corrompido/incompleto: gerar de novo
+
+    # 1ª vez: construído (e validado) a partir das regras; o lextab é escrito
+    # num ficheiro temporário e só depois movido, como as tabelas do parser
+    lexobj = lex.lex(module=module)
+    tmp_name = f"lextab_{os.getpid()}_tmp"
+    lexobj.writetab(tmp_name, cache_dir("tables"))
+    os.replace(os.path.join(cache_dir("tables"), f"{tmp_name}.py"), path)
+    return lexobj
+
+
+lexer = build_lexer()
+
+
+def new_lexer():
+    """A lexer of its own (at line 1), cloned from the prebuilt one."""
+    instance = lexer.clone()
+    instance.lineno = 1
+    return instance
 
 def tokprint_table(tokens):
     print("{:<10} {:<10} {:<15} {:<20}".format("Line", "Pos", "Type", "Value",))
@@ -168,7 +228,7 @@ if __name__ == "__main__":
 
     with open(sys.argv[1], encoding='utf-8') as input_file:
         filecontent = input_file.read()
-        lexer = lex.lex()
+        lexer = new_lexer()
         lexer.input(filecontent)
         tokens = list(lexer)
         tokprint_code(tokens)
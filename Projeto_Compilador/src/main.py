@@ -1,51 +1,155 @@
+import os
 import sys
+import time
+import argparse
 
-from lexer import lexer, tokprint_code, tokprint_table
-from parser import parser, filecontent
-from generator import CodeGenerator
-from emitter import CodeEmitter
+from lexer import new_lexer, tokprint_code, tokprint_table
+from compiler import Compiler, compile_to_file
+from errors import CompilationError
+from cache import BuildCache
+from batch import find_sources, compile_batch, print_summary
+from tree import write_tree
+from optimizer import INLINE_MAX_SIZE, ALGEBRA_RULES
 
 def test_lexer(input_string):
-    lexer.input(input_string)
-    while tok := lexer.token():
+    test = new_lexer()
+    test.input(input_string)
+    while tok := test.token():
         print(f"Token: {tok.type:<15} Valor: {tok.value}")
 
 def test_parser(input_string):
-    r = parser.parse(input_string)
-    return r
+    return Compiler().parse(input_string)
 
-def main():
-    with open(sys.argv[1]) as input_file:
+def parse_args(argv):
+    argparser = argparse.ArgumentParser(
+        usage="python3 main.py <ficheiro_de_entrada>\n"
+              "       python3 main.py --batch <diretoria|glob> [-j N] [-o DIR]",
+    )
+    argparser.add_argument("source", nargs="?", help="ficheiro .pas a compilar")
+    argparser.add_argument("--batch", metavar="ALVO",
+                           help="compila todos os .pas de uma diretoria (ou de um glob) em paralelo")
+    argparser.add_argument("-j", "--jobs", type=int, default=None,
+                           help="número de processos no modo batch (por omissão, um por CPU)")
+    argparser.add_argument("-o", "--outdir", default=".",
+                           help="diretoria onde escrever os .out (por omissão, a atual)")
+    argparser.add_argument("--no-cache", action="store_true",
+                           help="ignora a cache de compilação e recompila tudo")
+    argparser.add_argument("-O", "--optimize", action="store_true",
+                           help="otimiza o código gerado")
+    argparser.add_argument("--inline", action="store_true",
+                           help="substitui as chamadas a funções pequenas pelo seu corpo")
+    argparser.add_argument("--inline-size", type=int, default=INLINE_MAX_SIZE, metavar="N",
+                           help=f"com --inline, tamanho máximo (nós da AST) de uma função (por omissão, {INLINE_MAX_SIZE})")
+    argparser.add_argument("--format", choices=("text", "binary"), default="text",
+                           help="código EWVM em texto (.out, por omissão) ou em bytecode binário (.ewvb)")
+    argparser.add_argument("--stream", action="store_true",
+                           help="escreve o código no .out à medida que é gerado (programas muito grandes)")
+    argparser.add_argument("--no-comments", action="store_true",
+                           help="não escreve os comentários // no código gerado")
+    argparser.add_argument("--ast", action="store_true",
+                           help="imprime a árvore sintática (ou a parcial, em caso de erro)")
+    argparser.add_argument("--ast-depth", type=int, default=None, metavar="N",
+                           help="com --ast, não desce abaixo da profundidade N")
+    argparser.add_argument("--ast-nodes", type=int, default=None, metavar="N",
+                           help="com --ast, imprime no máximo N nós")
+    args = argparser.parse_args(argv)
+    if args.source is None and args.batch is None:
+        print("Argumentos insuficientes")
+        argparser.print_usage()
+        exit(1)
+    return args
+
+
+def print_ast(ast, args):
+    write_tree(ast, sys.stdout, color=sys.stdout.isatty(),
+               max_depth=args.ast_depth, max_nodes=args.ast_nodes)
+
+
+def print_stats(stats):
+    if "inline.inlined" in stats:
+        print(f"inlining: {stats['inline.inlined']} chamadas substituídas "
+              f"({stats['inline.functions']} funções pequenas)", file=sys.stderr)
+    if "fold.folded" in stats:
+        print(f"constantes: {stats['fold.folded']} expressões calculadas, "
+              f"{stats['fold.propagated']} constantes propagadas", file=sys.stderr)
+    if "algebra.rewrites" in stats:
+        rules = ", ".join(f"{rule} {stats[f'algebra.{rule}']}" for rule in ALGEBRA_RULES if stats[f"algebra.{rule}"])
+        print(f"álgebra: {stats['algebra.rewrites']} expressões simplificadas" + (f" ({rules})" if rules else ""),
+              file=sys.stderr)
+    if "dce.functions" in stats:
+        removed = f" ({', '.join(stats['dce.removed'])})" if stats["dce.removed"] else ""
+        print(f"código morto: {stats['dce.functions']} funções nunca chamadas removidas{removed}, "
+              f"{stats['dce.branches']} ifs/whiles com condição constante", file=sys.stderr)
+    if "licm.hoisted" in stats:
+        print(f"loops: {stats['licm.hoisted']} expressões invariantes movidas", file=sys.stderr)
+    if "peephole.removed" in stats:
+        print(f"peephole: {stats['peephole.removed']} de {stats['peephole.before']} instruções removidas "
+              f"({stats['peephole.rewrites']} reescritas)", file=sys.stderr)
+
+
+def main_batch(args):
+    sources = find_sources(args.batch)
+    if not sources:
+        print(f"Nenhum ficheiro .pas encontrado em '{args.batch}'")
+        return 1
+
+    start = time.perf_counter()
+    results = compile_batch(sources, args.outdir, args.jobs, use_cache=not args.no_cache,
+                            optimize=args.optimize, output_format=args.format,
+                            inline=args.inline and args.inline_size,
+                            comments=not args.no_comments, stream=args.stream)
+    print_summary(results, time.perf_counter() - start)
+    return 0 if all(r.ok for r in results) else 1
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.batch is not None:
+        return main_batch(args)
+
+    with open(args.source) as input_file:
         text = input_file.read()
 
-        # test_lexer(text)
-        ast = test_parser(text)
+    # test_lexer(text)
+
+    # restart lexer to print tokens
+    # lexer = new_lexer()
+    # lexer.input(text)
+    # tokens = list(lexer)
+    # tokprint_code(tokens)
+    # print()
+    # tokprint_table(tokens)
+    # print()
+
+    try:
+        cache = None if args.no_cache else BuildCache()
+        compiler = Compiler(cache=cache, optimize=args.optimize, comments=not args.no_comments,
+                            output_format=args.format, inline=args.inline, inline_size=args.inline_size)
+        if args.stream:
+            result = compile_to_file(compiler, text, args.outdir)
+        else:
+            result = compiler.compile(text)
+    except CompilationError as e:
+        print(f"\n{e}", file=sys.stderr)
+        partial_tree = getattr(e, "partial_tree", None)
+        if args.ast and partial_tree is not None:
+            print("Partial syntax tree up to the error:")
+            print_ast(partial_tree, args)
+        return 1
+
+    if args.ast and result.ast is not None: # None se veio da cache
         print(" _")
-        print(ast)
+        print_ast(result.ast, args)
 
-        # restart lexer to print tokens
-        # lexer = lex.lex()
-        # lexer.input(text)
-        # tokens = list(lexer)
-        # tokprint_code(tokens)
-        # print()
-        # tokprint_table(tokens)
-        # print()
+    if result.code is not None: # None se já foi escrito com --stream
+        mode = "wb" if isinstance(result.code, bytes) else "w"
+        with open(os.path.join(args.outdir, result.output_name), mode) as output_file:
+            output_file.write(result.code)
 
-        # generate code
-        em = CodeEmitter()
-        gen = CodeGenerator(em)
-        gen.generate(ast)
-        compiled = em.dump()
-        with open(f"{gen.program_name}.out", "w") as output_file:
-            output_file.write(compiled)
+    print_stats(result.stats)
+    return 0
 
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Argumentos insuficientes")
-        print("Uso correto: python3 main.py <ficheiro_de_entrada>")
-        exit(1)
-
-    main()
+    exit(main())
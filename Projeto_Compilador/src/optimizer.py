@@ -0,0 +1,1199 @@
+from tree import Node, WRAPPERS, unwrap, hidden_name
+from scope import type_name
+
+########################################################################
+# AST OPTIMIZATION PASSES
+# Passes that rewrite the syntax tree in place before CodeGenerator runs.
+# Each pass is a class with a `run(ast)` method that returns a dict of
+# statistics ("what it did"), collected by the Compiler.
+########################################################################
+
+def int_literal(value) -> Node:
+    return Node("LiteralValue", "INTVALUE", value)
+
+
+def bool_literal(value) -> Node:
+    return Node("LiteralValue", "TRUE", "true") if value else Node("LiteralValue", "FALSE", "false")
+
+
+def literal_value(node):
+    """Python value of an integer/boolean literal, or None."""
+    node = unwrap(node)
+    if node.label != "LiteralValue":
+        return None
+    kind = node.args[0]
+    if kind == "INTVALUE":
+        return node.args[1]
+    if kind == "TRUE":
+        return True
+    if kind == "FALSE":
+        return False
+    return None # strings, chars e reais não são dobrados
+
+
+def make_literal(value) -> Node:
+    return bool_literal(value) if isinstance(value, bool) else int_literal(value)
+
+
+def int_div(a, b):
+    # div do pascal trunca em direção a zero
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def int_mod(a, b):
+    return a - b * int_div(a, b)
+
+
+########################################################################
+# 1. CONSTANT FOLDING AND PROPAGATION
+# - references to `const` names are replaced by their (folded) value
+# - operators whose operands are all integer/boolean literals are
+#   evaluated at compile time, e.g. `2 * 3` -> `6`, `N div 2` -> `5`
+# Division/mod by a literal zero is left alone (it fails at run time).
+########################################################################
+
+def _is_int(*values):
+    return all(type(v) is int for v in values)
+
+def _is_bool(*values):
+    return all(type(v) is bool for v in values)
+
+
+def fold_binary(label, op, a, b):
+    """Value of `a op b` for literal operands, or None if it can't be folded."""
+    if label == "AddExpression" and _is_int(a, b):
+        return a + b if op == "+" else a - b
+
+    if label == "MultExpression" and _is_int(a, b):
+        if op == "TIMES":
+            return a * b
+        if op == "INTDIV" and b != 0:
+            return int_div(a, b)
+        if op == "MOD" and b != 0:
+            return int_mod(a, b)
+        return None
+
+    if label == "RelExpression" and (_is_int(a, b) or _is_bool(a, b)):
+        if op == "EQ":  return a == b
+        if op == "NEQ": return a != b
+        if _is_int(a, b):
+            if op == "LT":  return a < b
+            if op == "GT":  return a > b
+            if op == "LTE": return a <= b
+            if op == "GTE": return a >= b
+        return None
+
+    if label == "AndExpression" and _is_bool(a, b):
+        return a and b
+    if label == "OrExpression" and _is_bool(a, b):
+        return a or b
+    return None
+
+
+def operator_of(node):
+    """Operator of a binary expression node ('+', 'TIMES', 'LT', ...)."""
+    if node.label in ("AndExpression", "OrExpression"):
+        return None
+    op_node = node.args[1]
+    if node.label == "AddExpression":
+        return op_node.args[0]
+    return op_node.args[0].label
+
+
+class ConstantFolder:
+    # nós cujos filhos são expressões em todas as posições
+    BINARY = ("AddExpression", "MultExpression", "RelExpression", "AndExpression", "OrExpression")
+
+    def __init__(self):
+        self.constants = [dict()] # pilha de escopos: nome -> literal (None se escondido por variável)
+        self.folded = 0
+        self.propagated = 0
+
+    def run(self, ast):
+        self.visit(ast)
+        return {"folded": self.folded, "propagated": self.propagated}
+
+    # ------------------------------------------------------------------
+    # escopos
+
+    def lookup(self, name):
+        for scope in reversed(self.constants):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def hide(self, names_node):
+        # variáveis/parâmetros escondem constantes com o mesmo nome
+        for declared in names_node.args:
+            self.constants[-1][declared.args[0]] = None
+
+    # ------------------------------------------------------------------
+    # statements e declarações
+
+    def visit(self, node):
+        method = getattr(self, f"visit_{node.label}", None)
+        if method is not None:
+            return method(node)
+        for arg in node.args:
+            if isinstance(arg, Node):
+                self.visit(arg)
+
+    def visit_ConstDeclaration(self, node):
+        for const_def in node.args:
+            const_def.set_child(1, self.fold(const_def.args[1]))
+            value = unwrap(const_def.args[1])
+            self.constants[-1][const_def.args[0]] = value if value.label == "LiteralValue" else None
+
+    def visit_VarDeclaration(self, node):
+        for param_tuple in node.args[0].args:
+            self.hide(param_tuple.args[0])
+            var_type = param_tuple.args[1].args[0]
+            if var_type.label == "ArrayType":
+                self.visit_ValueRange(var_type.args[0])
+
+    def visit_ValueRange(self, node):
+        node.set_child(0, self.fold(node.args[0]))
+        node.set_child(1, self.fold(node.args[1]))
+
+    def visit_FunctionDeclaration(self, node):
+        self.constants.append(dict())
+        self.constants[-1][node.args[0].args[0].args[0]] = None # o nome da função
+        routine_params = node.args[0].args[1]
+        if routine_params.args:
+            for param_tuple in routine_params.args[0].args:
+                self.hide(param_tuple.args[0])
+        self.visit(node.args[2])
+        self.constants.pop()
+
+    visit_ProcedureDeclaration = visit_FunctionDeclaration
+
+    def visit_Assignment(self, node):
+        node.set_child(1, self.fold(node.args[1]))
+
+    def visit_IfThen(self, node):
+        node.set_child(0, self.fold(node.args[0]))
+        self.visit(node.args[1])
+
+    def visit_IfThenElse(self, node):
+        node.set_child(0, self.fold(node.args[0]))
+        self.visit(node.args[1])
+        self.visit(node.args[2])
+
+    def visit_While(self, node):
+        node.set_child(0, self.fold(node.args[0]))
+        self.visit(node.args[1])
+
+    def visit_Repeat(self, node):
+        self.visit(node.args[0])
+        node.set_child(1, self.fold(node.args[1]))
+
+    def visit_For(self, node):
+        self.visit(node.args[0])
+        node.set_child(2, self.fold(node.args[2]))
+        self.visit(node.args[3])
+
+    def visit_RoutineCall(self, node):
+        if len(node.args) < 2:
+            return
+        if node.args[0].args[0] == "readln":
+            # os argumentos do readln são destinos, não valores
+            for expr in node.args[1].args:
+                target = unwrap(expr)
+                if target.label == "ArrayAccess":
+                    target.set_child(1, self.fold(target.args[1]))
+            return
+        many_exprs = node.args[1]
+        for idx, expr in enumerate(many_exprs.args):
+            many_exprs.set_child(idx, self.fold(expr))
+
+    # ------------------------------------------------------------------
+    # expressões
+
+    def fold(self, node):
+        label = node.label
+
+        if label == "LiteralValue":
+            return node
+
+        if label == "DeclaredName":
+            value = self.lookup(node.args[0])
+            if value is None:
+                return node
+            self.propagated += 1
+            return Node("LiteralValue", *value.args)
+
+        if label in WRAPPERS:
+            return self.fold(node.args[0])
+
+        if label == "ConstantValue":
+            node.set_child(0, self.fold(node.args[0]))
+            return node
+
+        if label == "UnaryExpression":
+            node.set_child(1, self.fold(node.args[1]))
+            value = literal_value(node.args[1])
+            op = node.args[0].args[0].lower()
+            if op == "-" and _is_int(value):
+                self.folded += 1
+                return int_literal(-value)
+            if op == "+" and _is_int(value):
+                self.folded += 1
+                return int_literal(value)
+            if op == "not" and _is_bool(value):
+                self.folded += 1
+                return bool_literal(not value)
+            return node
+
+        if label in self.BINARY:
+            if label in ("AndExpression", "OrExpression"):
+                left_idx, right_idx = 0, 1
+            else:
+                left_idx, right_idx = 0, 2
+            node.set_child(left_idx, self.fold(node.args[left_idx]))
+            node.set_child(right_idx, self.fold(node.args[right_idx]))
+            a = literal_value(node.args[left_idx])
+            b = literal_value(node.args[right_idx])
+            if a is None or b is None:
+                return node
+            value = fold_binary(label, operator_of(node), a, b)
+            if value is None:
+                return node
+            self.folded += 1
+            return make_literal(value)
+
+        if label == "RoutineCall":
+            self.visit_RoutineCall(node)
+            return node
+
+        if label == "ArrayAccess":
+            if len(node.args) > 1:
+                node.set_child(1, self.fold(node.args[1]))
+            return node
+
+        return node
+
+
+########################################################################
+# 2. LOOP-INVARIANT CODE MOTION
+# Subexpressions of a while/for/repeat loop (condition and body) that
+# read only variables the loop never writes are computed once, before
+# the loop, into a hidden local:
+#
+#   while (i <= (num div 2)) and primo do ...
+#   ->  #inv0 := num div 2;
+#       while (i <= #inv0) and primo do ...
+#
+# The limit of a `for` is left alone: CodeGenerator already evaluates
+# it once, before the loop (only the limits of inner loops, evaluated
+# once per iteration of the outer one, can be hoisted).
+#
+# Hidden locals are added to the declarations of the enclosing program
+# or function (so CodeGenerator allocates them with Scope.declare like
+# any other variable); see tree.hidden_name for why their names can't
+# clash with the program's own.
+# Only integer/boolean arithmetic is moved: calls, array accesses and
+# divisions that could fail (div/mod by something other than a nonzero
+# literal) stay where they are. Variable types come from the
+# TypeChecker's annotations (`node.type`).
+########################################################################
+
+HOISTABLE_TYPES = ("Integer", "Boolean")
+
+# nós de expressões: não contêm statements
+EXPRESSIONS = (
+    "AddExpression", "MultExpression", "RelExpression", "AndExpression", "OrExpression",
+    "UnaryExpression", "LiteralValue", "DeclaredName", "ArrayAccess", "RoutineCall",
+)
+
+
+def expression_type(node):
+    node = unwrap(node)
+    if node.type is not None:
+        return node.type
+    # nós criados pelos passos de otimização, ainda sem anotação
+    if node.label in ("RelExpression", "AndExpression", "OrExpression"):
+        return "Boolean"
+    if node.label == "UnaryExpression" and node.args[0].args[0].lower() == "not":
+        return "Boolean"
+    if node.label == "LiteralValue" and node.args[0] in ("TRUE", "FALSE"):
+        return "Boolean"
+    return "Integer"
+
+
+def hidden_local(temps, kind, type_node) -> Node:
+    """A DeclaredName for a new hidden local (#<kind><n>), recorded in `temps` to be declared later."""
+    name = hidden_name(kind, len(temps))
+    temps.append((name, type_node))
+    node = Node("DeclaredName", name, type_node)
+    node.type = type_name(type_node)
+    return node
+
+
+def declare_hidden_locals(scope_node, temps):
+    """Adds a VarDeclaration of the (name, SimpleType node) pairs in `temps` to a Scope."""
+    if not temps:
+        return
+    param_tuples = [
+        Node("ParameterTuple",
+             Node("ManyDeclaredNames", Node("DeclaredName", name, type_node)),
+             Node("ReturnType", type_node))
+        for name, type_node in temps
+    ]
+    var_declaration = Node("VarDeclaration", Node("ManyParameterTuples", *param_tuples))
+    if scope_node.args[0].label == "ManyDeclarations":
+        scope_node.set_child(0, Node("ManyDeclarations", *scope_node.args[0].args, var_declaration))
+    else:
+        scope_node.args = (Node("ManyDeclarations", var_declaration),) + scope_node.args
+
+
+def assigned_names(node, names=None):
+    """Names of the variables a statement (or tree of statements) may write."""
+    if names is None:
+        names = set()
+    if node.label == "Assignment":
+        names.add(node.args[0].args[0])
+    elif node.label == "RoutineCall" and node.args[0].args[0] == "readln" and len(node.args) > 1:
+        for expr in node.args[1].args:
+            target = unwrap(expr)
+            if target.label == "ArrayAccess":
+                target = target.args[0]
+            names.add(target.args[0])
+    for arg in node.args:
+        if isinstance(arg, Node):
+            assigned_names(arg, names)
+    return names
+
+
+def is_invariant(node, variant=()):
+    """Whether an expression reads only integer/boolean names not in `variant` and can't fail."""
+    label = node.label
+    if label == "LiteralValue":
+        return node.args[0] in ("INTVALUE", "TRUE", "FALSE")
+    if label == "DeclaredName":
+        return node.args[0] not in variant and node.type in HOISTABLE_TYPES
+    if label in WRAPPERS:
+        return is_invariant(node.args[0], variant)
+    if label == "UnaryExpression":
+        return is_invariant(node.args[1], variant)
+    if label in ("AndExpression", "OrExpression"):
+        return is_invariant(node.args[0], variant) and is_invariant(node.args[1], variant)
+    if label in ("AddExpression", "RelExpression"):
+        return is_invariant(node.args[0], variant) and is_invariant(node.args[2], variant)
+    if label == "MultExpression":
+        op = operator_of(node)
+        if op == "REALDIV":
+            return False
+        divisor = literal_value(node.args[2])
+        if op in ("INTDIV", "MOD") and (not _is_int(divisor) or divisor == 0):
+            return False # pode falhar em runtime: só dentro do loop
+        return is_invariant(node.args[0], variant) and is_invariant(node.args[2], variant)
+    return False # chamadas, acessos a arrays, ...
+
+
+class LoopInvariantMotion:
+    def __init__(self):
+        self.hoisted = 0 # subexpressões movidas para fora de loops
+
+    def run(self, ast):
+        program_declaration = ast.args[1]
+        self.visit_Scope(program_declaration.args[1])
+        return {"hoisted": self.hoisted}
+
+    # ------------------------------------------------------------------
+    # escopos: cada programa/função recebe as suas variáveis escondidas
+
+    def visit_Scope(self, scope_node):
+        if scope_node.args[0].label == "ManyDeclarations":
+            self.visit_declarations(scope_node.args[0])
+
+        self.temps = [] # (nome, tipo) a declarar neste escopo
+        self.visit_statements(scope_node.args[-1])
+        declare_hidden_locals(scope_node, self.temps)
+
+    def visit_declarations(self, node):
+        for arg in node.args:
+            if arg.label == "ManyDeclarations":
+                self.visit_declarations(arg)
+            elif arg.label == "FunctionDeclaration":
+                self.visit_Scope(arg.args[2])
+
+    def new_temp(self, type_name):
+        return hidden_local(self.temps, "inv", Node("SimpleType", type_name))
+
+    # ------------------------------------------------------------------
+    # statements
+
+    def visit_statements(self, node):
+        # loops de fora primeiro: o que não muda em nenhum dos dois sai de ambos
+        for idx, arg in enumerate(node.args):
+            if not isinstance(arg, Node) or arg.label in EXPRESSIONS:
+                continue
+            if arg.label in ("While", "For", "Repeat"):
+                node.set_child(idx, self.visit_loop(arg))
+            self.visit_statements(arg)
+
+    def visit_loop(self, loop):
+        """Returns what replaces the loop: itself, or a block with the hoisted assignments before it."""
+        variant = assigned_names(loop)
+        before = [] # atribuições a fazer antes do loop
+
+        if loop.label == "For":
+            variant.add(loop.args[0].args[0].args[0])
+            body = loop.args[3] # (o limite já é avaliado uma só vez)
+        elif loop.label == "Repeat":
+            loop.set_child(1, self.hoist(loop.args[1], variant, before))
+            body = loop.args[0]
+        else:
+            loop.set_child(0, self.hoist(loop.args[0], variant, before))
+            body = loop.args[1]
+
+        self.hoist_statements(body, variant, before)
+
+        if before:
+            return Node("StatementBlock", *before, loop)
+        return loop
+
+    def hoist_statements(self, node, variant, before):
+        """Hoists invariant subexpressions out of every expression in a statement tree."""
+        label = node.label
+        if label == "Assignment":
+            node.set_child(1, self.hoist(node.args[1], variant, before))
+            return
+        if label in ("IfThen", "IfThenElse", "While"):
+            node.set_child(0, self.hoist(node.args[0], variant, before))
+            for child in node.args[1:]:
+                self.hoist_statements(child, variant, before)
+            return
+        if label == "Repeat":
+            self.hoist_statements(node.args[0], variant, before)
+            node.set_child(1, self.hoist(node.args[1], variant, before))
+            return
+        if label == "For":
+            self.hoist_statements(node.args[0], variant, before)
+            node.set_child(2, self.hoist(node.args[2], variant, before))
+            self.hoist_statements(node.args[3], variant, before)
+            return
+        if label == "RoutineCall":
+            self.hoist_call_args(node, variant, before)
+            return
+        for arg in node.args:
+            if isinstance(arg, Node):
+                self.hoist_statements(arg, variant, before)
+
+    def hoist_call_args(self, node, variant, before):
+        # readln escreve nos argumentos; write/writeln só aceitam operandos simples
+        if len(node.args) < 2 or node.args[0].args[0] in ("readln", "write", "writeln"):
+            return
+        many_exprs = node.args[1]
+        for idx, expr in enumerate(many_exprs.args):
+            many_exprs.set_child(idx, self.hoist(expr, variant, before))
+
+    # ------------------------------------------------------------------
+    # expressões
+
+    def hoist(self, node, variant, before):
+        """Returns `node` with its largest invariant subexpressions replaced by hidden locals."""
+        if is_invariant(node, variant) and self.is_compound(node):
+            temp = self.new_temp(expression_type(node))
+            before.append(Node("Assignment", temp, unwrap(node)))
+            self.hoisted += 1
+            return clone(temp)
+
+        label = node.label
+        if label in WRAPPERS:
+            return self.hoist(node.args[0], variant, before)
+        elif label in ("AddExpression", "MultExpression", "RelExpression"):
+            node.set_child(0, self.hoist(node.args[0], variant, before))
+            node.set_child(2, self.hoist(node.args[2], variant, before))
+        elif label in ("AndExpression", "OrExpression"):
+            node.set_child(0, self.hoist(node.args[0], variant, before))
+            node.set_child(1, self.hoist(node.args[1], variant, before))
+        elif label == "UnaryExpression":
+            node.set_child(1, self.hoist(node.args[1], variant, before))
+        elif label == "RoutineCall":
+            self.hoist_call_args(node, variant, before)
+        elif label == "ArrayAccess" and len(node.args) > 1:
+            node.set_child(1, self.hoist(node.args[1], variant, before))
+        return node
+
+    def is_compound(self, node):
+        # mover uma variável ou um literal sozinhos não poupa nada
+        return unwrap(node).label not in ("DeclaredName", "LiteralValue")
+
+
+########################################################################
+# 3. FUNCTION INLINING
+# Calls to small functions are replaced by the function's body, saving
+# the whole calling convention (return slot, PUSHA/CALL, parameter
+# copies, POPs, RETURN):
+#
+#   function Square(n: Integer): Integer;  begin Square := n * n end;
+#   r := Square(num)   ->   r := num * num
+#
+# A function can be inlined when, after its own calls were inlined, its
+# body is a straight line of assignments to its locals and its result,
+# reading only literals, its parameters and locals already assigned
+# (so it has no side effects, reads no globals and calls nothing: it
+# can't be recursive), and it has at most `max_size` nodes. Functions
+# are visited callees first (post-order of the call graph), so a chain
+# of small functions collapses into its callers.
+#
+# A parameter that the body never assigns is replaced by its argument
+# when the argument is a variable or a literal, or when it's used only
+# once. Other parameters, the locals and the result become hidden locals
+# of the caller (`#inl0`, ...), assigned before the statement with the
+# call. Those assignments are only added where the call is evaluated
+# exactly once: not in while conditions, for limits or the right side
+# of and/or, and not in statements that also call other functions
+# (whose side effects could then happen in a different order).
+#
+# The functions are still compiled (calls may be left elsewhere).
+########################################################################
+
+INLINE_MAX_SIZE = 40
+
+PURE_BUILTINS = ("length",)
+
+# o que write/writeln aceitam como argumento
+WRITE_OPERANDS = ("LiteralValue", "DeclaredName", "ArrayAccess", "RoutineCall")
+
+
+def clone(node):
+    """Deep copy of an expression (keeping types and lines)."""
+    if not isinstance(node, Node):
+        return node
+    copy = Node(node.label, *(clone(arg) for arg in node.args))
+    copy.type, copy.line = node.type, node.line
+    return copy
+
+
+def count_nodes(node):
+    return 1 + sum(count_nodes(arg) for arg in node.args if isinstance(arg, Node))
+
+
+def called_names(node, names=None):
+    """Names of the routines called anywhere in a tree."""
+    if names is None:
+        names = set()
+    if node.label == "RoutineCall":
+        names.add(node.args[0].args[0])
+    for arg in node.args:
+        if isinstance(arg, Node):
+            called_names(arg, names)
+    return names
+
+
+def flat_statements(node):
+    """The statements of a block, with nested blocks flattened."""
+    statements = []
+    for stmt in node.args:
+        if stmt.label == "StatementBlock":
+            statements.extend(flat_statements(stmt))
+        else:
+            statements.append(stmt)
+    return statements
+
+
+class InlineBody:
+    """What a call to an inlinable function is replaced by."""
+    def __init__(self, params, local_types, statements, result, result_expr, uses):
+        self.params = params            # [(nome, nó SimpleType)], pela ordem da declaração
+        self.local_types = local_types  # nome -> nó SimpleType (variáveis locais e o resultado)
+        self.statements = statements    # as atribuições do corpo (sem a última, se result_expr)
+        self.result = result            # nome do resultado (o nome da função)
+        self.result_expr = result_expr  # expressão do resultado, se a última atribuição é a única ao resultado
+        self.uses = uses                # nome -> nº de leituras no corpo
+        self.assigned = {stmt.args[0].args[0] for stmt in statements}
+
+
+class FunctionInliner:
+    def __init__(self, max_size=INLINE_MAX_SIZE):
+        self.max_size = max_size
+        self.bodies = {}  # nome da função -> InlineBody
+        self.inlined = 0  # chamadas substituídas
+
+    def run(self, ast):
+        program_scope = ast.args[1].args[1]
+        functions = {}
+        routines = [] # (nome, declaração) de todas as funções e procedimentos
+        self.collect_routines(program_scope, routines)
+        names = [name for name, _ in routines]
+        for name, declaration in routines:
+            # um nome declarado mais de uma vez (em escopos diferentes) fica de fora
+            if declaration.label == "FunctionDeclaration" and names.count(name) == 1:
+                functions[name] = declaration
+
+        for name in self.call_graph_order(functions):
+            declaration = functions[name]
+            self.inline_scope(declaration.args[2])
+            body = self.inline_body(declaration)
+            if body is not None:
+                self.bodies[name] = body
+        for name, declaration in routines:
+            if name not in functions:
+                self.inline_scope(declaration.args[2])
+        self.inline_scope(program_scope)
+        return {"inlined": self.inlined, "functions": len(self.bodies)}
+
+    def collect_routines(self, scope_node, routines):
+        if scope_node.args[0].label != "ManyDeclarations":
+            return
+        for declaration in scope_node.args[0].args:
+            if declaration is not None and declaration.label in ("FunctionDeclaration", "ProcedureDeclaration"):
+                routines.append((declaration.args[0].args[0].args[0], declaration))
+                self.collect_routines(declaration.args[2], routines)
+
+    def call_graph_order(self, functions):
+        """Function names in post-order of the call graph (callees before their callers)."""
+        calls = {name: called_names(declaration.args[2]) & functions.keys()
+                 for name, declaration in functions.items()}
+        order = []
+        visited = set()
+        for root in functions:
+            if root in visited:
+                continue
+            visited.add(root)
+            stack = [(root, iter(sorted(calls[root])))]
+            while stack:
+                name, callees = stack[-1]
+                callee = next(callees, None)
+                if callee is None:
+                    stack.pop()
+                    order.append(name)
+                elif callee not in visited: # (ciclos = recursão: ficam com chamadas, não são inlined)
+                    visited.add(callee)
+                    stack.append((callee, iter(sorted(calls[callee]))))
+        return order
+
+    # ------------------------------------------------------------------
+    # que funções podem ser inlined
+
+    def inline_body(self, declaration):
+        """The InlineBody of a function, or None if it can't be inlined."""
+        heading, return_type, scope_node = declaration.args
+        name = heading.args[0].args[0]
+        result_type = return_type.args[0]
+        if result_type.label != "SimpleType":
+            return None
+
+        params = []
+        routine_params = heading.args[1]
+        if routine_params.args:
+            for param_tuple in routine_params.args[0].args:
+                param_type = param_tuple.args[1].args[0]
+                if param_type.label != "SimpleType":
+                    return None
+                params.extend((declared.args[0], param_type) for declared in param_tuple.args[0].args)
+
+        local_types = {name: result_type}
+        if scope_node.args[0].label == "ManyDeclarations":
+            for declaration_node in scope_node.args[0].args:
+                if declaration_node is None or declaration_node.label != "VarDeclaration":
+                    return None # constantes e funções dentro da função
+                for param_tuple in declaration_node.args[0].args:
+                    var_type = param_tuple.args[1].args[0]
+                    if var_type.label != "SimpleType":
+                        return None
+                    for declared in param_tuple.args[0].args:
+                        local_types[declared.args[0]] = var_type
+
+        param_names = {param_name for param_name, _ in params}
+        if param_names & local_types.keys() or len(param_names) != len(params):
+            return None
+
+        statements = flat_statements(scope_node.args[-1])
+        if sum(count_nodes(stmt) for stmt in statements) > self.max_size:
+            return None
+
+        uses = dict.fromkeys(param_names | local_types.keys(), 0)
+        assigned = set(param_names)
+        for stmt in statements:
+            if stmt.label != "Assignment" or stmt.args[0].label != "DeclaredName":
+                return None
+            if not self.reads_only(stmt.args[1], assigned - {name}, uses):
+                return None
+            target = stmt.args[0].args[0]
+            if target not in uses:
+                return None # atribuição a uma global
+            assigned.add(target)
+        if name not in assigned:
+            return None
+
+        result_expr = None
+        last = statements[-1] if statements else None
+        if last is not None and last.args[0].args[0] == name and \
+                sum(1 for stmt in statements if stmt.args[0].args[0] == name) == 1:
+            result_expr = last.args[1]
+            statements = statements[:-1]
+        return InlineBody(params, local_types, statements, name, result_expr, uses)
+
+    def reads_only(self, node, names, uses):
+        """True if an expression reads nothing but literals and `names` (counting the reads in `uses`)."""
+        label = node.label
+        if label == "LiteralValue":
+            return True
+        if label == "DeclaredName":
+            if node.args[0] not in names:
+                return False
+            uses[node.args[0]] += 1
+            return True
+        if label in WRAPPERS or label == "UnaryExpression":
+            return self.reads_only(node.args[-1], names, uses)
+        if label in ("AndExpression", "OrExpression"):
+            return self.reads_only(node.args[0], names, uses) and self.reads_only(node.args[1], names, uses)
+        if label in ("AddExpression", "MultExpression", "RelExpression"):
+            return self.reads_only(node.args[0], names, uses) and self.reads_only(node.args[2], names, uses)
+        return False # chamadas, acessos a arrays
+
+    # ------------------------------------------------------------------
+    # chamadas
+
+    def inline_scope(self, scope_node):
+        self.temps = [] # (nome, tipo) a declarar neste escopo
+        block = scope_node.args[-1]
+        for idx, stmt in enumerate(block.args):
+            block.set_child(idx, self.visit_statement(stmt))
+        declare_hidden_locals(scope_node, self.temps)
+
+    def has_side_effects(self, node):
+        """True if an expression calls a routine that won't be inlined."""
+        if node.label == "RoutineCall":
+            name = node.args[0].args[0]
+            if name not in self.bodies and name not in PURE_BUILTINS:
+                return True
+        return any(self.has_side_effects(arg) for arg in node.args if isinstance(arg, Node))
+
+    def visit_statement(self, stmt):
+        """Returns what replaces a statement: itself, or a block with the inlined bodies before it."""
+        if stmt is None:
+            return stmt
+        label = stmt.label
+        if label == "StatementBlock":
+            for idx, child in enumerate(stmt.args):
+                stmt.set_child(idx, self.visit_statement(child))
+            return stmt
+
+        # expressões do próprio statement, cada uma com (índice, aceita atribuições antes)
+        before = []
+        if label == "Assignment":
+            expressions = [stmt.args[1]]
+        elif label == "RoutineCall":
+            if len(stmt.args) < 2 or stmt.args[0].args[0] == "readln":
+                return stmt
+            expressions = list(stmt.args[1].args)
+        elif label in ("IfThen", "IfThenElse", "While"):
+            expressions = [stmt.args[0]]
+        elif label == "For":
+            expressions = [stmt.args[0].args[1], stmt.args[2]]
+        elif label == "Repeat":
+            expressions = [stmt.args[1]]
+        else:
+            return stmt
+        if any(self.has_side_effects(expr) for expr in expressions):
+            before = None
+
+        if label == "Assignment":
+            stmt.set_child(1, self.inline(stmt.args[1], before))
+        elif label == "RoutineCall":
+            many_exprs = stmt.args[1]
+            operand = stmt.args[0].args[0] in ("write", "writeln")
+            for idx, expr in enumerate(many_exprs.args):
+                many_exprs.set_child(idx, self.inline(expr, before, operand))
+        elif label in ("IfThen", "IfThenElse"):
+            stmt.set_child(0, self.inline(stmt.args[0], before))
+            for idx in range(1, len(stmt.args)):
+                stmt.set_child(idx, self.visit_statement(stmt.args[idx]))
+        elif label == "While":
+            stmt.set_child(0, self.inline(stmt.args[0], None)) # avaliada a cada iteração
+            stmt.set_child(1, self.visit_statement(stmt.args[1]))
+        elif label == "Repeat":
+            stmt.set_child(0, self.visit_statement(stmt.args[0]))
+            stmt.set_child(1, self.inline(stmt.args[1], None)) # avaliada depois do corpo
+        elif label == "For":
+            assignment = stmt.args[0]
+            assignment.set_child(1, self.inline(assignment.args[1], before))
+            stmt.set_child(2, self.inline(stmt.args[2], None))
+            stmt.set_child(3, self.visit_statement(stmt.args[3]))
+
+        if before:
+            return Node("StatementBlock", *before, stmt)
+        return stmt
+
+    def inline(self, node, before, operand=False):
+        """
+        Returns `node` with the calls to inlinable functions replaced.
+        Assignments that must run first are appended to `before` (when
+        it is None, only calls that need none are inlined). With
+        operand=True (arguments of write/writeln) the result must be one
+        of WRITE_OPERANDS.
+        """
+        label = node.label
+        if label in WRAPPERS:
+            return self.inline(node.args[0], before)
+        if label in ("AddExpression", "MultExpression", "RelExpression"):
+            node.set_child(0, self.inline(node.args[0], before))
+            node.set_child(2, self.inline(node.args[2], before))
+        elif label in ("AndExpression", "OrExpression"):
+            node.set_child(0, self.inline(node.args[0], before))
+            node.set_child(1, self.inline(node.args[1], None)) # pode não ser avaliado
+        elif label == "UnaryExpression":
+            node.set_child(1, self.inline(node.args[1], before))
+        elif label == "ArrayAccess" and len(node.args) > 1:
+            node.set_child(1, self.inline(node.args[1], before))
+        elif label == "RoutineCall":
+            args = []
+            if len(node.args) > 1:
+                many_exprs = node.args[1]
+                for idx, expr in enumerate(many_exprs.args):
+                    many_exprs.set_child(idx, self.inline(expr, before))
+                args = list(many_exprs.args)
+            body = self.bodies.get(node.args[0].args[0])
+            if body is not None and len(args) == len(body.params) and not (operand and before is None):
+                expansion = self.expand(body, args, before)
+                if expansion is not None:
+                    self.inlined += 1
+                    if operand and expansion.label not in WRITE_OPERANDS:
+                        temp = self.new_temp(body.local_types[body.result])
+                        before.append(Node("Assignment", temp, expansion))
+                        return clone(temp)
+                    return expansion
+        return node
+
+    def expand(self, body, args, before):
+        """The expression that replaces a call to `body` (None if it would need `before`)."""
+        replacements = {}  # nome no corpo da função -> expressão no chamador
+        assignments = []
+        for (param_name, param_type), arg in zip(body.params, args):
+            arg = unwrap(arg)
+            simple = arg.label in ("DeclaredName", "LiteralValue")
+            if param_name not in body.assigned and (
+                    simple or (body.uses[param_name] <= 1 and not self.has_side_effects(arg))):
+                replacements[param_name] = arg
+            else:
+                temp = self.new_temp(param_type)
+                assignments.append(Node("Assignment", temp, arg))
+                replacements[param_name] = temp
+
+        needs_locals = body.statements or body.result_expr is None
+        if (assignments or needs_locals) and before is None:
+            return None
+        for local_name, local_type in body.local_types.items():
+            if body.uses[local_name] or local_name in body.assigned:
+                replacements[local_name] = self.new_temp(local_type)
+
+        for stmt in body.statements:
+            assignments.append(Node("Assignment",
+                                    clone(replacements[stmt.args[0].args[0]]),
+                                    self.substitute(stmt.args[1], replacements)))
+        if assignments:
+            before.extend(assignments)
+        if body.result_expr is not None:
+            return self.substitute(body.result_expr, replacements)
+        return clone(replacements[body.result])
+
+    def substitute(self, node, replacements):
+        """Copy of an expression of a function's body, with its names replaced."""
+        if node.label == "DeclaredName":
+            return clone(replacements[node.args[0]])
+        copy = Node(node.label, *(self.substitute(arg, replacements) if isinstance(arg, Node) else arg
+                                  for arg in node.args))
+        copy.type, copy.line = node.type, node.line
+        return copy
+
+    def new_temp(self, type_node):
+        return hidden_local(self.temps, "inl", type_node)
+
+
+########################################################################
+# 4. DEAD CODE ELIMINATION
+# Runs after constant folding, on what it left as literal conditions:
+# - `if true/false` keeps only the branch that runs, `while false` and
+#   `if false` without else disappear
+# - functions that can't be reached from the main block (through the
+#   call graph of RoutineCalls, after removing the dead branches) are
+#   removed from the program, so they are not compiled at all
+########################################################################
+
+class DeadCodeEliminator:
+    def __init__(self):
+        self.branches = 0  # ifs/whiles com condição constante
+        self.removed = []  # nomes das funções removidas
+
+    def run(self, ast):
+        program_scope = ast.args[1].args[1]
+        declarations = program_scope.args[0] if program_scope.args[0].label == "ManyDeclarations" else None
+
+        functions = {}
+        if declarations is not None:
+            for declaration in declarations.args:
+                if declaration.label == "FunctionDeclaration":
+                    functions[declaration.args[0].args[0].args[0]] = declaration
+                    self.prune_scope(declaration.args[2])
+        self.prune_scope(program_scope)
+
+        if declarations is not None:
+            reachable = self.reachable(functions, program_scope)
+            kept = []
+            for declaration in declarations.args:
+                if declaration.label == "FunctionDeclaration" and \
+                        declaration.args[0].args[0].args[0] not in reachable:
+                    self.removed.append(declaration.args[0].args[0].args[0])
+                else:
+                    kept.append(declaration)
+            declarations.args = tuple(kept)
+        return {"branches": self.branches, "functions": len(self.removed), "removed": self.removed}
+
+    def reachable(self, functions, program_scope):
+        """Names of the functions the main block (or a constant) may call, directly or not."""
+        pending = set(called_names(program_scope.args[-1]))
+        if program_scope.args[0].label == "ManyDeclarations":
+            for declaration in program_scope.args[0].args:
+                if declaration.label != "FunctionDeclaration":
+                    called_names(declaration, pending)
+        reachable = set()
+        while pending:
+            name = pending.pop()
+            if name in reachable or name not in functions:
+                continue
+            reachable.add(name)
+            pending |= called_names(functions[name].args[2]) - reachable
+        return reachable
+
+    # ------------------------------------------------------------------
+    # ramos com condição constante
+
+    def prune_scope(self, scope_node):
+        self.prune(scope_node.args[-1]) # (um StatementBlock fica sempre, nem que vazio)
+
+    def prune(self, stmt):
+        """What replaces a statement: itself, the branch that runs, or None if nothing runs."""
+        if stmt is None:
+            return stmt
+        label = stmt.label
+        if label == "StatementBlock":
+            stmt.args = tuple(pruned for pruned in map(self.prune, stmt.args) if pruned is not None)
+            return stmt
+
+        if label in ("IfThen", "IfThenElse", "While"):
+            condition = literal_value(stmt.args[0])
+            if condition is True or condition is False:
+                if label == "While" and condition is True:
+                    pass # ciclo infinito: fica como está
+                else:
+                    self.branches += 1
+                    if label == "While" or (label == "IfThen" and not condition):
+                        return None
+                    return self.prune(stmt.args[1] if condition else stmt.args[2])
+            for idx in range(1, len(stmt.args)):
+                stmt.set_child(idx, self.prune(stmt.args[idx]) or Node("StatementBlock"))
+            return stmt
+
+        if label == "For":
+            stmt.set_child(3, self.prune(stmt.args[3]) or Node("StatementBlock"))
+        elif label == "Repeat":
+            self.prune(stmt.args[0]) # (o corpo corre sempre pelo menos uma vez)
+        return stmt
+
+
+########################################################################
+# 5. ALGEBRAIC SIMPLIFICATION
+# Runs after constant folding and rewrites integer/boolean expressions
+# into cheaper ones (every rule has a counter in the stats):
+#
+#   add_zero           x + 0, 0 + x, x - 0       ->  x
+#   mul_one / div_one  x * 1, 1 * x / x div 1    ->  x
+#   mul_zero           x * 0, 0 * x              ->  0
+#   mod_one            x mod 1                   ->  0
+#   sub_self           x - x                     ->  0
+#   reassociate        (x + 1) + 2, (x * 2) * 3  ->  x + 3, x * 6
+#   double_negation    -(-x), not not b          ->  x, b
+#   negate_comparison  not (a < b)               ->  a >= b
+#   bool_comparison    b = true, b <> true       ->  b, not b
+#   constants          literal operands left by the rules above are
+#                      evaluated, e.g. x * 0 + 1  ->  1
+#
+# An operand is only dropped (x * 0, x mod 1, x - x) when evaluating it
+# has no effects and can't fail (see is_invariant).
+# EWVM has no shifts nor increments, so there is no strength reduction:
+# x * 2 as x + x would still be two PUSHes and one operation (and would
+# evaluate x twice), and `i := i + 1` stays PUSHL/PUSHI/ADD/STOREL.
+########################################################################
+
+ALGEBRA_RULES = (
+    "add_zero", "mul_one", "div_one", "mul_zero", "mod_one", "sub_self",
+    "reassociate", "double_negation", "negate_comparison", "bool_comparison", "constants",
+)
+
+# not (a op b) -> a NEGATED[op] b (`not (a = b)` já custa o mesmo que `a <> b`)
+NEGATED = {"NEQ": "EQ", "LT": "GTE", "GT": "LTE", "LTE": "GT", "GTE": "LT"}
+
+
+def add_expression(left, op, right) -> Node:
+    node = Node("AddExpression", left, Node("AddOperator", op), right)
+    node.type = "Integer"
+    return node
+
+
+def mult_expression(left, op, right) -> Node:
+    node = Node("MultExpression", left, Node("MultOperator", Node(op)), right)
+    node.type = "Integer"
+    return node
+
+
+def not_expression(operand) -> Node:
+    node = Node("UnaryExpression", Node("UnaryOperator", "not"), operand)
+    node.type = "Boolean"
+    return node
+
+
+class AlgebraicSimplifier:
+    def __init__(self):
+        self.rewrites = dict.fromkeys(ALGEBRA_RULES, 0)
+
+    def run(self, ast):
+        self.visit(ast)
+        return {"rewrites": sum(self.rewrites.values()), **self.rewrites}
+
+    def fired(self, rule):
+        self.rewrites[rule] += 1
+
+    def visit(self, node):
+        # cada expressão que aparece num statement (ou declaração) é simplificada
+        for idx, arg in enumerate(node.args):
+            if not isinstance(arg, Node):
+                continue
+            if arg.label in EXPRESSIONS or arg.label in WRAPPERS:
+                node.set_child(idx, self.simplify(arg))
+            else:
+                self.visit(arg)
+
+    # ------------------------------------------------------------------
+    # expressões (os operandos primeiro: as regras veem-nos já simplificados)
+
+    def simplify(self, node):
+        label = node.label
+        if label in WRAPPERS:
+            return self.simplify(node.args[0])
+        if label in ("AddExpression", "MultExpression", "RelExpression"):
+            node.set_child(0, self.simplify(node.args[0]))
+            node.set_child(2, self.simplify(node.args[2]))
+            return self.simplify_binary(node)
+        if label in ("AndExpression", "OrExpression"):
+            node.set_child(0, self.simplify(node.args[0]))
+            node.set_child(1, self.simplify(node.args[1]))
+            return node
+        if label == "UnaryExpression":
+            node.set_child(1, self.simplify(node.args[1]))
+            return self.simplify_unary(node)
+        if label == "ArrayAccess" and len(node.args) > 1:
+            node.set_child(1, self.simplify(node.args[1]))
+        elif label == "RoutineCall" and len(node.args) > 1:
+            many_exprs = node.args[1]
+            for idx, expr in enumerate(many_exprs.args):
+                many_exprs.set_child(idx, self.simplify(expr))
+        return node
+
+    def simplify_binary(self, node):
+        label = node.label
+        op = operator_of(node)
+        left, right = node.args[0], node.args[2]
+        a, b = literal_value(left), literal_value(right)
+
+        if a is not None and b is not None:
+            value = fold_binary(label, op, a, b)
+            if value is None:
+                return node
+            self.fired("constants")
+            return make_literal(value)
+
+        if label == "RelExpression":
+            return self.simplify_comparison(node, op, left, right, a, b)
+
+        # literal à direita: `2 * x` -> `x * 2`, `1 + x` -> `x + 1`
+        if _is_int(a) and op in ("+", "TIMES"):
+            left, right, a, b = right, left, b, a
+            node.args = (left, node.args[1], right)
+        if not _is_int(b):
+            if label == "AddExpression" and op == "-" and same_variable(left, right):
+                self.fired("sub_self")
+                return int_literal(0)
+            return node
+
+        if label == "AddExpression":
+            if b == 0:
+                self.fired("add_zero")
+                return left
+            inner = left
+            if inner.label == "AddExpression" and _is_int(literal_value(inner.args[2])):
+                inner_b = literal_value(inner.args[2])
+                offset = (inner_b if operator_of(inner) == "+" else -inner_b) + (b if op == "+" else -b)
+                self.fired("reassociate")
+                if offset == 0:
+                    return inner.args[0]
+                return add_expression(inner.args[0], "+" if offset > 0 else "-", int_literal(abs(offset)))
+            return node
+
+        if op == "TIMES":
+            if b == 1:
+                self.fired("mul_one")
+                return left
+            if b == 0 and is_invariant(left):
+                self.fired("mul_zero")
+                return int_literal(0)
+            inner = scaled(left)
+            if inner is not None:
+                self.fired("reassociate")
+                return self.simplify_binary(mult_expression(inner[0], "TIMES", int_literal(inner[1] * b)))
+        elif op == "INTDIV" and b == 1:
+            self.fired("div_one")
+            return left
+        elif op == "MOD" and b in (1, -1) and is_invariant(left):
+            self.fired("mod_one")
+            return int_literal(0)
+        return node
+
+    def simplify_comparison(self, node, op, left, right, a, b):
+        if op not in ("EQ", "NEQ"):
+            return node
+        if _is_bool(a) and expression_type(right) == "Boolean":
+            operand, value = right, a
+        elif _is_bool(b) and expression_type(left) == "Boolean":
+            operand, value = left, b
+        else:
+            return node
+        self.fired("bool_comparison")
+        # b = true, b <> false -> b; b = false, b <> true -> not b
+        if value == (op == "EQ"):
+            return operand
+        return self.simplify_unary(not_expression(operand))
+
+    def simplify_unary(self, node):
+        op = node.args[0].args[0].lower()
+        operand = node.args[1]
+        if op == "+":
+            return operand
+        if operand.label == "UnaryExpression" and operand.args[0].args[0].lower() == op and op in ("-", "not"):
+            self.fired("double_negation")
+            return operand.args[1]
+        if op == "not" and operand.label == "RelExpression" and operator_of(operand) in NEGATED:
+            self.fired("negate_comparison")
+            operand.set_child(1, Node("RelOperator", Node(NEGATED[operator_of(operand)])))
+            return operand
+        if op == "not" and _is_bool(literal_value(operand)):
+            self.fired("constants")
+            return bool_literal(not literal_value(operand))
+        return node
+
+
+def scaled(node):
+    """(x, c) if `node` is x * c with a literal c, else None."""
+    if node.label == "MultExpression" and operator_of(node) == "TIMES" and _is_int(literal_value(node.args[2])):
+        return node.args[0], literal_value(node.args[2])
+    return None
+
+
+def same_variable(left, right):
+    """Whether two operands are the same integer variable (so `left - right` is 0)."""
+    return left.label == "DeclaredName" and right.label == "DeclaredName" and \
+        left.args[0] == right.args[0] and left.type in HOISTABLE_TYPES
@@ -1,15 +1,40 @@
-from tree import Node
+import os
+import sys
+import copy
+import pickle
+import functools
+
+from tree import Node, unwrap
 from ply import yacc
 from lexer import tokens, lexer
-
-rootNode = None
+from cache import cache_dir, digest
+from errors import ParseError, Diagnostic, SourceMap
 
 ########################################################################
-# DECLARED VALUES
-# Dict to store declared identifiers and their types (variables, functions, procedures, etc.)
-# It is essential for semantic analysis, type checking, and for detecting redeclarations or undeclared usage.
+# PARSER STATE
+# Each parser instance carries its own state (see reset_state), reachable
+# from the rules as p.parser:
+#  - source:        the text being parsed, as an errors.SourceMap (for
+#                   the line and column of error messages)
+#  - diagnostics:   syntax errors found so far (see syntax_error)
+#  - root:          the Program node, once reduced
+#  - declared_dict: declared identifiers and their types (variables,
+#                   functions, procedures, etc.). It is essential for
+#                   semantic analysis, type checking, and for detecting
+#                   redeclarations or undeclared usage.
 ########################################################################
-declared_dict = {}
+
+def reset_state(instance, source=""):
+    instance.source = SourceMap(source)
+    instance.diagnostics = []
+    instance.partial_tree = None
+    instance.root = None
+    instance.declared_dict = {}
+
+def at(line, node):
+    """`node` with its source line set."""
+    node.line = line
+    return node
 
 ########################################################################
 # 1. PROGRAM RULES
@@ -19,9 +44,8 @@ def p_Program(p): # start here
     """
     Program : PROGRAM ProgramDeclaration 
     """
-    global rootNode
-    rootNode = Node("Program", p[1], p[2])
-    p[0] = rootNode
+    p.parser.root = Node("Program", p[1], p[2])
+    p[0] = p.parser.root
 
 ########################################################################
 # 2. STATEMENT RULES
@@ -36,7 +60,7 @@ def p_Scope(p):
           | StatementBlock
     """
     if len(p)==2 : p[0] = Node("Scope", p[1])
-    else:          p[0] = Node("Scope", p[1], p[2])
+    else:          p[0] = Node("Scope", Node("ManyDeclarations", *p[1]), p[2])
 
 def p_TerminalSemicolons(p):
     """
@@ -52,17 +76,18 @@ def p_StatementBlock(p):
     if len(p) == 3:
         p[0] = Node("StatementBlock")
     else:
-        p[0] = Node("StatementBlock", *p[2].args)
+        p[0] = Node("StatementBlock", *p[2])
 
 def p_ManyStatements(p):
     """
     ManyStatements : Statement
                    | ManyStatements SEMICOLON Statement
     """
+    # listas (Many*) são construídas numa list do python e só no fim viram nó
     if len(p) == 2:
-        p[0] = Node('ManyStatements', p[1])
+        p[0] = [p[1]]
     else:
-        p[1].add_child(p[3])
+        p[1].append(p[3])
         p[0] = p[1]
 
 def p_Statement(p):
@@ -73,7 +98,7 @@ def p_Statement(p):
               | While
               | For
     """
-    p[0] = Node("Statement", p[1])
+    p[0] = p[1] # sem nó Statement: não acrescenta informação
 
 # "closed" statement: all ifs within are ELSE'd
 # to avoid ELSE ambiguity, THEN substatements must be closed
@@ -94,14 +119,15 @@ def p_NoTailStatement(p):
     NoTailStatement : StatementBlock
                     | Assignment
                     | RoutineCall
+                    | Repeat
     """
-    p[0] = Node("NoTailStatement", p[1])
+    p[0] = p[1]
 
 def p_Assignment(p):
     """
     Assignment : DeclaredName ASSIGN Expression
     """
-    p[0] = Node("Assignment", p[1], p[3])
+    p[0] = at(p[1].line, Node("Assignment", p[1], p[3]))
 
 ########################################################################
 # 2.1. CONTROL FLOW
@@ -111,45 +137,55 @@ def p_IfThen(p):
     """
     IfThen : IF Expression THEN Statement
     """
-    p[0] = Node("IfThen", p[2], p[4])
+    p[0] = at(p.lineno(1), Node("IfThen", p[2], p[4]))
  
 def p_IfThenElse(p):
     """
     IfThenElse : IF Expression THEN ClosedStatement ELSE Statement 
     """
-    p[0] = Node("IfThenElse", p[2], p[4], p[6])
+    p[0] = at(p.lineno(1), Node("IfThenElse", p[2], p[4], p[6]))
  
 def p_ClosedIfThenElse(p):
     """
     ClosedIfThenElse : IF Expression THEN ClosedStatement ELSE ClosedStatement
     """
-    p[0] = Node("IfThenElse", p[2], p[4], p[6])
+    p[0] = at(p.lineno(1), Node("IfThenElse", p[2], p[4], p[6]))
 
 def p_While(p):
     """
     While : WHILE Expression DO Statement 
     """
-    p[0] = Node("While", p[2], p[4])
+    p[0] = at(p.lineno(1), Node("While", p[2], p[4]))
 
 def p_ClosedWhile(p):
     """
     ClosedWhile : WHILE Expression DO ClosedStatement 
     """
-    p[0] = Node("ClosedWhile", p[1],p[2],p[3],p[4])
+    p[0] = at(p.lineno(1), Node("ClosedWhile", p[1],p[2],p[3],p[4]))
+
+# repeat ... until: the body is a statement list (no begin-end needed)
+# and the statement ends in the condition, so it is never a tail statement
+def p_Repeat(p):
+    """
+    Repeat : REPEAT ManyStatements TerminalSemicolons UNTIL Expression
+           | REPEAT UNTIL Expression
+    """
+    if len(p) == 4: p[0] = at(p.lineno(1), Node("Repeat", Node("StatementBlock"), p[3]))
+    else:           p[0] = at(p.lineno(1), Node("Repeat", Node("StatementBlock", *p[2]), p[5]))
 
 def p_For(p):
     """
     For : FOR Assignment TO Expression DO Statement
         | FOR Assignment DOWNTO Expression DO Statement 
     """
-    p[0] = Node("For", p[2], p[3], p[4], p[6])
+    p[0] = at(p.lineno(1), Node("For", p[2], p[3], p[4], p[6]))
 
 def p_ClosedFor(p):
     """
     ClosedFor : FOR Assignment TO Expression DO ClosedStatement
               | FOR Assignment DOWNTO Expression DO ClosedStatement
     """
-    p[0] = Node("ClosedFor", p[2], p[3], p[4])
+    p[0] = at(p.lineno(1), Node("ClosedFor", p[2], p[3], p[4]))
 
 ########################################################################
 # 3. DECLARATION RULES
@@ -162,32 +198,68 @@ def p_ManyDeclarations(p):
     ManyDeclarations : Declaration
                      | ManyDeclarations Declaration
     """
-    #if len(p) == 2: p[0] = p[1]
-    #else:
-    #    p[1].add_child(p[2])
-    #    p[0] = p[1]
-    if len(p) == 2: p[0] = Node("ManyDeclarations", p[1])
-    else:           p[0] = Node("ManyDeclarations", p[1], p[2])
+    if len(p) == 2: p[0] = [p[1]]
+    else:
+        p[1].append(p[2])
+        p[0] = p[1]
 
 def p_Declaration(p):
     """
     Declaration : VAR VarDeclaration
+                | CONST ConstDeclaration
                 | PROCEDURE ProcedureDeclaration
                 | FUNCTION FunctionDeclaration
     """
-    p[0] = p[2]
+    if p.slice[1].type == "CONST": p[0] = Node("ConstDeclaration", *p[2])
+    else:                          p[0] = p[2]
+
+def p_ConstDeclaration(p):
+    """
+    ConstDeclaration : ConstDefinition
+                     | ConstDeclaration ConstDefinition
+    """
+    if len(p) == 2: p[0] = [p[1]]
+    else:
+        p[1].append(p[2])
+        p[0] = p[1]
+
+LITERAL_TYPES = {
+    "INTVALUE": "integer", "REALVALUE": "real", "STRINGVALUE": "string",
+    "CHARVALUE": "char", "TRUE": "boolean", "FALSE": "boolean",
+}
+
+def const_type(expr):
+    # tipo de uma expressão constante, para guardar no declared_dict
+    node = unwrap(expr)
+    if node.label == "LiteralValue":
+        return LITERAL_TYPES[node.args[0]]
+    if node.label == "DeclaredName" and isinstance(node.args[1], Node):
+        return node.args[1].args[0]
+    if node.label in ("RelExpression", "AndExpression", "OrExpression"):
+        return "boolean"
+    if node.label == "UnaryExpression" and node.args[0].args[0].lower() == "not":
+        return "boolean"
+    return "integer"
+
+def p_ConstDefinition(p):
+    """
+    ConstDefinition : IDENTIFIER EQ Expression SEMICOLON
+    """
+    # o tipo da constante é o do valor (ex.: const N = 10; -> integer)
+    p.parser.declared_dict[p[1]] = Node("SimpleType", const_type(p[3]))
+    p[0] = at(p.lineno(1), Node("ConstDefinition", p[1], p[3]))
 
 def p_VarDeclaration(p):
     """
     VarDeclaration : ManyParameterTuples SEMICOLON
     """
-    p[0] = Node("VarDeclaration", p[1])
+    p[0] = Node("VarDeclaration", Node("ManyParameterTuples", *p[1]))
     
 def p_ProcedureDeclaration(p):
     """
     ProcedureDeclaration : RoutineHeading SEMICOLON Scope SEMICOLON
     """
-    p[0] = Node("ProcedureDeclaration", p[1], p[2], p[3], p[4])
+    p[0] = at(p[1].line, Node("ProcedureDeclaration", p[1], p[2], p[3], p[4]))
 
 def p_FunctionDeclaration(p):
     """
@@ -197,9 +269,9 @@ def p_FunctionDeclaration(p):
     func_name = p[1].args[0].args[0]
     return_type = p[2]
 
-    declared_dict[func_name] = return_type
+    p.parser.declared_dict[func_name] = return_type
 
-    p[0] = Node("FunctionDeclaration", p[1], p[2], p[4])
+    p[0] = at(p[1].line, Node("FunctionDeclaration", p[1], p[2], p[4]))
 
 def p_ProgramDeclaration(p): # start here
     """
@@ -211,7 +283,7 @@ def p_RoutineHeading(p):
     """
     RoutineHeading : DeclaredName RoutineParameters
     """
-    p[0] = Node("RoutineHeading", p[1], p[2])
+    p[0] = at(p[1].line, Node("RoutineHeading", p[1], p[2]))
     
 def p_RoutineParameters(p):
     """
@@ -221,16 +293,16 @@ def p_RoutineParameters(p):
     """
     if len(p) == 1:   p[0] = Node("RoutineParameters")
     elif len(p) == 3: p[0] = Node("RoutineParameters")
-    else:             p[0] = Node("RoutineParameters", p[2])
+    else:             p[0] = Node("RoutineParameters", Node("ManyParameterTuples", *p[2]))
 
 def p_ManyParameterTuples(p):
     """
     ManyParameterTuples : ParameterTuple 
                         | ManyParameterTuples SEMICOLON ParameterTuple
     """
-    if len(p) == 2: p[0] = Node("ManyParameterTuples", p[1])
+    if len(p) == 2: p[0] = [p[1]]
     else:
-        p[1].add_child(p[3])
+        p[1].append(p[3])
         p[0] = p[1]
 
 def p_ParameterTuple(p):
@@ -241,11 +313,11 @@ def p_ParameterTuple(p):
     declarations = p[1]
     return_type = p[2].args[0]
 
-    for declaration in declarations.args:
+    for declaration in declarations:
         declaration_name = declaration.args[0]
-        declared_dict[declaration_name] = return_type
+        p.parser.declared_dict[declaration_name] = return_type
 
-    p[0] = Node("ParameterTuple", p[1], p[2])
+    p[0] = Node("ParameterTuple", Node("ManyDeclaredNames", *p[1]), p[2])
 
 def p_ManyDeclaredNames(p):
     """
@@ -253,9 +325,9 @@ def p_ManyDeclaredNames(p):
                       | ManyDeclaredNames COMMA DeclaredName 
     """
     if len(p) == 2:
-        p[0] = Node('ManyDeclaredNames', p[1])
+        p[0] = [p[1]]
     else:
-        p[1].add_child(p[3])
+        p[1].append(p[3])
         p[0] = p[1]
 
 def p_ReturnType(p):
@@ -314,16 +386,16 @@ def p_ManyExpressions(p):
     ManyExpressions : Expression
                     | ManyExpressions COMMA Expression
     """
-    if len(p)==2 : p[0] = Node("ManyExpressions", p[1])
+    if len(p)==2 : p[0] = [p[1]]
     else:
-        p[1].add_child(p[3])
+        p[1].append(p[3])
         p[0] = p[1]
 
 def p_Expression(p):
     """
     Expression : OrExpression
     """
-    p[0] = Node("Expression", p[1])
+    p[0] = p[1] # sem nó Expression: não acrescenta informação
 
 def p_OrExpression(p):
     """
@@ -331,7 +403,7 @@ def p_OrExpression(p):
                  | OrExpression OR AndExpression 
     """
     if len(p)==2: p[0] = p[1]
-    else:         p[0] = Node("OrExpression", p[1], p[3])
+    else:         p[0] = at(p[1].line, Node("OrExpression", p[1], p[3]))
 
 def p_AndExpression(p):
     """
@@ -339,7 +411,7 @@ def p_AndExpression(p):
                   | AndExpression AND RelExpression 
     """
     if len(p)==2: p[0] = p[1]
-    else:         p[0] = Node("AndExpression", p[1], p[3])
+    else:         p[0] = at(p[1].line, Node("AndExpression", p[1], p[3]))
 
 def p_RelExpression(p):
     """
@@ -347,7 +419,7 @@ def p_RelExpression(p):
                   | RelExpression RelOperator AddExpression 
     """
     if len(p)==2: p[0] = p[1]
-    else:         p[0] = Node("RelExpression", p[1], p[2], p[3])
+    else:         p[0] = at(p[1].line, Node("RelExpression", p[1], p[2], p[3]))
 
 def p_AddExpression(p):
     """
@@ -355,7 +427,7 @@ def p_AddExpression(p):
                   | AddExpression AddOperator MultExpression 
     """
     if len(p)==2: p[0] = p[1]
-    else:         p[0] = Node("AddExpression", p[1], p[2], p[3])
+    else:         p[0] = at(p[1].line, Node("AddExpression", p[1], p[2], p[3]))
 
 def p_MultExpression(p):
     """
@@ -363,7 +435,7 @@ def p_MultExpression(p):
                    | MultExpression MultOperator UnaryExpression 
     """
     if len(p)==2: p[0] = p[1]
-    else:         p[0] = Node("MultExpression", p[1], p[2], p[3])
+    else:         p[0] = at(p[1].line, Node("MultExpression", p[1], p[2], p[3]))
 
 def p_UnaryExpression(p):
     """
@@ -371,7 +443,7 @@ def p_UnaryExpression(p):
                     | PrimaryExpression
     """
     if len(p)==2: p[0] = p[1]
-    else:         p[0] = Node("UnaryExpression", p[1], p[2])
+    else:         p[0] = at(p[2].line, Node("UnaryExpression", p[1], p[2]))
 
 def p_PrimaryExpression(p):
     """
@@ -381,8 +453,7 @@ def p_PrimaryExpression(p):
                       | ArrayAccess
                       | DeclaredName
     """
-    if len(p)==2: p[0] = p[1]
-    else:         p[0] = Node("PrimaryExpression", p[2])
+    p[0] = p[1] if len(p) == 2 else p[2] # os parênteses só contam para o parsing
 
 def p_LiteralValue(p):
     """
@@ -393,25 +464,25 @@ def p_LiteralValue(p):
                  | TRUE
                  | FALSE  
     """
-    p[0] = Node("LiteralValue", p.slice[1].type, p[1])
+    p[0] = at(p.lineno(1), Node("LiteralValue", p.slice[1].type, p[1]))
 
 def p_ArrayAccess(p):
     """
     ArrayAccess : DeclaredName LSPAREN RSPAREN
                 | DeclaredName LSPAREN Expression RSPAREN
     """
-    if len(p)==4 : p[0] = Node("ArrayAccess", p[1])
-    else:          p[0] = Node("ArrayAccess", p[1], p[3])
+    if len(p)==4 : p[0] = at(p[1].line, Node("ArrayAccess", p[1]))
+    else:          p[0] = at(p[1].line, Node("ArrayAccess", p[1], p[3]))
 
 def p_DeclaredName(p):
     """
     DeclaredName : IDENTIFIER
     """
     declared_type = "Unknown"
-    if p[1] in declared_dict:
-        declared_type = declared_dict[p[1]]
+    if p[1] in p.parser.declared_dict:
+        declared_type = p.parser.declared_dict[p[1]]
 
-    p[0] = Node("DeclaredName", p[1], declared_type)
+    p[0] = at(p.lineno(1), Node("DeclaredName", p[1], declared_type))
 
 ########################################################################
 # 4.1. OPERATORS
@@ -459,84 +530,165 @@ def p_RoutineCall(p):
     RoutineCall : DeclaredName LPAREN RPAREN
                 | DeclaredName LPAREN ManyExpressions RPAREN
     """
-    if len(p)==4 : p[0] = Node("RoutineCall", p[1])
-    else:          p[0] = Node("RoutineCall", p[1], p[3])
+    if len(p)==4 : p[0] = at(p[1].line, Node("RoutineCall", p[1]))
+    else:          p[0] = at(p[1].line, Node("RoutineCall", p[1], Node("ManyExpressions", *p[3])))
+
+
+
+
+
+
+
+
+
+########################################################################
+# 5. ERROR RECOVERY
+# A syntax error does not stop the parser: syntax_error records it and
+# PLY discards parser states until one where the `error` token fits one
+# of the rules below, then skips tokens until one that can follow it
+# (usually the `;` of the broken statement or declaration). The errors
+# are raised together at the end of the parse (raise_syntax_errors), so
+# one compile reports the errors of every statement. PLY only reports
+# the next error after 3 tokens have been parsed correctly.
+########################################################################
+
+def p_StatementError(p):
+    """
+    NoTailStatement : error
+    """
+    p[0] = None # o programa não chega a ser compilado
+
+def p_DeclarationError(p):
+    """
+    Declaration : VAR error SEMICOLON
+                | CONST error SEMICOLON
+    """
+    p[0] = None
 
+MAX_SYNTAX_ERRORS = 100 # a partir daqui o resto do ficheiro é provavelmente lixo
 
+def syntax_error(instance, p):
+    if instance.partial_tree is None:
+        # partial syntax tree up to the (first) error
+        # (a pilha do PLY tem YaccSymbols; os nós estão em .value)
+        partial_nodes = [sym.value for sym in getattr(instance, 'symstack', []) if isinstance(getattr(sym, 'value', None), Node)]
+        if partial_nodes:
+            instance.partial_tree = partial_nodes[-1]
 
+    if not p:
+        instance.diagnostics.append(Diagnostic("syntax", "Syntax error: Unexpected end of input."))
+        return
 
+    ###########################################################
+    # Get expected tokens from the current parser state
+    state = instance.state
+    expected_tokens = []
+    for tok_type in instance.action[state].keys():
+        if tok_type not in ('error', '$end'):
+            expected_tokens.append(tok_type)
 
+    # Remove duplicates and sort for readability
+    expected_unique = sorted(list(set(expected_tokens)))
+    expected_str = ", ".join(expected_unique)
+    ############################################################
 
+    # linha e coluna do erro pelo índice de linhas do SourceMap
+    source = instance.source
+    line = source.line(p.lexpos)
+    caret_line = ' ' * source.column(p.lexpos) + '^'
 
+    instance.diagnostics.append(Diagnostic(
+        "syntax",
+        f"Syntax error: Unexpected '{p.value}' (type {p.type}). Expected: {expected_str}\n"
+        f"    {source.line_text(line)}\n"
+        f"    {caret_line}",
+        line,
+    ))
+    if len(instance.diagnostics) >= MAX_SYNTAX_ERRORS:
+        raise_syntax_errors(instance)
+
+
+def raise_syntax_errors(instance):
+    """Raises the syntax errors of the last parse, if any, as one ParseError."""
+    if not instance.diagnostics:
+        return
+    error = ParseError(None, diagnostics=instance.diagnostics)
+    error.partial_tree = instance.root if instance.root is not None else instance.partial_tree
+    raise error
 
 
 def p_error(p):
-    global rootNode
-    if p:
-        ###########################################################
-        # Get expected tokens from the current parser state
-        state = parser.state
-        expected_tokens = []
-        for tok_type in parser.action[state].keys():
-            if tok_type not in ('error', '$end'):
-                expected_tokens.append(tok_type)
-        
-        # Remove duplicates and sort for readability
-        expected_unique = sorted(list(set(expected_tokens)))
-        expected_str = ", ".join(expected_unique)
-        ############################################################
-        
-        # Get the line where the error occurred
-        lines = filecontent.split('\n')
-        error_line = lines[p.lineno - 1]
-        
-        # Calculate the position of the error in the line
-        if p.lineno > 1:
-            # Sum the lengths of previous lines plus newline characters
-            pos_in_line = p.lexpos - sum(len(lines[i]) + 1 for i in range(p.lineno - 1))
-        else:
-            pos_in_line = p.lexpos
-        
-        # Create the caret line
-        caret_line = ' ' * pos_in_line + '^'
-        
-        print(f"\n[Ln {p.lineno}] Syntax error: Unexpected '{p.value}' (type {p.type}). Expected: {expected_str}")
-        print(f"    {error_line}")
-        print(f"    {caret_line}")
-
-
-        # Existing code for partial syntax tree
-        if rootNode is not None:
-            print("Partial syntax tree up to the error:")
-            print(rootNode)
-        else:
-            if hasattr(parser, 'symstack'):
-                partial_nodes = [sym for sym in parser.symstack if isinstance(sym, Node)]
-                if partial_nodes:
-                    print("Partial syntax tree up to the error:")
-                    print(partial_nodes[-1])
-                else:
-                    print("No partial tree available (parsing didn't start)")
-            else:
-                print("Parser stack not available")
-        exit(1)
-    else:
-        print("Syntax error: Unexpected end of input.")
-        exit(1)
+    syntax_error(parser, p)
+
+########################################################################
+# PARSER TABLES
+# Generating the LALR automaton is the most expensive part of starting
+# the compiler, so the tables are pickled into the cache directory.
+# The file name carries a hash of every grammar docstring (plus the token
+# list), so any change to the grammar picks a new file and the tables are
+# rebuilt on the next start. PLY also checks its own signature on load.
+# The tables are built with debug=False: PLY's parser.out dump of the
+# automaton is not written (nor kept in the repository).
+########################################################################
 
-parser = yacc.yacc(debug=True, write_tables=0)
+def grammar_hash() -> str:
+    module = sys.modules[__name__]
+    rules = [
+        f"{name}:{getattr(module, name).__doc__}"
+        for name in sorted(dir(module))
+        if name.startswith("p_") and name != "p_error"
+    ]
+    return digest(yacc.__tabversion__, " ".join(tokens), *rules)[:16]
+
+
+def table_cache_path() -> str:
+    return os.path.join(cache_dir("tables"), f"parsetab-{grammar_hash()}.pickle")
+
+
+def build_parser(use_cache=True):
+    module = sys.modules[__name__]
+    if not use_cache:
+        return yacc.yacc(module=module, debug=False, write_tables=0)
+
+    path = table_cache_path()
+    if os.path.exists(path):
+        try:
+            return yacc.yacc(module=module, debug=False, picklefile=path)
+        except (EOFError, pickle.UnpicklingError):
+            pass # ficheiro corrompido/incompleto: gerar de novo
+
+    # escreve num ficheiro temporário e só depois o move para o lugar final,
+    # para que processos em paralelo nunca leiam tabelas a meio de escrever
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    new_parser = yacc.yacc(module=module, debug=False, picklefile=tmp_path)
+    os.replace(tmp_path, path)
+    return new_parser
 
-if __name__ == "__main__":
-    import sys
 
+parser = build_parser()
+reset_state(parser)
+
+
+def new_parser():
+    """
+    A parser with its own state, sharing the (read-only) tables of the
+    module-level parser. Safe to use alongside other instances.
+    """
+    instance = copy.copy(parser)
+    instance.errorfunc = functools.partial(syntax_error, instance)
+    reset_state(instance)
+    return instance
+
+
+if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Argumentos insuficientes")
         exit(1)
-        
-    filecontent = ""
 
     with open(sys.argv[1], encoding='utf-8') as input_file:
         filecontent = input_file.read()
+        reset_state(parser, filecontent)
         result = parser.parse(filecontent)
+        raise_syntax_errors(parser)
         print(" _")
-        print(rootNode)
\ No newline at end of file
+        print(parser.root)
\ No newline at end of file
@@ -0,0 +1,236 @@
+from ir import Code, Op, NAMES, format_instr
+
+########################################################################
+# PEEPHOLE OPTIMIZER
+# Runs over the code collected by a CodeEmitter, between generation and
+# dump(). The IR instructions (ir.py) are decoded into Instr objects and a
+# sliding window over the last instructions produced is matched against
+# the rules below every time a new instruction is appended, so rewrites
+# can cascade (the result of one rule can feed the next one).
+#
+#   STOREL n ; PUSHL n        -> DUP 1 ; STOREL n   (same for STOREG/PUSHG)
+#   PUSHI 0 ; ADD|SUB         -> (nothing)
+#   PUSHI 1 ; MUL|DIV         -> (nothing)
+#   PUSHI a ; PUSHI b ; op    -> PUSHI (a op b)
+#   PUSH... ; POP 1           -> (nothing)
+#   JUMP L ; L:               -> L:
+#   JZ L ; L:                 -> POP 1 ; L:
+#   JUMP|RETURN|STOP ; ...    -> unreachable code up to the next label is dropped
+#   JUMP L ... L: JUMP M      -> JUMP M             (jump threading)
+#
+# Comments are kept, but never take part in a window.
+########################################################################
+
+class Instr:
+    __slots__ = ("op", "arg", "line")
+
+    LABEL = Op.LABEL
+    COMMENT = Op.COMMENT
+
+    def __init__(self, op, arg=None, line=0):
+        self.op = op
+        self.arg = arg
+        self.line = line
+
+    def is_real(self):
+        return self.op != Instr.COMMENT
+
+    def __str__(self):
+        return format_instr(self.op, self.arg)
+
+    def __repr__(self):
+        return f"Instr({NAMES[self.op]}, {self.arg!r})"
+
+
+def decode(code: Code) -> list[Instr]:
+    return [Instr(op, arg, line) for op, arg, line in code]
+
+
+def encode(instrs: list[Instr]) -> Code:
+    code = Code()
+    for instr in instrs:
+        code.set_line(instr.line)
+        code.append(instr.op, instr.arg)
+    return code
+
+
+########################################################################
+# RULES
+# Each rule receives the last `size` real instructions and returns the
+# instructions that replace them, or None if it does not apply.
+########################################################################
+
+def _int_div(a, b):
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+FOLDABLE = {
+    Op.ADD:   lambda a, b: a + b,
+    Op.SUB:   lambda a, b: a - b,
+    Op.MUL:   lambda a, b: a * b,
+    Op.DIV:   lambda a, b: _int_div(a, b) if b != 0 else None,
+    Op.MOD:   lambda a, b: a - b * _int_div(a, b) if b != 0 else None,
+    Op.EQUAL: lambda a, b: int(a == b),
+    Op.INF:   lambda a, b: int(a < b),
+    Op.INFEQ: lambda a, b: int(a <= b),
+    Op.SUP:   lambda a, b: int(a > b),
+    Op.SUPEQ: lambda a, b: int(a >= b),
+}
+
+PUSHES = (Op.PUSHI, Op.PUSHL, Op.PUSHG, Op.PUSHS, Op.PUSHFP, Op.PUSHGP, Op.PUSHSP)
+
+
+def rule_store_load(w):
+    store, load = w
+    if (store.op, load.op) in ((Op.STOREL, Op.PUSHL), (Op.STOREG, Op.PUSHG)) and store.arg == load.arg:
+        return [Instr(Op.DUP, 1), store]
+
+def rule_identity(w):
+    push, op = w
+    if push.op == Op.PUSHI:
+        if push.arg == 0 and op.op in (Op.ADD, Op.SUB):
+            return []
+        if push.arg == 1 and op.op in (Op.MUL, Op.DIV):
+            return []
+
+def rule_push_pop(w):
+    push, pop = w
+    if (push.op in PUSHES or (push.op == Op.DUP and push.arg == 1)) and pop.op == Op.POP and pop.arg == 1:
+        return []
+
+def rule_fold(w):
+    a, b, op = w
+    if a.op == Op.PUSHI and b.op == Op.PUSHI and op.op in FOLDABLE:
+        value = FOLDABLE[op.op](a.arg, b.arg)
+        if value is not None:
+            return [Instr(Op.PUSHI, value)]
+
+RULES = (
+    (2, rule_store_load),
+    (2, rule_identity),
+    (2, rule_push_pop),
+    (3, rule_fold),
+)
+
+
+class PeepholeOptimizer:
+    def __init__(self):
+        self.out: list[Instr] = []
+        self.dead = False   # depois de JUMP/RETURN/STOP até à próxima label
+        self.rewrites = 0   # regras aplicadas
+
+    def _window(self, size):
+        """Positions (in self.out) of the last `size` real instructions."""
+        positions = []
+        pos = len(self.out) - 1
+        while pos >= 0 and len(positions) < size:
+            if self.out[pos].is_real():
+                positions.append(pos)
+            pos -= 1
+        if len(positions) < size:
+            return None
+        positions.reverse()
+        return positions
+
+    def _replace(self, positions, replacement):
+        # os comentários entre as instruções substituídas mantêm-se, por ordem
+        first = positions[0]
+        kept = [instr for instr in self.out[first:] if not instr.is_real()]
+        del self.out[first:]
+        self.out.extend(kept)
+        self.out.extend(replacement)
+        self.rewrites += 1
+
+    def _apply_rules(self):
+        changed = True
+        while changed:
+            changed = False
+            for size, rule in RULES:
+                positions = self._window(size)
+                if positions is None:
+                    continue
+                replacement = rule([self.out[pos] for pos in positions])
+                if replacement is not None:
+                    self._replace(positions, replacement)
+                    changed = True
+                    break
+
+    def _append_label(self, instr):
+        # JUMP L ; L:  ->  L:        JZ L ; L:  ->  POP 1 ; L:
+        positions = self._window(1)
+        if positions is not None:
+            last = self.out[positions[0]]
+            if last.op == Op.JUMP and last.arg == instr.arg:
+                self._replace(positions, [])
+                self._apply_rules()
+            elif last.op == Op.JZ and last.arg == instr.arg:
+                self._replace(positions, [Instr(Op.POP, 1)])
+                self._apply_rules()
+        self.out.append(instr)
+        self.dead = False
+
+    def feed(self, instr: Instr):
+        if not instr.is_real():
+            if not self.dead:
+                self.out.append(instr)
+            return
+
+        if instr.op == Instr.LABEL:
+            self._append_label(instr)
+            return
+
+        if self.dead:
+            return
+
+        self.out.append(instr)
+        self._apply_rules()
+        if instr.op in (Op.JUMP, Op.RETURN, Op.STOP):
+            self.dead = True
+
+
+def thread_jumps(instrs: list[Instr]) -> int:
+    """JUMP/JZ to a label whose first instruction is `JUMP M` go straight to M."""
+    first_after = {}
+    pending = []
+    for instr in instrs:
+        if instr.op == Instr.LABEL:
+            pending.append(instr.arg)
+        elif instr.is_real():
+            for label in pending:
+                first_after[label] = instr
+            pending = []
+
+    threaded = 0
+    for instr in instrs:
+        if instr.op in (Op.JUMP, Op.JZ):
+            seen = {instr.arg}
+            target = first_after.get(instr.arg)
+            while target is not None and target.op == Op.JUMP and target.arg not in seen:
+                seen.add(target.arg)
+                instr.arg = target.arg
+                target = first_after.get(target.arg)
+                threaded += 1
+    return threaded
+
+
+def optimize(code: Code):
+    """
+    Returns the optimized code and a dict of statistics
+    ({"removed": ..., "rewrites": ...}).
+    """
+    instrs = decode(code)
+    before = sum(1 for instr in instrs if instr.is_real() and instr.op != Instr.LABEL)
+    threaded = thread_jumps(instrs)
+
+    opt = PeepholeOptimizer()
+    for instr in instrs:
+        opt.feed(instr)
+
+    after = sum(1 for instr in opt.out if instr.is_real() and instr.op != Instr.LABEL)
+    stats = {
+        "before": before,
+        "after": after,
+        "removed": before - after,
+        "rewrites": opt.rewrites + threaded,
+    }
+    return encode(opt.out), stats
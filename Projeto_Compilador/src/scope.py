@@ -1,28 +1,112 @@
+from errors import SemanticError
+
+########################################################################
+# SYMBOL TABLE
+# Every name maps to a stack of bindings (Symbols), innermost last, so
+# finding what a name refers to is one dict lookup however many scopes
+# are open. Each scope remembers the names it declared, to unbind them
+# when it is popped.
+#
+# A Symbol records:
+#  - kind:  'var' | 'param' | 'const' | 'function'
+#  - type:  canonical type name ('Integer', 'String', 'Array<Integer>',
+#           ...; the return type for functions)
+#  - depth: scope depth where it was declared (0 = global)
+#  - slot:  stack slot of variables/parameters (None otherwise)
+#  - value: expression of a constant / parameter types of a function
+########################################################################
+
+def type_name(type_node) -> str:
+  """Canonical name of a SimpleType/ArrayType node ('integer' -> 'Integer')."""
+  if type_node.label == 'ArrayType':
+    return f"Array<{type_name(type_node.args[1])}>"
+  return type_node.args[0].capitalize()
+
+
+class Symbol:
+  __slots__ = ('name', 'kind', 'type', 'depth', 'slot', 'value')
+
+  def __init__(self, name, kind, type=None, depth=0, slot=None, value=None):
+    self.name = name
+    self.kind = kind
+    self.type = type
+    self.depth = depth
+    self.slot = slot
+    self.value = value
+
+  def __repr__(self):
+    return f"Symbol({self.name!r}, {self.kind}, {self.type}, depth={self.depth}, slot={self.slot})"
+
+
 class Scope:
   def __init__(self):
+      self.bindings: dict[str, list[Symbol]] = dict()
       self.scopes = list()
-      self.scopes.append({'label': 'global', 'next_index': 0, 'vars': dict()})
-  
+      self.scopes.append({'label': 'global', 'next_index': 0, 'names': list()})
+
   def push(self):
-      self.scopes.append({'label': 'local', 'next_index': 0, 'vars': dict()})
-  
+      self.scopes.append({'label': 'local', 'next_index': 0, 'names': list()})
+
   def pop(self):
     if len(self.scopes) == 1:
       raise Exception("Já no escopo global; não há escopo para sair.")
-    self.scopes.pop()
+    for name in self.scopes.pop()['names']:
+      stack = self.bindings[name]
+      stack.pop()
+      if not stack:
+        del self.bindings[name]
 
-  def declare(self, name):
+  @property
+  def depth(self):
+    return len(self.scopes) - 1
+
+  def _bind(self, symbol):
+    self.bindings.setdefault(symbol.name, []).append(symbol)
+    self.scopes[-1]['names'].append(symbol.name)
+    return symbol
+
+  def _declared_here(self, name, kinds):
+    stack = self.bindings.get(name)
+    return bool(stack) and stack[-1].depth == self.depth and stack[-1].kind in kinds
+
+  def resolve(self, name) -> Symbol | None:
+    """The innermost binding of `name`, or None."""
+    stack = self.bindings.get(name)
+    return stack[-1] if stack else None
+
+  def declare(self, name, type=None, kind='var'):
+    if self._declared_here(name, ('var', 'param', 'const')):
+      raise SemanticError(f"Variable '{name}' already declared in current scope.")
     current_scope = self.scopes[-1]
-    if name in current_scope['vars']:
-      raise Exception(f"Variable '{name}' already declared in current scope.")
     idx = current_scope['next_index']
-    current_scope['vars'][name] = idx
     current_scope['next_index'] += 1
+    self._bind(Symbol(name, kind, type, self.depth, idx))
     return idx
-  
+
   def lookup(self, name) -> int | None:
-    for scope in reversed(self.scopes):
-      if name in scope['vars']:
-        return scope['vars'][name]
+    symbol = self.resolve(name)
+    if symbol is not None and symbol.kind in ('var', 'param'):
+      return symbol.slot
+    return None
+
+  # constantes não ocupam slot: guardam a expressão do seu valor
+  def declare_const(self, name, value_node, type=None):
+    if self._declared_here(name, ('var', 'param', 'const')):
+      raise SemanticError(f"Constant '{name}' already declared in current scope.")
+    self._bind(Symbol(name, 'const', type, self.depth, value=value_node))
+
+  def lookup_const(self, name):
+    symbol = self.resolve(name)
+    if symbol is not None and symbol.kind == 'const':
+      return symbol.value
+    return None # (uma variável local esconde a constante)
+
+  # funções: type é o tipo de retorno, value a lista dos tipos dos parâmetros
+  def declare_function(self, name, return_type, param_types):
+    return self._bind(Symbol(name, 'function', return_type, self.depth, value=param_types))
+
+  def lookup_function(self, name) -> Symbol | None:
+    symbol = self.resolve(name)
+    if symbol is not None and symbol.kind == 'function':
+      return symbol
     return None
-    
@@ -1,61 +1,147 @@
+import io
+
+########################################################################
+# AST NODES
+# Every kind of node (label) gets its own Node subclass, created the
+# first time the label is used: `Node("Assignment", target, value)`
+# returns an instance of the Assignment kind. The label lives on the
+# class and the children in a tuple, so a node is one small __slots__
+# object with no per-instance __dict__.
+#
+# Children are immutable; passes that rewrite the tree replace them with
+# set_child() (or by assigning a new tuple to .args).
+#
+# Expression nodes also get a `type` ('Integer', 'String', ...), filled
+# in by the TypeChecker (typecheck.py); it is None until then.
+# Statements, names, literals and operations carry the source `line`
+# they start on (set by the parser; None for nodes made by later passes).
+#
+# The parser does not build pass-through wrappers (Expression,
+# PrimaryExpression, Statement, NoTailStatement); code that may also see
+# trees with them goes through unwrap().
+########################################################################
+
+WRAPPERS = ("Expression", "PrimaryExpression", "Statement", "NoTailStatement")
+
+# Locals added by the compiler itself (for limits, hoisted expressions,
+# results of inlined calls) are named `#lim0`, `#inv0`, ...: `#` is not
+# accepted in identifiers by the lexer, so no program can declare them.
+HIDDEN_MARK = "#"
+
+def hidden_name(kind, number) -> str:
+    return f"{HIDDEN_MARK}{kind}{number}"
+
+_kinds = {}
+
+def node_kind(label):
+    """The Node subclass for a label."""
+    kind = _kinds.get(label)
+    if kind is None:
+        kind = type(label, (Node,), {"__slots__": (), "label": label})
+        _kinds[label] = kind
+    return kind
+
+
+def unwrap(node):
+    while isinstance(node, Node) and node.label in WRAPPERS:
+        node = node.args[0]
+    return node
+
 
 class Node:
+    __slots__ = ("args", "type", "line")
+    label = None
+
+    def __new__(cls, label, *args):
+        if cls is Node:
+            cls = node_kind(label)
+        return object.__new__(cls)
+
     def __init__(self, label, *args):
-        self.label = label
-        self.args: list[Node] = list(args)
-    
+        self.args: tuple = args
+        self.type: str | None = None
+        self.line: int | None = None
+
+    def __reduce__(self):
+        # as classes de cada tipo são criadas em runtime: pickle/copy passam pelo Node(label, ...);
+        # o tipo (do TypeChecker) e a linha voltam por __setstate__
+        return (Node, (self.label, *self.args), (self.type, self.line))
+
+    def __setstate__(self, state):
+        self.type, self.line = state
+
+    def __repr__(self):
+        return f"<{self.label}>"
+
     def add_child(self, node):
-        self.args.append(node)
+        self.args += (node,)
 
-    def _strOG(self, prefix="", is_last=True):
-        # Define o conector visual de acordo com se é o último filho ou não
-        connector = "└── " if is_last else "├── "
+    def set_child(self, idx, node):
+        args = list(self.args)
+        args[idx] = node
+        self.args = tuple(args)
 
-        result = prefix + connector + str(self.label) + "\n"
+    def __str__(self):
+        out = io.StringIO()
+        write_tree(self, out)
+        return out.getvalue()
 
-        # Atualiza o prefixo para os filhos; se é o último, não imprime a linha vertical
-        new_prefix = prefix + ("    " if is_last else "│   ")
 
-        child_count = len(self.args)
-        for idx, arg in enumerate(self.args):
-            is_child_last = (idx == (child_count - 1))
+########################################################################
+# TREE PRINTER
+# Writes a tree to a text stream without recursion (an explicit stack
+# of pending nodes), in chunks of CHUNK_LINES lines, so the dump of a
+# big or deeply nested tree neither rebuilds strings nor hits the
+# recursion limit.
+#  - color:     ANSI colors (rules in blue italic, tokens in green)
+#  - max_depth: children of nodes at this depth are summarized
+#  - max_nodes: stop after printing this many nodes
+########################################################################
 
-            if isinstance(arg, Node):
-                result += arg._str(new_prefix, is_child_last)
-            else:
-                result += new_prefix + ("└── " if is_child_last else "├── ") + str(arg) + "\n"
-
-        return result
-    
-    def _str(self, prefix="", is_last=True):
-        RULE_COLOR  = '\033[3m\033[94m' # Italic + Blue
-        TOKEN_COLOR = '\033[92m'        # Green
-        RESET_COLOR = '\033[0m'
-        
-        rule = lambda str: f"{RULE_COLOR}{str}{RESET_COLOR}"
-        tok = lambda str: f"{TOKEN_COLOR}{str}{RESET_COLOR}"
-
-        # Define o conector visual de acordo com se é o último filho ou não
+RULE_COLOR  = '\033[3m\033[94m' # Italic + Blue
+TOKEN_COLOR = '\033[92m'        # Green
+RESET_COLOR = '\033[0m'
+
+CHUNK_LINES = 512
+
+def write_tree(root, out, color=True, max_depth=None, max_nodes=None):
+    """Writes `root` to `out`; returns the number of nodes written."""
+    lines = []
+    written = 0
+    # (nó ou valor, prefixo, é o último filho, profundidade)
+    stack = [(root, "", True, 0)]
+
+    while stack:
+        item, prefix, is_last, depth = stack.pop()
+        # conector visual de acordo com se é o último filho ou não
         connector = " └──" if is_last else " ├──"
-        colored_label = tok(self.label) if self.label.isupper() else rule(self.label)
-        
-        result = f"{prefix}{connector}<{colored_label}>\n"
-
-        # Atualiza o prefixo para os filhos; se é o último, não imprime a linha vertical
-        new_prefix = prefix + ("     " if is_last else " │   ")
-
-        child_count = len(self.args)
-        for idx, arg in enumerate(self.args):
-            is_child_last = (idx == (child_count - 1))
-            
-            if isinstance(arg, Node):
-                result += arg._str(new_prefix, is_child_last)
+
+        if not isinstance(item, Node):
+            lines.append(f'{prefix}{connector}"{item}"\n')
+        else:
+            if max_nodes is not None and written >= max_nodes:
+                lines.append(f"{prefix}{connector}… (limite de {max_nodes} nós)\n")
+                break
+            written += 1
+
+            label = item.label
+            if color:
+                label = f"{TOKEN_COLOR if label.isupper() else RULE_COLOR}{label}{RESET_COLOR}"
+            lines.append(f"{prefix}{connector}<{label}>\n")
+
+            # prefixo dos filhos; se é o último, não imprime a linha vertical
+            child_prefix = prefix + ("     " if is_last else " │   ")
+            children = item.args
+            if children and max_depth is not None and depth >= max_depth:
+                lines.append(f"{child_prefix} └──… ({len(children)} filhos)\n")
             else:
-                value = str(arg)
-                child_connector = " └──" if is_child_last else " ├──"
-                result += f"{new_prefix}{child_connector}\"{value}\"\n"
+                last = len(children) - 1
+                for idx in range(last, -1, -1):
+                    stack.append((children[idx], child_prefix, idx == last, depth + 1))
 
-        return result
+        if len(lines) >= CHUNK_LINES:
+            out.write("".join(lines))
+            lines.clear()
 
-    def __str__(self):
-        return self._str()
+    out.write("".join(lines))
+    return written
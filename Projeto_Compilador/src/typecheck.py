@@ -0,0 +1,319 @@
+from types import GeneratorType
+
+from tree import Node, WRAPPERS
+from scope import Scope, type_name
+from errors import SemanticError, Diagnostic
+
+########################################################################
+# SEMANTIC ANALYSIS
+# TypeChecker walks the whole program once, before code generation,
+# resolving every name with the same scope rules as CodeGenerator, and
+# annotates each expression node with its type (`node.type`: 'Integer',
+# 'String', 'Boolean', 'Char', 'Array<Integer>', ...). The generator
+# reads those annotations instead of inferring types again.
+#
+# Type errors don't stop the walk: all of them are collected and raised
+# together in a single SemanticError at the end. An expression whose
+# type could not be determined gets no annotation (None), and checks
+# that depend on it are skipped, so one mistake is reported only once.
+#
+# Like the generator's visitors, visit_<label> methods don't recurse:
+# they yield a child and receive its type back (`t = yield node.args[0]`),
+# and check() drives them from an explicit stack, so deep trees are fine.
+########################################################################
+
+BUILTIN_PROCEDURES = ("write", "writeln", "readln")
+
+LITERAL_TYPES = {
+    "INTVALUE": "Integer", "REALVALUE": "Real", "STRINGVALUE": "String",
+    "CHARVALUE": "Char", "TRUE": "Boolean", "FALSE": "Boolean",
+}
+
+
+def compatible(expected, actual) -> bool:
+    # um Char é empilhado como o seu código ASCII, tal como s[i]
+    return expected == actual or {expected, actual} <= {"Integer", "Char"}
+
+
+_visitor_tables = {}
+
+def visitor_table(cls):
+    """label -> visit_<label> function of a checker class (computed once per class)."""
+    table = _visitor_tables.get(cls)
+    if table is None:
+        table = {name[len("visit_"):]: getattr(cls, name) for name in dir(cls) if name.startswith("visit_")}
+        _visitor_tables[cls] = table
+    return table
+
+
+class TypeChecker:
+    def __init__(self):
+        self.scope = Scope()
+        self.diagnostics = []
+        self.typed = 0
+        self.visitors = {label: function.__get__(self) for label, function in visitor_table(type(self)).items()}
+
+    def run(self, ast):
+        self.check(ast)
+        if self.diagnostics:
+            raise SemanticError(None, diagnostics=self.diagnostics)
+        return {"typed": self.typed}
+
+    def error(self, message, node=None):
+        """Records an error; `node` gives its source line."""
+        self.diagnostics.append(Diagnostic("semantic", message, node.line if node is not None else None))
+
+    def check(self, root):
+        """Visits `root`; returns its type (None for statements)."""
+        visitors = self.visitors
+        visit_children = self.visit_children
+        result = visitors.get(root.label, visit_children)(root)
+        if type(result) is not GeneratorType:
+            return self.annotate(root, result)
+
+        # pilha de (nó, visitor suspenso à espera do tipo de um filho)
+        stack = [(root, result)]
+        value = None
+        while stack:
+            node, visitor = stack[-1]
+            try:
+                child = visitor.send(value)
+            except StopIteration as done:
+                stack.pop()
+                value = self.annotate(node, done.value)
+                continue
+            result = visitors.get(child.label, visit_children)(child)
+            if type(result) is GeneratorType:
+                stack.append((child, result))
+                value = None
+            else:
+                value = self.annotate(child, result)
+        return value
+
+    def annotate(self, node, node_type):
+        if node_type is not None:
+            node.type = node_type
+            self.typed += 1
+        return node_type
+
+    def visit_children(self, node):
+        # nós sem regras próprias (blocos, wrappers, ...): visita os filhos
+        child_type = None
+        for child in node.args:
+            if isinstance(child, Node):
+                child_type = yield child
+        return child_type if node.label in WRAPPERS else None
+
+    def declare(self, declare, *args, **kwargs):
+        try:
+            declare(*args, **kwargs)
+        except SemanticError as e:
+            self.diagnostics.extend(e.diagnostics)
+
+    ####################################################################
+    # DECLARATIONS
+
+    def visit_Program(self, node):
+        yield node.args[1]
+
+    def visit_ProgramDeclaration(self, node):
+        program_scope = node.args[1]
+        if program_scope.args and program_scope.args[0].label == "ManyDeclarations":
+            decls = program_scope.args[0].args
+            # mesma ordem do gerador: funções e constantes antes das variáveis do main
+            for decl in decls:
+                if decl.label in ("FunctionDeclaration", "ConstDeclaration"):
+                    yield decl
+            for decl in decls:
+                if decl.label == "VarDeclaration":
+                    yield decl
+        yield program_scope.args[-1]
+
+    def visit_VarDeclaration(self, node):
+        for param_tuple in node.args[0].args:
+            var_type_node = param_tuple.args[1].args[0]
+            if var_type_node.label == "ArrayType":
+                yield var_type_node.args[0]
+            for declared in param_tuple.args[0].args:
+                self.declare(self.scope.declare, declared.args[0], type_name(var_type_node))
+
+    def visit_ValueRange(self, node):
+        for bound in node.args:
+            bound_type = yield bound
+            if bound_type is not None and not compatible("Integer", bound_type):
+                self.error(f"Limite de array deve ser Integer, mas recebeu {bound_type}.", bound.args[0])
+
+    def visit_ConstantValue(self, node):
+        return (yield node.args[0])
+
+    def visit_ConstDeclaration(self, node):
+        for const_def in node.args:
+            value_type = yield const_def.args[1]
+            self.declare(self.scope.declare_const, const_def.args[0], const_def.args[1], value_type)
+
+    def visit_FunctionDeclaration(self, node):
+        heading, return_type_node, body = node.args
+        func_name = heading.args[0].args[0]
+
+        params = []
+        if heading.args[1].args:
+            for param_tuple in heading.args[1].args[0].args:
+                param_type = type_name(param_tuple.args[1].args[0])
+                for declared in param_tuple.args[0].args:
+                    params.append((declared.args[0], param_type))
+
+        self.scope.declare_function(func_name, type_name(return_type_node.args[0]), [t for _, t in params])
+        self.scope.push()
+        for param_name, param_type in params:
+            self.declare(self.scope.declare, param_name, param_type, kind='param')
+        yield body
+        self.scope.pop()
+
+    ####################################################################
+    # STATEMENTS
+
+    def visit_Assignment(self, node):
+        value_type = yield node.args[1]
+        target_type = yield node.args[0]
+        if target_type is not None and value_type is not None and not compatible(target_type, value_type):
+            self.error(f"Atribuição a '{node.args[0].args[0]}' exige {target_type}, mas recebeu {value_type}.", node)
+
+    def condition(self, statement, node, condition_type):
+        if condition_type is not None and condition_type != "Boolean":
+            self.error(f"Condição do {statement} deve ser Boolean, mas recebeu {condition_type}.", node)
+
+    def visit_IfThen(self, node):
+        self.condition("if", node, (yield node.args[0]))
+        yield node.args[1]
+
+    def visit_IfThenElse(self, node):
+        self.condition("if", node, (yield node.args[0]))
+        yield node.args[1]
+        yield node.args[2]
+
+    def visit_While(self, node):
+        self.condition("while", node, (yield node.args[0]))
+        yield node.args[1]
+
+    def visit_Repeat(self, node):
+        yield node.args[0]
+        self.condition("repeat", node, (yield node.args[1]))
+
+    def visit_For(self, node):
+        assign_node, _, limit_node, body_node = node.args
+        yield assign_node
+        var_type = assign_node.args[0].type
+        limit_type = yield limit_node
+        if var_type is not None and var_type != "Integer":
+            self.error(f"Variável do for deve ser Integer, mas é {var_type}.", node)
+        if limit_type is not None and limit_type != "Integer":
+            self.error(f"Limite do for deve ser Integer, mas recebeu {limit_type}.", node)
+        yield body_node
+
+    ####################################################################
+    # EXPRESSIONS
+
+    def visit_LiteralValue(self, node):
+        return LITERAL_TYPES.get(node.args[0])
+
+    def visit_DeclaredName(self, node):
+        name = node.args[0]
+        symbol = self.scope.resolve(name)
+        if symbol is None:
+            self.error(f"Variable '{name}' not declared.", node)
+            return None
+        return symbol.type
+
+    def visit_RoutineCall(self, node):
+        func_name = node.args[0].args[0]
+        arg_nodes = node.args[1].args if len(node.args) > 1 else ()
+        arg_types = []
+        for arg in arg_nodes:
+            arg_types.append((yield arg))
+
+        if func_name in BUILTIN_PROCEDURES:
+            return None
+        if func_name == "length":
+            if len(arg_types) != 1 or arg_types[0] not in (None, "String"):
+                self.error(f"Função 'length' exige um argumento String, mas recebeu {arg_types}.", node)
+            return "Integer"
+
+        func_symbol = self.scope.lookup_function(func_name)
+        if func_symbol is None:
+            self.error(f"Function {func_name} not defined", node)
+            return None
+        expected_types = func_symbol.value
+        if len(arg_types) != len(expected_types):
+            self.error(f"Função '{func_name}' esperava {len(expected_types)} parâmetros, recebeu {len(arg_types)}.", node)
+        for position, (expected_type, actual_type) in enumerate(zip(expected_types, arg_types), 1):
+            if actual_type is not None and not compatible(expected_type, actual_type):
+                self.error(f"Parameter {position} in call to '{func_name}' expected '{expected_type}', but got '{actual_type}'.", node)
+        return func_symbol.type
+
+    def visit_ArrayAccess(self, node):
+        array_type = yield node.args[0]
+        if len(node.args) > 1:
+            index_type = yield node.args[1]
+            if index_type is not None and not compatible("Integer", index_type):
+                self.error(f"Índice de acesso deve ser Integer, mas recebeu {index_type}.", node)
+        if array_type is None:
+            return None
+        if array_type.startswith("Array<"):
+            return array_type[len("Array<"):-1]
+        if array_type == "String":
+            return "Integer" # código ASCII do caractere
+        self.error(f"'{node.args[0].args[0]}' não é array nem string (é {array_type}).", node)
+        return None
+
+    def visit_AddExpression(self, node):
+        t_left = yield node.args[0]
+        t_right = yield node.args[2]
+        return self.integer_operands(node.args[1].args[0], node, t_left, t_right)
+
+    def visit_MultExpression(self, node):
+        t_left = yield node.args[0]
+        t_right = yield node.args[2]
+        return self.integer_operands(node.args[1].args[0].label, node, t_left, t_right)
+
+    def integer_operands(self, operator, node, t_left, t_right):
+        if t_left is None or t_right is None:
+            return None
+        if t_left != "Integer" or t_right != "Integer":
+            self.error(f"Operador '{operator}' exige Integer e Integer, mas recebeu {t_left} e {t_right}.", node)
+            return None
+        return "Integer"
+
+    def visit_RelExpression(self, node):
+        t_left = yield node.args[0]
+        t_right = yield node.args[2]
+        if t_left is None or t_right is None:
+            return "Boolean"
+        operator = node.args[1].args[0].label
+        if operator in ("EQ", "NEQ"):
+            # igualdade: strings com strings, inteiros (ou chars) com inteiros
+            if not (compatible(t_left, t_right) and t_left in ("Integer", "Char", "String", "Boolean")):
+                self.error(f"Operador '{operator}' exige operandos do mesmo tipo, mas recebeu {t_left} e {t_right}.", node)
+        elif not (compatible("Integer", t_left) and compatible("Integer", t_right)):
+            self.error(f"Operador relacional '{operator}' exige Integer, mas recebeu {t_left} e {t_right}.", node)
+        return "Boolean"
+
+    def visit_AndExpression(self, node):
+        return (yield from self.boolean_operands("and", node))
+
+    def visit_OrExpression(self, node):
+        return (yield from self.boolean_operands("or", node))
+
+    def boolean_operands(self, operator, node):
+        t_left = yield node.args[0]
+        t_right = yield node.args[1]
+        if t_left not in (None, "Boolean") or t_right not in (None, "Boolean"):
+            self.error(f"Operador '{operator}' exige Boolean e Boolean, mas recebeu {t_left} e {t_right}.", node)
+        return "Boolean"
+
+    def visit_UnaryExpression(self, node):
+        operator = node.args[0].args[0]
+        t_operand = yield node.args[1]
+        expected = "Boolean" if operator.lower() == "not" else "Integer"
+        if t_operand is not None and t_operand != expected:
+            self.error(f"Operador '{operator}' exige {expected}, mas recebeu {t_operand}.", node)
+        return expected
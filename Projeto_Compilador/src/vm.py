@@ -0,0 +1,404 @@
+import sys
+import time
+import argparse
+
+from ir import OPCODES, Code, Op
+
+########################################################################
+# STACK VM
+# A local interpreter for the EWVM code produced by the compiler.
+# The program text is decoded once: comments are dropped, every opcode
+# becomes a small integer and every label is resolved to the index of
+# the instruction that follows it, so the dispatch loop only deals with
+# (opcode, operand) pairs and integer jump targets. The opcodes are the
+# IR's (ir.py), so code that is still in memory is loaded by load_code()
+# without going through the text.
+#
+# Values are Python objects: ints, strs (PUSHS/READ), lists (ALLOCN heap
+# blocks) and ints used as stack addresses (PUSHFP/PUSHSP/PUSHGP).
+#
+# With --aot the program is translated to Python by aot.py and run
+# from there instead (same output and instruction count).
+########################################################################
+
+OP = {name: code for code, name in enumerate(OPCODES)}
+
+(PUSHI, PUSHL, STOREL, PUSHG, STOREG, ADD, SUB, MUL, DIV, MOD,
+ JZ, JUMP, EQUAL, INF, INFEQ, SUP, SUPEQ, NOT, AND, OR,
+ DUP, POP, SWAP, PUSHS, PUSHN, PUSHFP, PUSHGP, PUSHSP, LOAD, STORE,
+ LOADN, STOREN, ALLOCN, ALLOC, PUSHA, CALL, RETURN, CHARAT, STRLEN,
+ CONCAT, CHRCODE, WRITEI, WRITES, WRITECHR, WRITELN, WRITEF, READ,
+ ATOI, STRI, START, STOP, NOP, ERR) = range(len(OPCODES))
+
+JUMP_OPS = (JZ, JUMP, PUSHA)
+INT_OPS = (PUSHI, PUSHL, STOREL, PUSHG, STOREG, DUP, POP, PUSHN, LOAD, STORE, ALLOC)
+
+
+class VMError(Exception):
+    pass
+
+
+class Program:
+    def __init__(self, code, labels):
+        self.code = code      # list of (opcode, operand)
+        self.labels = labels  # label -> instruction index
+
+
+def parse_program(text) -> Program:
+    code = []
+    labels = {}
+    pending = [] # (instruction index, label) still to resolve
+
+    for lineno, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+        if line.endswith(":") and " " not in line:
+            labels[line[:-1]] = len(code)
+            continue
+
+        name, _, operand = line.partition(" ")
+        op = OP.get(name.upper())
+        if op is None:
+            raise VMError(f"line {lineno}: unknown instruction '{name}'")
+        operand = operand.strip()
+
+        if op in JUMP_OPS:
+            pending.append((len(code), operand))
+            arg = operand
+        elif op in INT_OPS:
+            arg = int(operand) if operand else 1
+        elif op in (PUSHS, ERR):
+            arg = operand[1:-1] if operand.startswith('"') else operand
+        else:
+            arg = None
+        code.append((op, arg))
+
+    return _link(code, labels, pending)
+
+
+def load_code(ir_code: Code) -> Program:
+    """Program from IR instructions (emitter.code), without printing and parsing them."""
+    code = []
+    labels = {}
+    pending = []
+    for op, arg in zip(ir_code.ops, ir_code.args):
+        if op == Op.COMMENT:
+            continue
+        if op == Op.LABEL:
+            labels[arg] = len(code)
+            continue
+        if op in JUMP_OPS:
+            pending.append((len(code), arg))
+        elif op in INT_OPS and arg is None:
+            arg = 1
+        code.append((op, arg))
+    return _link(code, labels, pending)
+
+
+def _link(code, labels, pending) -> Program:
+    # troca as labels dos saltos pelo índice da instrução
+    for idx, label in pending:
+        if label not in labels:
+            raise VMError(f"undefined label '{label}'")
+        code[idx] = (code[idx][0], labels[label])
+    return Program(code, labels)
+
+
+def _div(a, b):
+    if b == 0:
+        raise VMError("division by zero")
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def _mod(a, b):
+    return a - b * _div(a, b)
+
+
+class VM:
+    def __init__(self, program: Program, stdin=None, stdout=None):
+        self.program = program
+        self.stdin = stdin if stdin is not None else sys.stdin
+        self.stdout = stdout if stdout is not None else sys.stdout
+        self.steps = 0
+
+    def run(self, trace=None):
+        """
+        Executes the program until STOP (or the end of the code).
+        `trace(pc)`, when given, is called before every instruction.
+        """
+        code = self.program.code
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        calls = []
+        write = self.stdout.write
+        readline = self.stdin.readline
+        fp = 0
+        pc = 0
+        steps = 0
+        end = len(code)
+
+        while pc < end:
+            if trace is not None:
+                trace(pc)
+            op, arg = code[pc]
+            pc += 1
+            steps += 1
+
+            if op == PUSHL:
+                push(stack[fp + arg])
+            elif op == PUSHI:
+                push(arg)
+            elif op == STOREL:
+                v = pop()
+                stack[fp + arg] = v
+            elif op == JZ:
+                if pop() == 0:
+                    pc = arg
+            elif op == JUMP:
+                pc = arg
+            elif op == ADD:
+                b = pop(); stack[-1] += b
+            elif op == SUB:
+                b = pop(); stack[-1] -= b
+            elif op == MUL:
+                b = pop(); stack[-1] *= b
+            elif op == DIV:
+                b = pop(); stack[-1] = _div(stack[-1], b)
+            elif op == MOD:
+                b = pop(); stack[-1] = _mod(stack[-1], b)
+            elif op == INF:
+                b = pop(); stack[-1] = int(stack[-1] < b)
+            elif op == INFEQ:
+                b = pop(); stack[-1] = int(stack[-1] <= b)
+            elif op == SUP:
+                b = pop(); stack[-1] = int(stack[-1] > b)
+            elif op == SUPEQ:
+                b = pop(); stack[-1] = int(stack[-1] >= b)
+            elif op == EQUAL:
+                b = pop(); stack[-1] = int(stack[-1] == b)
+            elif op == NOT:
+                stack[-1] = int(stack[-1] == 0)
+            elif op == AND:
+                b = pop(); stack[-1] = int(bool(stack[-1]) and bool(b))
+            elif op == OR:
+                b = pop(); stack[-1] = int(bool(stack[-1]) or bool(b))
+            elif op == PUSHG:
+                push(stack[arg])
+            elif op == STOREG:
+                v = pop()
+                stack[arg] = v
+            elif op == DUP:
+                stack.extend(stack[-arg:])
+            elif op == POP:
+                del stack[len(stack) - arg:]
+            elif op == SWAP:
+                stack[-1], stack[-2] = stack[-2], stack[-1]
+            elif op == PUSHS:
+                push(arg)
+            elif op == PUSHN:
+                stack.extend([0] * arg)
+            elif op == PUSHFP:
+                push(fp)
+            elif op == PUSHGP:
+                push(0)
+            elif op == PUSHSP:
+                push(len(stack))
+            elif op == LOAD:
+                a = pop()
+                push(a[arg] if isinstance(a, list) else stack[a + arg])
+            elif op == STORE:
+                v = pop(); a = pop()
+                if isinstance(a, list):
+                    a[arg] = v
+                else:
+                    stack[a + arg] = v
+            elif op == LOADN:
+                n = pop(); a = pop()
+                push(a[n] if isinstance(a, list) else stack[a + n])
+            elif op == STOREN:
+                v = pop(); n = pop(); a = pop()
+                if isinstance(a, list):
+                    a[n] = v
+                else:
+                    stack[a + n] = v
+            elif op == ALLOCN:
+                push([0] * pop())
+            elif op == ALLOC:
+                push([0] * arg)
+            elif op == PUSHA:
+                push(arg)
+            elif op == CALL:
+                calls.append((pc, fp))
+                pc = pop()
+                fp = len(stack)
+            elif op == RETURN:
+                del stack[fp:]
+                pc, fp = calls.pop()
+            elif op == CHARAT:
+                n = pop(); s = pop()
+                push(ord(s[n]))
+            elif op == STRLEN:
+                push(len(pop()))
+            elif op == CONCAT:
+                b = pop(); stack[-1] = stack[-1] + b
+            elif op == CHRCODE:
+                push(ord(pop()[0]))
+            elif op == WRITEI or op == WRITEF:
+                write(str(pop()))
+            elif op == WRITES:
+                write(pop())
+            elif op == WRITECHR:
+                write(chr(pop()))
+            elif op == WRITELN:
+                write("\n")
+            elif op == READ:
+                push(readline().rstrip("\n"))
+            elif op == ATOI:
+                push(int(pop()))
+            elif op == STRI:
+                push(str(pop()))
+            elif op == START:
+                fp = len(stack)
+            elif op == STOP:
+                break
+            elif op == NOP:
+                pass
+            elif op == ERR:
+                raise VMError(arg)
+            else:
+                raise VMError(f"instruction {OPCODES[op]} not supported")
+
+        self.steps = steps
+        return stack
+
+
+########################################################################
+# PROFILING
+# A Profiler is passed to VM.run as the trace hook: it counts every
+# instruction executed and charges the time until the next one to it.
+# Counts and times are then grouped by opcode and by label (a label owns
+# the instructions from it up to the next label).
+########################################################################
+
+class Profiler:
+    def __init__(self, program: Program):
+        self.program = program
+        self.counts = [0] * len(program.code)
+        self.times = [0.0] * len(program.code)
+        self.last_pc = None
+        self.last_time = 0.0
+        self.clock = time.perf_counter
+
+    def __call__(self, pc):
+        now = self.clock()
+        if self.last_pc is not None:
+            self.times[self.last_pc] += now - self.last_time
+        self.counts[pc] += 1
+        self.last_pc = pc
+        self.last_time = self.clock()
+
+    def finish(self):
+        if self.last_pc is not None:
+            self.times[self.last_pc] += self.clock() - self.last_time
+            self.last_pc = None
+
+    def by_opcode(self):
+        """{opcode name: (count, seconds)}"""
+        result = {}
+        for pc, (op, _) in enumerate(self.program.code):
+            if self.counts[pc]:
+                count, seconds = result.get(OPCODES[op], (0, 0.0))
+                result[OPCODES[op]] = (count + self.counts[pc], seconds + self.times[pc])
+        return result
+
+    def by_label(self):
+        """{label: (times reached, instructions executed, seconds)}"""
+        names = {}
+        for label, idx in self.program.labels.items():
+            names.setdefault(idx, []).append(label)
+
+        result = {}
+        owner = "<inicio>"
+        for pc in range(len(self.program.code)):
+            if pc in names:
+                owner = "/".join(names[pc])
+                result[owner] = (self.counts[pc], 0, 0.0)
+            hits, count, seconds = result.get(owner, (self.counts[pc], 0, 0.0))
+            result[owner] = (hits, count + self.counts[pc], seconds + self.times[pc])
+        return result
+
+    def report(self, out=None, limit=20):
+        out = out if out is not None else sys.stderr # (o de agora, não o da importação)
+        total = sum(self.counts)
+        total_time = sum(self.times) or 1e-12
+
+        print(f"\n{total} instruções executadas em {total_time * 1000:.2f} ms", file=out)
+
+        print(f"\n{'instrução':<10} {'vezes':>10} {'%':>6} {'tempo (ms)':>11} {'%':>6}", file=out)
+        rows = sorted(self.by_opcode().items(), key=lambda row: -row[1][1])
+        for name, (count, seconds) in rows[:limit]:
+            print(f"{name:<10} {count:>10} {100 * count / total:>6.1f} "
+                  f"{seconds * 1000:>11.3f} {100 * seconds / total_time:>6.1f}", file=out)
+
+        print(f"\n{'label':<16} {'entradas':>10} {'instruções':>11} {'tempo (ms)':>11} {'%':>6}", file=out)
+        rows = sorted(self.by_label().items(), key=lambda row: -row[1][2])
+        for label, (hits, count, seconds) in rows[:limit]:
+            print(f"{label:<16} {hits:>10} {count:>11} "
+                  f"{seconds * 1000:>11.3f} {100 * seconds / total_time:>6.1f}", file=out)
+
+
+def main(argv=None):
+    argparser = argparse.ArgumentParser(description="Executa código EWVM gerado pelo compilador")
+    argparser.add_argument("program", help="ficheiro .out (texto) ou .ewvb (bytecode)")
+    argparser.add_argument("-i", "--input", help="ficheiro a usar como stdin do programa")
+    mode = argparser.add_mutually_exclusive_group()
+    mode.add_argument("-p", "--profile", action="store_true",
+                      help="contagens e tempos por instrução e por label (para stderr)")
+    mode.add_argument("-a", "--aot", action="store_true",
+                      help="traduz o programa para Python (aot.py) em vez de o interpretar")
+    args = argparser.parse_args(argv)
+
+    import bytecode # (importa este módulo)
+
+    with open(args.program, "rb") as f:
+        data = f.read()
+    if bytecode.is_bytecode(data):
+        program = bytecode.load(data)
+    else:
+        program = parse_program(data.decode("utf-8"))
+
+    stdin = open(args.input) if args.input else None
+    try:
+        if args.aot:
+            import aot
+            vm = aot.load(program) # (mesma interface: run() e steps)
+            run = lambda trace: vm.run(stdin=stdin)
+        else:
+            vm = VM(program, stdin=stdin)
+            run = vm.run
+        profiler = Profiler(program) if args.profile else None
+        start = time.perf_counter()
+        try:
+            run(trace=profiler)
+        except VMError as e:
+            print(f"\nVM error: {e}", file=sys.stderr)
+            return 1
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.finish()
+                profiler.report()
+    finally:
+        if stdin is not None:
+            stdin.close()
+
+    if not args.profile:
+        print(f"\n{vm.steps} instruções em {elapsed * 1000:.2f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,50 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+# os módulos do compilador só são importados depois de pytest_configure:
+# o lexer escreve o seu lextab em cache_dir() logo na importação
+_session_cache = None
+
+
+def pytest_configure(config):
+    global _session_cache
+    _session_cache = tempfile.mkdtemp(prefix="pascal-cache-")
+    os.environ["PASCAL_CACHE_DIR"] = _session_cache
+
+
+def pytest_unconfigure(config):
+    if _session_cache is not None:
+        shutil.rmtree(_session_cache, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # tabelas e traduções numa pasta temporária, não em src/.cache
+    monkeypatch.setenv("PASCAL_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def build(text, **options):
+    """`text` compiled with `options` (see compiler.Compiler)."""
+    from compiler import Compiler
+    return Compiler(**options).compile(text)
+
+
+def run_code(code, stdin=""):
+    """Output of EWVM `code` run on vm.py."""
+    import vm
+    out = io.StringIO()
+    vm.VM(vm.parse_program(code), stdin=io.StringIO(stdin), stdout=out).run()
+    return out.getvalue()
+
+
+def run_program(text, stdin="", **options):
+    """Output of `text` compiled with `options` and run on vm.py."""
+    return run_code(build(text, **options).code, stdin)
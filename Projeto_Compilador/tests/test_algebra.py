@@ -0,0 +1,158 @@
+"""optimizer.AlgebraicSimplifier: each rule keeps the program's output."""
+import pytest
+
+from conftest import build, run_code
+from vm import VMError
+
+
+def simplified(text, stdin=""):
+    """Runs `text` plain and with -O, asserting the same output; returns the algebra stats."""
+    plain = run_code(build(text).code, stdin)
+    result = build(text, optimize=True)
+    assert run_code(result.code, stdin) == plain
+    return {name[len("algebra."):]: value for name, value in result.stats.items()
+            if name.startswith("algebra.")}
+
+
+def program(body, variables="a, b, x, r: integer"):
+    return f"""
+    program Algebra;
+    var {variables};
+    begin
+      readln(a);
+      readln(b);
+      readln(x);
+    {body}
+    end.
+    """
+
+
+STDIN = "7\n3\n5\n"
+
+
+@pytest.mark.parametrize("expression, rule", [
+    ("x - x", "sub_self"),
+    ("x * 0", "mul_zero"),
+    ("0 * x", "mul_zero"),
+    ("x mod 1", "mod_one"),
+    ("x + 0", "add_zero"),
+    ("x * 1", "mul_one"),
+    ("x div 1", "div_one"),
+    ("-(-x)", "double_negation"),
+])
+def test_operand_rules(expression, rule):
+    text = program(f"""
+      r := {expression};
+      writeln(r);
+    """)
+    assert simplified(text, STDIN)[rule] == 1
+
+
+@pytest.mark.parametrize("expression", [
+    "(x + 1) + 2",
+    "(x + 4) - 4",
+    "(x - 1) + 3",
+    "(x * 2) * 3",
+    "(x * 3) * 2",
+    "2 * (3 * x)",
+])
+def test_reassociate(expression):
+    text = program(f"""
+      r := {expression};
+      writeln(r);
+    """)
+    assert simplified(text, STDIN)["reassociate"] >= 1
+
+
+def test_constants_left_by_rules():
+    text = program("""
+      r := x * 0 + 1;
+      writeln(r);
+    """)
+    stats = simplified(text, STDIN)
+    assert stats["mul_zero"] == 1 and stats["constants"] == 1
+
+
+@pytest.mark.parametrize("comparison", ["a < b", "a > b", "a <= b", "a >= b", "a <> b", "a < a"])
+def test_negate_comparison(comparison):
+    text = program(f"""
+      if not ({comparison}) then
+        writeln('sim')
+      else
+        writeln('nao');
+      if not (b {comparison[2:-1]} a) then
+        writeln('sim')
+      else
+        writeln('nao');
+    """)
+    assert simplified(text, STDIN)["negate_comparison"] == 2
+
+
+@pytest.mark.parametrize("condition, rule", [
+    ("p = true", "bool_comparison"),
+    ("p <> true", "bool_comparison"),
+    ("false = p", "bool_comparison"),
+    ("not not p", "double_negation"),
+])
+def test_boolean_rules(condition, rule):
+    text = program(f"""
+      p := a > b;
+      if {condition} then
+        writeln('sim')
+      else
+        writeln('nao');
+      p := a < b;
+      if {condition} then
+        writeln('sim')
+      else
+        writeln('nao');
+    """, variables="a, b, x: integer; p: boolean")
+    assert simplified(text, STDIN)[rule] == 2
+
+
+def test_call_operand_kept():
+    # a chamada escreve: x * 0 não pode deixar de a fazer
+    text = """
+    program Efeito;
+    var x, r: integer;
+    function f(n: integer): integer;
+    begin
+      writeln('chamada');
+      f := n
+    end;
+    begin
+      x := 4;
+      r := f(x) * 0;
+      writeln(r);
+      r := f(x) mod 1;
+      writeln(r);
+      r := f(x) - f(x);
+      writeln(r)
+    end.
+    """
+    stats = simplified(text)
+    assert stats["mul_zero"] == stats["mod_one"] == stats["sub_self"] == 0
+
+
+def test_failing_operand_kept():
+    text = program("""
+      r := (a div b) * 0;
+      writeln(r);
+      r := (a mod b) mod 1;
+      writeln(r);
+    """)
+    stats = simplified(text, STDIN)
+    assert stats["mul_zero"] == stats["mod_one"] == 0
+    # com b = 0 a divisão falha nos dois casos
+    for options in ({}, {"optimize": True}):
+        with pytest.raises(VMError):
+            run_code(build(text, **options).code, "7\n0\n5\n")
+
+
+def test_times_two_kept():
+    # sem shifts na EWVM, x + x não poupa instruções: x * 2 fica como está
+    text = program("""
+      r := x * 2;
+      writeln(r);
+    """)
+    assert simplified(text, STDIN)["rewrites"] == 0
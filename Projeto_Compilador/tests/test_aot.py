@@ -0,0 +1,49 @@
+"""aot.py: a translated program runs exactly like the same program on vm.VM."""
+import io
+
+import pytest
+
+import aot
+import benchmark
+import vm
+from conftest import build
+
+
+# os exemplos de inputs/ e os programas gerados do benchmark, numa escala pequena
+PROGRAMS = benchmark.suite_programs(0.1) + [
+    ("div_zero.pas", "program D;\nvar a, b: integer;\nbegin\n  a := 1;\n  b := 0;\n"
+                     "  writeln(a);\n  a := a div b;\n  writeln(a)\nend.", ""),
+]
+
+BUILDS = [{}, {"optimize": True}, {"optimize": True, "inline": True}]
+
+
+def outcome(run, stdin):
+    """(output, final stack, error) of `run(stdin, stdout)`."""
+    out = io.StringIO()
+    try:
+        stack, error = run(io.StringIO(stdin), out), None
+    except vm.VMError as e:
+        stack, error = None, str(e)
+    return out.getvalue(), stack, error
+
+
+@pytest.mark.parametrize("options", BUILDS, ids=["plain", "O", "O-inline"])
+@pytest.mark.parametrize("name, text, stdin", PROGRAMS, ids=[name for name, _, _ in PROGRAMS])
+def test_same_as_vm(name, text, stdin, options, monkeypatch):
+    program = vm.parse_program(build(text, **options).code)
+    machine = vm.VM(program)
+
+    def run_vm(stdin, stdout):
+        machine.stdin, machine.stdout = stdin, stdout
+        return machine.run()
+    expected = outcome(run_vm, stdin)
+
+    # tradução nova, escrita na cache em disco, lida da cache em disco
+    for use_cache, cached in ((False, False), (True, False), (True, True)):
+        monkeypatch.setattr(aot, "_loaded", {}) # sem as traduções já carregadas
+        translated = aot.load(program, use_cache=use_cache)
+        assert translated.cached == cached
+        assert outcome(translated.run, stdin) == expected
+        if expected[2] is None: # (num erro, a contagem fica por atualizar)
+            assert translated.steps == machine.steps
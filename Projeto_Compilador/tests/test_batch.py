@@ -0,0 +1,64 @@
+"""batch.py and main.py --batch: many files, same code as one at a time."""
+import glob
+import os
+
+import pytest
+
+from conftest import SRC_DIR, build
+
+INPUTS = os.path.join(SRC_DIR, "..", "inputs")
+SOURCES = sorted(glob.glob(os.path.join(INPUTS, "*.pas")))
+
+
+def outputs(directory):
+    found = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.out"))):
+        with open(path) as f:
+            found[os.path.basename(path)] = f.read()
+    return found
+
+
+def expected_outputs(**options):
+    found = {}
+    for source in SOURCES:
+        with open(source) as f:
+            result = build(f.read(), **options)
+        found[result.output_name] = result.code
+    return found
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+@pytest.mark.parametrize("stream", [False, True])
+def test_compile_batch(tmp_path, jobs, stream):
+    from batch import compile_batch
+    results = compile_batch(SOURCES, str(tmp_path), jobs, use_cache=False, comments=False, stream=stream)
+    assert [r.source for r in results] == SOURCES and all(r.ok for r in results)
+    written = outputs(tmp_path)
+    assert written == expected_outputs(comments=False)
+    assert not any("//" in code for code in written.values())
+    assert not glob.glob(os.path.join(tmp_path, "*.tmp"))
+
+
+def test_errors_dont_stop_the_batch(tmp_path):
+    from batch import compile_batch
+    broken = tmp_path / "broken.pas"
+    broken.write_text("program Broken;\nbegin\n  x := ;\nend.\n")
+    results = compile_batch([str(broken), SOURCES[0]], str(tmp_path / "out"), 1, use_cache=False)
+    assert [r.ok for r in results] == [False, True]
+    assert results[0].error
+
+
+def test_main_batch_options(tmp_path, capsys):
+    from main import main
+    status = main(["--batch", os.path.join(INPUTS, "*.pas"), "-o", str(tmp_path), "-j", "2", "--no-cache",
+                   "--no-comments", "--stream", "-O"])
+    assert status == 0
+    assert outputs(tmp_path) == expected_outputs(comments=False, optimize=True)
+    assert f"{len(SOURCES)} ficheiros" in capsys.readouterr().out
+
+
+def test_batch_cache(tmp_path):
+    from batch import compile_batch
+    first = compile_batch(SOURCES, str(tmp_path), 1)
+    again = compile_batch(SOURCES, str(tmp_path), 1)
+    assert not any(r.cached for r in first) and all(r.cached for r in again)
@@ -0,0 +1,97 @@
+"""benchmark.py: the suite measures what the compiler really produces."""
+import io
+
+import pytest
+
+import benchmark
+import vm
+from conftest import build
+
+# o que só o -O completo (álgebra, código morto) tira
+PROGRAMS = benchmark.suite_programs(0.05) + [("dead_code", """
+program Morto;
+var x, r: integer;
+function nunca(n: integer): integer;
+begin
+  nunca := n * n
+end;
+begin
+  x := 3;
+  r := x * 0 + x mod 1;
+  if false then
+    writeln(x);
+  writeln(r)
+end.
+""", "")]
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+@pytest.mark.parametrize("name, text, stdin", PROGRAMS, ids=[name for name, _, _ in PROGRAMS])
+def test_same_code_as_compiler(name, text, stdin, optimize):
+    result = benchmark.bench_program(text, stdin, 1, optimize)
+    program = vm.parse_program(build(text, optimize=optimize).code)
+    machine = vm.VM(program, stdin=io.StringIO(stdin), stdout=io.StringIO())
+    machine.run()
+    assert (result["instructions"], result["steps"]) == (len(program.code), machine.steps)
+    assert ("optimize" in result["times"]) == optimize
+
+
+def test_suite_programs():
+    names = [name for name, _, _ in benchmark.suite_programs(0.01)]
+    assert "prime_number.pas" in names
+    assert names[-len(benchmark.GENERATORS):] == list(benchmark.GENERATORS)
+    # os programas gerados crescem com a escala
+    small = dict((name, text) for name, text, _ in benchmark.suite_programs(0.01))
+    large = dict((name, text) for name, text, _ in benchmark.suite_programs(0.05))
+    for name in benchmark.GENERATORS:
+        assert len(large[name]) > len(small[name])
+
+
+def result(times, instructions=100, steps=1000):
+    return {"times": times, "instructions": instructions, "steps": steps}
+
+
+def test_compare(capsys):
+    baseline = {"results": {
+        "a": result({"parse": 0.010, "vm.run": 0.100}),
+        "b": result({"parse": 0.010}),
+    }}
+    # abaixo do limite, ou abaixo do ruído, não é regressão
+    same = {"a": result({"parse": 0.0105, "vm.run": 0.100}), "b": result({"parse": 0.0104}),
+            "novo": result({"parse": 1.0})}
+    assert benchmark.compare(same, baseline, 0.10) == 0
+    tiny = {"b": result({"parse": 0.0001 + benchmark.NOISE_FLOOR / 2})}
+    assert benchmark.compare(tiny, {"results": {"b": result({"parse": 0.0001})}}, 0.10) == 0
+
+    slower = {"a": result({"parse": 0.020, "vm.run": 0.050}), "b": result({"parse": 0.010})}
+    assert benchmark.compare(slower, baseline, 0.10) == 1
+    # nas contagens qualquer aumento conta
+    more_steps = {"a": result({"parse": 0.010}, steps=1001)}
+    assert benchmark.compare(more_steps, baseline, 0.10) == 1
+    fewer = {"a": result({"parse": 0.010}, instructions=90, steps=900)}
+    assert benchmark.compare(fewer, baseline, 0.10) == 0
+    assert "melhoria" in capsys.readouterr().out
+
+
+def test_bench_suite_baseline(tmp_path, monkeypatch, capsys):
+    import argparse
+    import json
+
+    # só os programas gerados, pequenos
+    monkeypatch.setattr(benchmark, "INPUTS_DIR", str(tmp_path))
+    path = str(tmp_path / "base.json")
+    args = argparse.Namespace(scale=0.01, runs=1, optimize=True, json=None,
+                              save_baseline=path, compare=None, threshold=0.10)
+    assert benchmark.bench_suite(args) == 0
+    with open(path) as f:
+        document = json.load(f)
+    assert document["meta"]["optimize"] is True
+    assert set(document["results"]) == set(benchmark.GENERATORS)
+
+    # uma referência com menos instruções executadas faz falhar a comparação
+    document["results"]["deep_nesting"]["steps"] -= 1
+    with open(path, "w") as f:
+        json.dump(document, f)
+    args.save_baseline, args.compare, args.threshold = None, path, 1000.0
+    assert benchmark.bench_suite(args) == 1
+    assert "REGRESSÃO" in capsys.readouterr().out
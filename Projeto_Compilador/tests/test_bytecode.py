@@ -0,0 +1,65 @@
+"""bytecode.py: the binary format loads into the same program as the text."""
+import io
+import os
+
+import pytest
+
+import bytecode
+import vm
+from conftest import build, run_code
+
+INPUTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "inputs")
+SAMPLES = sorted(name for name in os.listdir(INPUTS) if name.endswith(".pas"))
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+@pytest.mark.parametrize("name", SAMPLES)
+def test_round_trip(name, optimize):
+    with open(os.path.join(INPUTS, name)) as f:
+        text = f.read()
+    data = build(text, optimize=optimize, output_format="binary").code
+    assert isinstance(data, bytes) and bytecode.is_bytecode(data)
+
+    from_text = vm.parse_program(build(text, optimize=optimize).code)
+    from_bytes = bytecode.load(data)
+    assert from_bytes.code == from_text.code
+    assert from_bytes.labels == from_text.labels
+
+
+def test_operands():
+    text = """
+    program Operandos;
+    var x: integer; s: string;
+    begin
+      x := -300000;
+      s := 'olá';
+      writeln(x);
+      writeln(s);
+      writeln('olá')
+    end.
+    """
+    data = build(text, output_format="binary").code
+    out = io.StringIO()
+    vm.VM(bytecode.load(data), stdin=io.StringIO(), stdout=out).run()
+    assert out.getvalue() == run_code(build(text).code) == "-300000\nolá\nolá\n"
+    # cada string só uma vez na pool
+    assert data.count("olá".encode("utf-8")) == 1
+
+
+def test_bad_data():
+    with pytest.raises(bytecode.BytecodeError, match="not an EWVM"):
+        bytecode.load(b"START\nSTOP\n")
+    with pytest.raises(bytecode.BytecodeError, match="version"):
+        bytecode.load(bytecode.MAGIC + bytes([bytecode.VERSION + 1]))
+    data = build("program P;\nbegin\n  writeln(1)\nend.", output_format="binary").code
+    with pytest.raises(bytecode.BytecodeError):
+        bytecode.load(data[:-3])
+    # (é um VMError, como os outros erros da VM)
+    assert issubclass(bytecode.BytecodeError, vm.VMError)
+
+
+def test_vm_main(tmp_path, capfd):
+    path = tmp_path / "p.ewvb"
+    path.write_bytes(build("program P;\nbegin\n  writeln(42)\nend.", output_format="binary").code)
+    assert vm.main([str(path)]) == 0
+    assert capfd.readouterr().out == "42\n"
@@ -0,0 +1,20 @@
+"""cache.BuildCache: entries round-trip and the size estimate matches the disk."""
+from cache import BuildCache
+
+
+def test_size_counts_bytes(tmp_path):
+    cache = BuildCache(str(tmp_path / "build"))
+    cache.put("a", "Primeiro", 'pushs "olá"\nwrites\n')
+    cache.put("b", "Segundo", 'pushs "ação → ü"\nwrites\n')
+    cache.put("c", "Binário", bytes(range(256)))
+    assert cache._size == cache._entries_size()
+    assert cache.get("b") == ("Segundo", 'pushs "ação → ü"\nwrites\n')
+    assert cache.get("c") == ("Binário", bytes(range(256)))
+
+
+def test_evicts_past_the_limit(tmp_path):
+    cache = BuildCache(str(tmp_path / "build"), max_bytes=2000)
+    for n in range(20):
+        cache.put(f"k{n}", "P", "é" * 200)
+    assert cache._size == cache._entries_size() <= 2000
+    assert cache.get("k19") is not None
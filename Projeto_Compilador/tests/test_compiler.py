@@ -0,0 +1,73 @@
+"""compiler.py: the Compiler API."""
+import os
+
+import pytest
+
+from conftest import SRC_DIR, build, run_code
+
+FIRST = """
+program Primeiro;
+var a: integer;
+begin
+  a := 2;
+  writeln(a)
+end.
+"""
+
+SECOND = """
+program Segundo;
+var b: string;
+begin
+  b := 'ola';
+  writeln(b)
+end.
+"""
+
+
+def test_instances_are_independent():
+    from compiler import Compiler
+    first, second = Compiler(), Compiler()
+    for _ in range(2):
+        one = first.compile(FIRST)
+        two = second.compile(SECOND)
+        assert (one.program_name, two.program_name) == ("primeiro", "segundo")
+        assert (run_code(one.code), run_code(two.code)) == ("2\n", "ola\n")
+
+
+def test_no_state_leaks_between_compiles():
+    from compiler import Compiler
+    from errors import SemanticError
+    compiler = Compiler()
+    compiler.compile(FIRST)
+    # `a` era do programa anterior
+    with pytest.raises(SemanticError):
+        compiler.compile(SECOND.replace("b := 'ola'", "a := 1"))
+    assert run_code(compiler.compile(SECOND).code) == "ola\n"
+
+
+@pytest.mark.parametrize("text, error, kind", [
+    ("program P;\nbegin\n  writeln(1) ?\nend.\n", "LexicalError", "lexical"),
+    ("program P;\nbegin\n  x := ;\nend.\n", "ParseError", "syntax"),
+    ("program P;\nbegin\n  x := 1\nend.\n", "SemanticError", "semantic"),
+])
+def test_errors_are_exceptions(text, error, kind):
+    import errors
+    with pytest.raises(getattr(errors, error)) as raised:
+        build(text)
+    assert isinstance(raised.value, errors.CompilationError)
+    assert [d.kind for d in raised.value.diagnostics][0] == kind
+
+
+def test_error_sample():
+    from errors import SemanticError
+    with open(os.path.join(SRC_DIR, "..", "inputs", "errors", "invalid_param_type.pas")) as f:
+        text = f.read()
+    with pytest.raises(SemanticError, match="add"):
+        build(text)
+
+
+def test_compile_source():
+    from compiler import compile_source
+    result = compile_source(FIRST)
+    assert result.program_name == "primeiro" and result.ast is not None and not result.cached
+    assert run_code(result.code) == "2\n"
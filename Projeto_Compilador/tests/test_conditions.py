@@ -0,0 +1,119 @@
+"""Short-circuit and/or in conditions and values, and repeat/until."""
+import pytest
+
+from conftest import build, run_program
+
+BUILDS = [{}, {"optimize": True}, {"optimize": True, "inline": True}]
+
+# marca(n) escreve n: mostra quais operandos são avaliados
+MARCA = """
+function marca(n: integer): boolean;
+begin
+  writeln(n);
+  marca := n > 0
+end;
+"""
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_short_circuit_conditions(options):
+    text = f"""
+    program Curto;
+    var x: integer;
+    {MARCA}
+    begin
+      x := 0;
+      if (x > 0) and marca(1) then
+        writeln(10);
+      if (x = 0) or marca(2) then
+        writeln(20);
+      if not ((x > 0) and marca(3)) then
+        writeln(30);
+      if marca(4) and marca(0) and marca(5) then
+        writeln(40);
+      while (x < 3) and marca(8) do
+        x := x + 1;
+      writeln(x)
+    end.
+    """
+    # marca(1), marca(2), marca(3) e marca(5) nunca correm
+    assert run_program(text, **options) == "20\n30\n4\n0\n8\n8\n8\n3\n"
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_short_circuit_values(options):
+    text = f"""
+    program Valores;
+    var x: integer; b: boolean;
+    {MARCA}
+    begin
+      x := 0;
+      b := (x = 0) or marca(6);
+      if b then
+        writeln(50);
+      b := (x > 0) and marca(7);
+      if not b then
+        writeln(60);
+      b := (x = 0) and marca(-1);
+      if b then
+        writeln(70)
+    end.
+    """
+    assert run_program(text, **options) == "50\n60\n-1\n"
+
+
+def test_condition_jumps():
+    text = """
+    program Saltos;
+    var x, y: integer;
+    begin
+      x := 1;
+      y := 2;
+      if (x > 0) and (y > 0) then
+        writeln(x)
+    end.
+    """
+    code = build(text).code
+    # a condição é compilada para saltos: não se calcula o valor 0/1 do and
+    assert "AND" not in code.split()
+    assert code.count("JZ") == 2
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_repeat_until(options):
+    text = f"""
+    program Repetir;
+    var x, n: integer;
+    {MARCA}
+    begin
+      x := 0;
+      n := 0;
+      repeat
+        n := n + 1
+      until true;
+      writeln(n);
+      repeat
+        x := x + 2;
+        n := n + 1
+      until (x >= 6) or marca(0);
+      writeln(x);
+      writeln(n)
+    end.
+    """
+    # o corpo corre pelo menos uma vez; marca(0) só antes de x chegar a 6
+    assert run_program(text, **options) == "1\n0\n0\n6\n4\n"
+
+
+def test_repeat_with_statements():
+    text = """
+    PROGRAM Maiusculas;
+    VAR i: INTEGER;
+    BEGIN
+      i := 10;
+      REPEAT
+        i := i - 3;
+        writeln(i)
+      UNTIL i < 0
+    END.
+    """
+    assert run_program(text) == "7\n4\n1\n-2\n"
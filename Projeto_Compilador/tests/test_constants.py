@@ -0,0 +1,102 @@
+"""CONST declarations and optimizer.ConstantFolder."""
+import pytest
+
+from conftest import build, run_code
+
+
+def folded(text, stdin=""):
+    """Runs `text` plain and with -O, asserting the same output; returns (output, fold stats)."""
+    plain = run_code(build(text).code, stdin)
+    result = build(text, optimize=True)
+    assert run_code(result.code, stdin) == plain
+    return plain, {name[len("fold."):]: value for name, value in result.stats.items() if name.startswith("fold.")}
+
+
+def test_const_declarations():
+    text = """
+    program Constantes;
+    const N = 10; DOBRO = N * 2; MSG = 'ola';
+    var i, s: integer;
+    begin
+      s := 0;
+      for i := 1 to N do
+        s := s + DOBRO;
+      writeln(s);
+      writeln(MSG)
+    end.
+    """
+    output, stats = folded(text)
+    assert output == "200\nola\n"
+    assert stats["propagated"] >= 2 and stats["folded"] >= 1
+
+
+def test_const_in_function_and_shadowing():
+    text = """
+    program Escopos;
+    const K = 3;
+    var r: integer;
+    function triplo(n: integer): integer;
+    begin
+      triplo := n * K
+    end;
+    function sombra(k: integer): integer;
+    begin
+      sombra := k + 1
+    end;
+    begin
+      r := triplo(5);
+      writeln(r);
+      r := sombra(7);
+      writeln(r)
+    end.
+    """
+    output, _ = folded(text)
+    assert output == "15\n8\n"
+
+
+@pytest.mark.parametrize("expression, value", [
+    ("2 * 3 + 4", 10),
+    ("(7 - 10) div 2", -1),
+    ("-7 mod 3", -1),
+    ("100 div (2 * 5) - 3", 7),
+])
+def test_folds_integer_expressions(expression, value):
+    text = f"""
+    program Dobra;
+    var r: integer;
+    begin
+      r := {expression};
+      writeln(r)
+    end.
+    """
+    output, stats = folded(text)
+    assert output == f"{value}\n" and stats["folded"] >= 1
+
+
+def test_division_by_zero_left_for_run_time():
+    from vm import VMError
+    text = """
+    program Zero;
+    var r: integer;
+    begin
+      r := 1 div 0;
+      writeln(r)
+    end.
+    """
+    for options in ({}, {"optimize": True}):
+        with pytest.raises(VMError):
+            run_code(build(text, **options).code)
+
+
+def test_const_must_be_constant():
+    from errors import SemanticError
+    text = """
+    program Erro;
+    var x: integer;
+    const C = x + 1;
+    begin
+      x := C
+    end.
+    """
+    with pytest.raises(SemanticError):
+        build(text)
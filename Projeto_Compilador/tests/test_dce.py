@@ -0,0 +1,109 @@
+"""optimizer.DeadCodeEliminator: constant branches and unreachable functions."""
+from conftest import build, run_code
+
+
+def eliminated(text, stdin=""):
+    """Runs `text` plain and with -O, asserting the same output; returns (output, -O result)."""
+    plain = run_code(build(text).code, stdin)
+    result = build(text, optimize=True)
+    assert run_code(result.code, stdin) == plain
+    return plain, result
+
+
+def test_unreachable_functions_removed():
+    text = """
+    program Funcoes;
+    var x: integer;
+    function quadrado(n: integer): integer;
+    begin
+      quadrado := n * n
+    end;
+    function usada(n: integer): integer;
+    begin
+      usada := quadrado(n) + 1
+    end;
+    function sozinha(n: integer): integer;
+    begin
+      sozinha := n
+    end;
+    function so_de_morta(n: integer): integer;
+    begin
+      so_de_morta := n - 1
+    end;
+    function morta(n: integer): integer;
+    begin
+      morta := so_de_morta(n)
+    end;
+    begin
+      x := 4;
+      x := usada(x);
+      if false then
+        x := sozinha(x);
+      writeln(x)
+    end.
+    """
+    output, result = eliminated(text)
+    assert output == "17\n"
+    # quadrado só é chamada por usada; as outras só de código morto (ou de nenhum)
+    assert sorted(result.stats["dce.removed"]) == ["morta", "so_de_morta", "sozinha"]
+    assert result.stats["dce.functions"] == 3
+    assert "sozinha" not in result.code and "morta" not in result.code
+    assert "quadrado" in result.code
+
+
+def test_constant_branches():
+    text = """
+    program Ramos;
+    const DEBUG = false; N = 10;
+    var x: integer;
+    begin
+      x := 1;
+      if DEBUG then
+        writeln(0);
+      if N > 5 then
+        x := x + 1
+      else
+        x := x - 1;
+      while N < 5 do
+        x := 0;
+      if true then
+      begin
+        x := x * 3
+      end;
+      writeln(x)
+    end.
+    """
+    output, result = eliminated(text)
+    assert output == "6\n"
+    assert result.stats["dce.branches"] == 4
+    # não sobra nenhum salto condicional
+    assert "JZ" not in result.code
+
+
+def test_loops_kept():
+    text = """
+    program Ciclos;
+    var i, x: integer;
+    begin
+      x := 0;
+      for i := 1 to 3 do
+        if false then
+          x := 100
+        else
+          x := x + i;
+      repeat
+        if true then
+          x := x + 1
+      until x > 10;
+      writeln(x)
+    end.
+    """
+    output, result = eliminated(text)
+    assert output == "11\n"
+    assert result.stats["dce.branches"] == 2
+
+
+def test_plain_build_keeps_everything():
+    text = "program P;\nfunction f(n: integer): integer;\nbegin\n  f := n\nend;\nbegin\n  writeln(1)\nend."
+    assert "dce.functions" not in build(text).stats
+    assert "f" in build(text, optimize=True).stats["dce.removed"]
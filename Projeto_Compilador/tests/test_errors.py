@@ -0,0 +1,98 @@
+"""errors.py and error recovery: every error of a compile, with its line."""
+import pytest
+
+from conftest import build
+from errors import CompilationError, Diagnostic, LexicalError, ParseError, SemanticError, SourceMap
+
+# dois comandos e uma declaração com erros de sintaxe, afastados entre si
+BROKEN = """program Erros;
+var x, y: integer;
+var 1 z;
+begin
+  x := 1;
+  y := x + ;
+  writeln(x);
+  writeln(y);
+  x := := 2;
+  writeln(x)
+end.
+"""
+
+
+def test_syntax_errors_reported_together():
+    with pytest.raises(ParseError) as info:
+        build(BROKEN)
+    diagnostics = info.value.diagnostics
+    assert [d.line for d in diagnostics] == [3, 6, 9]
+    assert all(d.kind == "syntax" for d in diagnostics)
+    # a mensagem mostra a linha e aponta a coluna do token
+    assert "Unexpected ';'" in diagnostics[1].message
+    assert "    ^" in diagnostics[1].message.splitlines()[-1]
+    assert diagnostics[1].message.splitlines()[-2] == "      y := x + ;"
+    assert str(info.value).count("[Ln ") == 3
+
+
+def test_partial_tree():
+    with pytest.raises(ParseError) as info:
+        build(BROKEN)
+    assert info.value.partial_tree is not None
+
+
+def test_end_of_input():
+    with pytest.raises(ParseError, match="end of input"):
+        build("program Fim;\nbegin\n  writeln(1)\n")
+
+
+def test_parser_state_is_reset():
+    from compiler import Compiler
+    compiler = Compiler()
+    with pytest.raises(ParseError):
+        compiler.compile(BROKEN)
+    # os erros do programa anterior não passam para o seguinte
+    assert compiler.compile("program Ok;\nbegin\n  writeln(1)\nend.").code
+
+
+def test_lexical_error():
+    with pytest.raises(LexicalError) as info:
+        build("program L;\nbegin\n  writeln(1) ?\nend.")
+    assert info.value.diagnostics[0].line == 3
+    assert isinstance(info.value, CompilationError)
+
+
+def test_semantic_errors_reported_together():
+    text = """program Tipos;
+var x: integer; s: string;
+begin
+  x := x + 'a';
+  s := 1;
+  writeln(x)
+end.
+"""
+    with pytest.raises(SemanticError) as info:
+        build(text)
+    assert [d.line for d in info.value.diagnostics] == [4, 5]
+
+
+def test_diagnostic():
+    assert str(Diagnostic("syntax", "mensagem", 7)) == "[Ln 7] mensagem"
+    assert str(Diagnostic("syntax", "mensagem")) == "mensagem"
+    assert str(ParseError("mensagem", 2)) == "[Ln 2] mensagem"
+
+
+def test_source_map():
+    source = SourceMap("ab\ncde\n\nf")
+    assert [source.line(offset) for offset in range(9)] == [1, 1, 1, 2, 2, 2, 2, 3, 4]
+    assert source.column(4) == 1 and source.column(8) == 0
+    assert source.line_text(2) == "cde"
+    assert source.line_text(3) == ""
+    assert source.line_text(4) == "f"
+    assert source.line_text(9) == ""
+
+
+def test_main_reports_errors(tmp_path, capsys):
+    from main import main
+    source = tmp_path / "erros.pas"
+    source.write_text(BROKEN)
+    assert main([str(source), "-o", str(tmp_path)]) == 1
+    assert capsys.readouterr().err.count("[Ln ") == 3
+    assert not list(tmp_path.glob("*.out"))
@@ -0,0 +1,40 @@
+"""generator.py: the code generated for statements."""
+import pytest
+
+from conftest import build, run_code
+
+IF_PROGRAM = """
+program Se;
+var x: integer;
+begin
+  readln(x);
+  if x > 2 then
+    writeln('maior');
+  if x > 5 then
+    writeln('muito maior')
+  else
+    writeln('nao muito');
+  writeln(x)
+end.
+"""
+
+
+def lines(code):
+    return [line.strip() for line in code.splitlines() if line.strip()]
+
+
+def jumps_to_next_line(code):
+    code = lines(code)
+    return [(a, b) for a, b in zip(code, code[1:]) if a.startswith("JUMP ") and b == f"{a[5:]}:"]
+
+
+def test_if_then_has_no_jump_to_endif():
+    code = build(IF_PROGRAM, comments=False).code
+    assert jumps_to_next_line(code) == [("JUMP main", "main:")] # (não há funções)
+    assert sum(line.startswith("JUMP ") for line in lines(code)) == 2 # main e o do else
+
+
+@pytest.mark.parametrize("stdin, output", [("1\n", "nao muito\n1\n"), ("3\n", "maior\nnao muito\n3\n"),
+                                           ("9\n", "maior\nmuito maior\n9\n")])
+def test_if_branches(stdin, output):
+    assert run_code(build(IF_PROGRAM).code, stdin).endswith(output)
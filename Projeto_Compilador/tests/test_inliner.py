@@ -0,0 +1,153 @@
+"""optimizer.FunctionInliner: programs give the same output with and without --inline."""
+import pytest
+
+from conftest import build, run_code
+
+
+def same_output(text, stdin="", **options):
+    """Runs `text` without and with inlining; returns the number of calls inlined."""
+    plain = run_code(build(text).code, stdin)
+    result = build(text, inline=True, **options)
+    assert run_code(result.code, stdin) == plain
+    return result.stats["inline.inlined"]
+
+
+FUNCTIONS = """
+    function dobro(x: integer): integer;
+    begin
+      dobro := x + x
+    end;
+
+    function mistura(a, b: integer): integer;
+    var t: integer;
+    begin
+      t := a * 3;
+      mistura := t - b
+    end;
+"""
+
+
+def program(body, variables="i, k, r, $inl0: integer"):
+    return f"""
+    program Inline;
+    var {variables};
+    {FUNCTIONS}
+    begin
+      $inl0 := 7;
+    {body}
+      writeln($inl0)
+    end.
+    """
+
+
+def test_parameters_substituted():
+    text = program("""
+      i := 4;
+      k := 5;
+      r := dobro(i);
+      writeln(r);
+      r := dobro(3);
+      writeln(r);
+      r := mistura(i, k);
+      writeln(r);
+      r := mistura(k, i);
+      writeln(r);
+    """)
+    assert same_output(text) == 4
+
+
+def test_parameter_assigned_from_expression():
+    # o argumento é lido mais de uma vez no corpo: fica num local escondido
+    text = program("""
+      i := 4;
+      r := dobro(i * 2 + 1);
+      writeln(r);
+      r := mistura(i - 1, i * i);
+      writeln(r);
+    """)
+    assert same_output(text) == 2
+
+
+def test_call_as_write_argument():
+    text = program("""
+      i := 6;
+      writeln(mistura(i, 1));
+      writeln(dobro(i));
+    """)
+    assert same_output(text) == 2
+
+
+def test_call_in_while_condition():
+    # os locais escondidos de mistura não podem ser calculados uma só vez antes do while
+    text = program("""
+      i := 0;
+      k := 0;
+      while (mistura(i, 2) < 20) and (k < 100) do
+      begin
+        i := i + 1;
+        k := k + 1
+      end;
+      writeln(i);
+      while dobro(i) < 30 do
+        i := i + 1;
+      writeln(i);
+    """)
+    # só dobro, que não precisa de locais escondidos, é substituída
+    assert same_output(text) == 1
+
+
+def test_call_in_for_limit():
+    text = program("""
+      r := 0;
+      i := 2;
+      for k := 1 to mistura(i, 1) do
+        r := r + k;
+      writeln(r);
+      for k := 1 to dobro(i) do
+        r := r + k;
+      writeln(r);
+    """)
+    assert same_output(text) == 1
+
+
+def test_call_in_nested_for_limit():
+    # o limite do for interior é avaliado uma vez por cada iteração do exterior
+    text = program("""
+      r := 0;
+      for i := 1 to 3 do
+        for k := 1 to mistura(i, 1) do
+          r := r + k;
+      writeln(r);
+    """)
+    assert same_output(text) == 0
+
+
+@pytest.mark.parametrize("operator", ["and", "or"])
+def test_call_on_right_of_and_or(operator):
+    text = program(f"""
+      r := 0;
+      for i := 0 to 6 do
+        if (i > 2) {operator} (mistura(i, 5) > 6) then
+          r := r + 1;
+      writeln(r);
+      for i := 0 to 6 do
+        if (i > 2) {operator} (dobro(i) > 6) then
+          r := r + 1;
+      writeln(r);
+    """)
+    assert same_output(text) == 1
+
+
+def test_inlined_with_optimizer():
+    text = program("""
+      r := 0;
+      for k := 1 to 5 do
+      begin
+        i := dobro(k);
+        r := r + i
+      end;
+      writeln(r);
+      i := mistura(r, 2);
+      writeln(i);
+    """)
+    assert same_output(text, optimize=True) > 0
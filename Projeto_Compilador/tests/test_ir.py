@@ -0,0 +1,70 @@
+"""ir.py: instructions as opcodes and operands, text only from dump()."""
+from ir import NAMES, OPCODES, Code, Op, format_instr
+
+
+def test_opcodes():
+    assert NAMES[:len(OPCODES)] == OPCODES
+    assert NAMES[Op.PUSHI] == "PUSHI" and NAMES[Op.LABEL] == "LABEL"
+    # as pseudo-instruções ficam depois das instruções da EWVM
+    assert Op.LABEL > Op.ERR and Op.COMMENT > Op.ERR
+
+
+def test_format_instr():
+    assert format_instr(Op.PUSHI, 3) == "PUSHI 3"
+    assert format_instr(Op.PUSHS, "ola mundo") == 'PUSHS "ola mundo"'
+    assert format_instr(Op.JZ, "endif0") == "JZ endif0"
+    assert format_instr(Op.LABEL, "endif0") == "endif0:"
+    assert format_instr(Op.COMMENT, "ler x") == "// ler x"
+    assert format_instr(Op.WRITELN, None) == "WRITELN"
+
+
+def test_dump():
+    code = Code()
+    code.append(Op.START)
+    code.append(Op.COMMENT, "escreve")
+    code.append(Op.PUSHS, "ola")
+    code.append(Op.WRITES)
+    code.append(Op.LABEL, "fim")
+    code.append(Op.PUSHI, -1)
+    code.append(Op.POP, 1)
+    code.append(Op.STOP)
+    assert code.dump() == 'START\n// escreve\nPUSHS "ola"\nWRITES\nfim:\nPUSHI -1\nPOP 1\nSTOP'
+    assert len(code) == 8
+    assert code.instructions() == 6
+
+
+def test_line_table():
+    code = Code()
+    code.set_line(1)
+    code.append(Op.START)
+    code.set_line(3)
+    code.set_line(4) # (sem instruções da linha 3: substitui-a)
+    code.append(Op.PUSHI, 1)
+    code.set_line(4)
+    code.append(Op.WRITEI)
+    code.set_line(7)
+    code.append(Op.STOP)
+
+    assert list(code.line_starts) == [0, 1, 3]
+    assert list(code.line_numbers) == [1, 4, 7]
+    assert list(code.lines()) == [1, 4, 4, 7]
+    assert list(code) == [(Op.START, None, 1), (Op.PUSHI, 1, 4), (Op.WRITEI, None, 4), (Op.STOP, None, 7)]
+
+    # extend mantém as linhas das instruções copiadas
+    copy = Code()
+    copy.extend(code)
+    assert list(copy) == list(code)
+
+
+def test_compiled_lines():
+    from emitter import CodeEmitter
+    from generator import CodeGenerator
+    from conftest import build
+
+    text = "program Linhas;\nvar x: integer;\nbegin\n  x := 1;\n  writeln(x)\nend."
+    em = CodeEmitter()
+    CodeGenerator(em).generate(build(text).ast)
+    lines = {NAMES[op]: line for op, _, line in em.code if op < Op.LABEL and line}
+    # a atribuição vem da linha 4 e o writeln da linha 5
+    assert lines["STOREL"] == 4
+    assert lines["WRITELN"] == 5
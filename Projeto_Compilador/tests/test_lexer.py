@@ -0,0 +1,88 @@
+"""lexer.py: tokens and their values."""
+from conftest import run_program
+
+
+def tokens(text):
+    from lexer import new_lexer
+    lexer = new_lexer()
+    lexer.input(text)
+    return [(tok.type, tok.value) for tok in lexer]
+
+
+def test_reserved_words_any_case():
+    assert tokens("FOR i := 1 To n DO") == [
+        ("FOR", "for"), ("IDENTIFIER", "i"), ("ASSIGN", ":="), ("INTVALUE", 1),
+        ("TO", "to"), ("IDENTIFIER", "n"), ("DO", "do"),
+    ]
+
+
+def test_identifiers_lowercased():
+    assert tokens("Total TOTAL $x") == [("IDENTIFIER", "total"), ("IDENTIFIER", "total"), ("IDENTIFIER", "$x")]
+
+
+def test_uppercase_for_to():
+    text = """
+    PROGRAM Maiusculas;
+    VAR i, s: INTEGER;
+    BEGIN
+      s := 0;
+      FOR i := 1 TO 4 DO
+        s := s + i;
+      WRITELN(s)
+    END.
+    """
+    assert run_program(text) == "10\n"
+
+
+SAMPLE = "program P;\nvar x: integer;\nbegin\n  x := 10 div 3;\n  writeln('x = ', x)\nend.\n"
+
+
+def tokens_of(lexobj, text=SAMPLE):
+    lexobj = lexobj.clone()
+    lexobj.input(text)
+    return [(tok.type, tok.value, tok.lineno) for tok in lexobj]
+
+
+def test_lextab_cached_by_rules_hash():
+    import os
+    import lexer
+    path = lexer.table_cache_path()
+    assert os.path.dirname(path) == os.path.join(os.environ["PASCAL_CACHE_DIR"], "tables")
+    assert lexer.rules_hash() in os.path.basename(path)
+    if os.path.exists(path):
+        os.remove(path) # (escrito quando o módulo foi importado)
+
+    built = lexer.build_lexer()
+    assert os.path.exists(path)
+    mtime = os.stat(path).st_mtime_ns
+    loaded = lexer.build_lexer()
+    assert os.stat(path).st_mtime_ns == mtime # lido, não gerado de novo
+    assert tokens_of(loaded) == tokens_of(built) == tokens_of(lexer.build_lexer(use_cache=False))
+    assert not [name for name in os.listdir(os.path.dirname(path)) if "_tmp" in name]
+
+
+def test_bad_lextab_rebuilt():
+    import lexer
+    path = lexer.table_cache_path()
+    expected = tokens_of(lexer.build_lexer(use_cache=False))
+
+    with open(path, "w") as f:
+        f.write("_tabversion = (incompleto\n")
+    assert tokens_of(lexer.build_lexer()) == expected
+
+    # um lextab de outra lista de tokens também é gerado de novo
+    with open(path, "w") as f:
+        f.write("_lextokens = set(('IDENTIFIER',))\n")
+    assert tokens_of(lexer.build_lexer()) == expected
+    assert "_lextokens = set(('IDENTIFIER',))" not in open(path).read()
+
+
+def test_new_lexer_independent():
+    from lexer import new_lexer
+    first, second = new_lexer(), new_lexer()
+    first.input("a\nb\nc")
+    assert [tok.lineno for tok in first] == [1, 2, 3]
+    # cada um com a sua posição e a sua linha
+    second.input("d")
+    assert [(tok.value, tok.lineno) for tok in second] == [("d", 1)]
+    assert new_lexer().lineno == 1
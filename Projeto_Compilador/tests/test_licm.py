@@ -0,0 +1,96 @@
+"""optimizer.LoopInvariantMotion: invariant expressions leave loops, the output stays the same."""
+import pytest
+
+from conftest import build, run_code
+
+
+def hoisted(text, stdin=""):
+    """Runs `text` plain and with -O, asserting the same output; returns how many expressions were hoisted."""
+    plain = run_code(build(text).code, stdin)
+    result = build(text, optimize=True)
+    assert run_code(result.code, stdin) == plain
+    return result.stats["licm.hoisted"]
+
+
+@pytest.mark.parametrize("loop", [
+    "while i < n * 3 do i := i + 1;",
+    "repeat i := i + 1 until i >= n * 3;",
+    "for k := 1 to 4 do i := i + n * 3;",
+    "repeat i := i + n * 3 until i > 50;",
+])
+def test_hoists_invariant(loop):
+    text = f"""
+    program Invariante;
+    var i, k, n: integer;
+    begin
+      n := 5;
+      i := 0;
+      {loop}
+      writeln(i)
+    end.
+    """
+    assert hoisted(text) == 1
+
+
+@pytest.mark.parametrize("loop", [
+    # n muda no loop
+    "while i < n * 3 do begin i := i + 1; n := n - 1 end;",
+    "repeat i := i + 1; n := n - 1 until i >= n * 3;",
+    # a divisão pode falhar: fica no loop
+    "while i < n div d do i := i + 1;",
+])
+def test_keeps_variant_and_failing(loop):
+    text = f"""
+    program Variante;
+    var i, n, d: integer;
+    begin
+      n := 20;
+      d := 2;
+      i := 0;
+      {loop}
+      writeln(i)
+    end.
+    """
+    assert hoisted(text) == 0
+
+
+def test_types_from_annotations():
+    # o `k` do programa é integer, embora a função declare depois um `k` string
+    text = """
+    program Tipos;
+    var i, k: integer;
+    function f(n: integer): integer;
+    var k: string;
+    begin
+      f := n
+    end;
+    begin
+      k := 4;
+      i := 0;
+      while i < k * 2 do
+        i := i + 1;
+      writeln(i)
+    end.
+    """
+    assert hoisted(text) == 1
+
+
+def test_hoists_in_functions():
+    text = """
+    program Funcao;
+    var r: integer;
+    function conta(n: integer): integer;
+    var i: integer;
+    begin
+      i := 0;
+      repeat
+        i := i + 1
+      until i * 2 > n + n;
+      conta := i
+    end;
+    begin
+      r := conta(6);
+      writeln(r)
+    end.
+    """
+    assert hoisted(text) == 1
@@ -0,0 +1,111 @@
+"""Loops whose bounds the body changes, and programs that use the names of the compiler's hidden locals."""
+import pytest
+
+from conftest import run_program
+
+
+BUILDS = [{}, {"optimize": True}, {"optimize": True, "inline": True}]
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_for_limit_evaluated_once(options):
+    text = """
+    program Limite;
+    var i, n, s: integer;
+    begin
+      n := 3;
+      s := 0;
+      for i := 1 to n + 1 do
+      begin
+        n := n + 1;
+        s := s + i
+      end;
+      writeln(s);
+      writeln(n)
+    end.
+    """
+    assert run_program(text, **options) == "10\n7\n"
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_for_limit_in_variable(options):
+    text = """
+    program Limite;
+    var i, n, s: integer;
+    begin
+      n := 4;
+      s := 0;
+      for i := 1 to n do
+      begin
+        n := n - 1;
+        s := s + i
+      end;
+      writeln(s)
+    end.
+    """
+    assert run_program(text, **options) == "10\n"
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_nested_for_limits(options):
+    text = """
+    program Triangulo;
+    var i, j, n, s: integer;
+    begin
+      n := 4;
+      s := 0;
+      for i := 1 to n do
+        for j := 1 to i * 2 do
+          s := s + j;
+      writeln(s)
+    end.
+    """
+    assert run_program(text, **options) == "70\n"
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_for_limit_in_function(options):
+    text = """
+    program Soma;
+    var r: integer;
+    function soma(n: integer): integer;
+    var i, s: integer;
+    begin
+      s := 0;
+      for i := 1 to n + n do
+        s := s + i;
+      soma := s
+    end;
+    begin
+      r := soma(3);
+      writeln(r)
+    end.
+    """
+    assert run_program(text, **options) == "21\n"
+
+
+@pytest.mark.parametrize("options", BUILDS)
+def test_program_names_like_hidden_locals(options):
+    # $ é aceite em identificadores: os locais escondidos não podem usar a mesma forma
+    text = """
+    program Nomes;
+    var i, n, s, $lim0, $inv0, $inl0: integer;
+    begin
+      n := 5;
+      s := 0;
+      $lim0 := 100;
+      $inv0 := 200;
+      $inl0 := 300;
+      for i := 1 to n + 1 do
+        s := s + i;
+      i := 0;
+      while i < n * 2 do
+        i := i + 1;
+      writeln(s);
+      writeln(i);
+      writeln($lim0);
+      writeln($inv0);
+      writeln($inl0)
+    end.
+    """
+    assert run_program(text, **options) == "21\n10\n100\n200\n300\n"
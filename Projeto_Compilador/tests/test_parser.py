@@ -0,0 +1,41 @@
+"""parser.py: the grammar, its cached tables and the trees it builds."""
+import os
+
+from conftest import build
+
+
+def test_tables_cached_by_grammar_hash():
+    import parser
+    path = parser.table_cache_path()
+    assert os.path.dirname(path) == os.path.join(os.environ["PASCAL_CACHE_DIR"], "tables")
+    assert parser.grammar_hash() in os.path.basename(path)
+    if os.path.exists(path):
+        os.remove(path) # (escritas quando o módulo foi importado)
+
+    built = parser.build_parser()
+    assert os.path.exists(path)
+    mtime = os.stat(path).st_mtime_ns
+    loaded = parser.build_parser()
+    assert os.stat(path).st_mtime_ns == mtime # lidas, não geradas de novo
+    assert loaded.action == built.action and loaded.goto == built.goto
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+
+
+def test_corrupt_tables_rebuilt():
+    import parser
+    path = parser.table_cache_path()
+    with open(path, "wb") as f:
+        f.write(b"\x80\x04 incompleto")
+    rebuilt = parser.build_parser()
+    assert rebuilt.action == parser.build_parser(use_cache=False).action
+
+
+def test_uncached_tables_parse_the_same():
+    import parser
+    from lexer import new_lexer
+    text = "program P;\nvar x: integer;\nbegin\n  x := 1 + 2;\n  writeln(x)\nend.\n"
+    trees = []
+    for instance in (parser.build_parser(), parser.build_parser(use_cache=False)):
+        parser.reset_state(instance, text)
+        trees.append(str(instance.parse(text, lexer=new_lexer())))
+    assert trees[0] == trees[1] == str(build(text).ast)
@@ -0,0 +1,59 @@
+"""peephole.py: each rewrite rule, on small pieces of code."""
+import pytest
+
+
+def code(*instrs):
+    from ir import Code, Op
+    result = Code()
+    for instr in instrs:
+        name, *arg = instr.split(" ", 1)
+        arg = arg[0] if arg else None
+        if arg is not None and arg.lstrip("-").isdigit():
+            arg = int(arg)
+        result.append(getattr(Op, name), arg)
+    return result
+
+
+def optimized(*instrs):
+    import peephole
+    result, stats = peephole.optimize(code(*instrs))
+    return result.text_lines(), stats
+
+
+@pytest.mark.parametrize("before, after", [
+    (["STOREL 0", "PUSHL 0"], ["DUP 1", "STOREL 0"]),
+    (["STOREG 2", "PUSHG 2"], ["DUP 1", "STOREG 2"]),
+    (["PUSHL 0", "PUSHI 0", "ADD"], ["PUSHL 0"]),
+    (["PUSHL 0", "PUSHI 0", "SUB"], ["PUSHL 0"]),
+    (["PUSHL 0", "PUSHI 1", "MUL"], ["PUSHL 0"]),
+    (["PUSHL 0", "PUSHI 1", "DIV"], ["PUSHL 0"]),
+    (["PUSHI 6", "PUSHI 7", "MUL"], ["PUSHI 42"]),
+    (["PUSHI -7", "PUSHI 2", "DIV"], ["PUSHI -3"]),
+    (["PUSHI 2", "PUSHI 3", "INF"], ["PUSHI 1"]),
+    (["PUSHI 2", "PUSHI 3", "ADD", "PUSHI 4", "MUL"], ["PUSHI 20"]),
+    (["PUSHL 1", "POP 1"], []),
+    (["JUMP L0", "LABEL L0"], ["L0:"]),
+    (["JZ L0", "LABEL L0"], ["POP 1", "L0:"]),
+    # o código inalcançável sai, e depois o JUMP para a linha seguinte
+    (["JUMP L0", "PUSHI 1", "WRITEI", "LABEL L0"], ["L0:"]),
+])
+def test_rules(before, after):
+    lines, stats = optimized("START", *before, "STOP")
+    assert lines == ["START", *after, "STOP"]
+    assert stats["removed"] == stats["before"] - stats["after"]
+
+
+def test_division_by_zero_not_folded():
+    lines, _ = optimized("PUSHI 1", "PUSHI 0", "DIV")
+    assert lines == ["PUSHI 1", "PUSHI 0", "DIV"]
+
+
+def test_jump_threading():
+    lines, stats = optimized("JZ L0", "PUSHI 1", "LABEL L0", "JUMP L1", "PUSHI 2", "LABEL L1", "STOP")
+    assert lines[0] == "JZ L1"
+    assert stats["rewrites"] >= 1
+
+
+def test_comments_kept_outside_windows():
+    lines, _ = optimized("STOREL 0", "COMMENT ler x", "PUSHL 0")
+    assert lines == ["// ler x", "DUP 1", "STOREL 0"]
@@ -0,0 +1,97 @@
+"""scope.py: the symbol table shared by the checker and the generator."""
+import pytest
+
+from conftest import build, run_program
+
+
+def test_declare_and_lookup():
+    from scope import Scope
+    scope = Scope()
+    assert scope.declare("a", "Integer") == 0
+    assert scope.declare("b", "String") == 1
+    assert scope.lookup("b") == 1
+    assert scope.lookup("c") is None
+
+    symbol = scope.resolve("a")
+    assert (symbol.kind, symbol.type, symbol.depth, symbol.slot) == ("var", "Integer", 0, 0)
+
+
+def test_nested_scopes():
+    from scope import Scope
+    scope = Scope()
+    scope.declare("x", "Integer")
+    scope.declare("y", "Integer")
+    scope.push()
+    assert scope.depth == 1
+    # os slots recomeçam em cada escopo e o x local esconde o global
+    assert scope.declare("x", "String", kind="param") == 0
+    assert scope.resolve("x").type == "String" and scope.resolve("x").depth == 1
+    assert scope.lookup("y") == 1
+    scope.pop()
+    assert scope.depth == 0
+    assert scope.resolve("x").type == "Integer"
+    with pytest.raises(Exception):
+        scope.pop()
+
+
+def test_duplicate_declaration():
+    from errors import SemanticError
+    from scope import Scope
+    scope = Scope()
+    scope.declare("x", "Integer")
+    with pytest.raises(SemanticError, match="already declared"):
+        scope.declare("x", "Integer")
+    with pytest.raises(SemanticError, match="already declared"):
+        scope.declare_const("x", None)
+    scope.push()
+    scope.declare("x", "Integer") # (noutro escopo pode)
+
+
+def test_consts_and_functions():
+    from scope import Scope
+    scope = Scope()
+    scope.declare_const("N", "valor", "Integer")
+    scope.declare_function("f", "Integer", ["Integer", "String"])
+    assert scope.lookup_const("N") == "valor"
+    assert scope.lookup("N") is None # (uma constante não ocupa slot)
+    assert scope.lookup_function("f").value == ["Integer", "String"]
+    assert scope.lookup_function("N") is None
+
+    # uma variável local esconde a constante
+    scope.push()
+    scope.declare("N", "Integer")
+    assert scope.lookup_const("N") is None
+    scope.pop()
+    assert scope.lookup_const("N") == "valor"
+
+
+def test_type_name():
+    from scope import type_name
+    from tree import Node
+    assert type_name(Node("SimpleType", "integer")) == "Integer"
+    array = Node("ArrayType", Node("Range", 1, 10), Node("SimpleType", "string"))
+    assert type_name(array) == "Array<String>"
+
+
+def test_shadowing_in_programs():
+    text = """
+    program Escopos;
+    const K = 5;
+    var x: integer;
+    function f(x: integer): integer;
+    var K: integer;
+    begin
+      K := x * 2;
+      f := K
+    end;
+    begin
+      x := f(10);
+      writeln(x);
+      writeln(K)
+    end.
+    """
+    assert run_program(text) == "20\n5\n"
+
+    from errors import SemanticError
+    with pytest.raises(SemanticError, match="'x' already declared"):
+        build("program D;\nvar x: integer;\nx: string;\nbegin\n  x := 1\nend.")
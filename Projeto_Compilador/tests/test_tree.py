@@ -0,0 +1,111 @@
+"""tree.py: AST nodes and the tree printer."""
+import copy
+import pickle
+
+from conftest import build
+
+
+PROGRAM = """
+program Arvore;
+var i, s: integer;
+begin
+  s := 0;
+  for i := 1 to 3 do
+    s := s + i * 2;
+  writeln(s)
+end.
+"""
+
+
+def nodes(root):
+    from tree import Node
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        yield node
+        pending.extend(arg for arg in node.args if isinstance(arg, Node))
+
+
+def annotations(root):
+    return [(node.label, node.type, node.line) for node in nodes(root)]
+
+
+def test_node_kinds():
+    from tree import Node
+    node = Node("Assignment", Node("DeclaredName", "x"), Node("LiteralValue", 1))
+    assert node.label == "Assignment"
+    assert type(node) is type(Node("Assignment"))
+    assert not hasattr(node, "__dict__")
+
+
+def test_pickle_keeps_type_and_line():
+    ast = build(PROGRAM).ast
+    assert any(node.type for node in nodes(ast)) and any(node.line for node in nodes(ast))
+    for copied in (pickle.loads(pickle.dumps(ast)), copy.deepcopy(ast), copy.copy(ast)):
+        assert annotations(copied) == annotations(ast)
+
+
+
+def written(root, **options):
+    """(text, nodes written) of write_tree(root, ...) without colors."""
+    import io
+    from tree import write_tree
+    out = io.StringIO()
+    count = write_tree(root, out, color=False, **options)
+    return out.getvalue(), count
+
+
+def test_write_tree():
+    from tree import Node
+    root = Node("Assignment", Node("DeclaredName", "x"), Node("LiteralValue", 1))
+    text, count = written(root)
+    assert count == 3
+    assert text == (' └──<Assignment>\n'
+                    '      ├──<DeclaredName>\n'
+                    '      │    └──"x"\n'
+                    '      └──<LiteralValue>\n'
+                    '           └──"1"\n')
+    # str() usa o mesmo, com cores
+    assert "\033[" in str(root)
+
+
+def test_write_tree_limits():
+    ast = build(PROGRAM).ast
+    total = sum(1 for _ in nodes(ast))
+    assert written(ast)[1] == total
+
+    text, count = written(ast, max_nodes=5)
+    assert count == 5
+    assert text.rstrip().endswith("… (limite de 5 nós)")
+
+    from tree import Node
+    text, count = written(ast, max_depth=1)
+    assert count == 1 + sum(isinstance(arg, Node) for arg in ast.args)
+    assert "filhos)" in text
+
+
+def test_write_tree_deep():
+    import sys
+    from tree import Node
+    # muito mais fundo do que o limite de recursão
+    depth = sys.getrecursionlimit() * 3
+    root = Node("LiteralValue", 0)
+    for _ in range(depth):
+        root = Node("Expression", root)
+    text, count = written(root)
+    assert count == depth + 1
+    assert text.count("\n") == depth + 2
+
+
+def test_main_ast(tmp_path, capsys):
+    from main import main
+    source = tmp_path / "arvore.pas"
+    source.write_text(PROGRAM)
+    assert main([str(source), "-o", str(tmp_path), "--ast", "--ast-depth", "2"]) == 0
+    out = capsys.readouterr().out
+    assert "<Program>" in out and "filhos)" in out and "\033[" not in out
+
+    # com um erro de sintaxe imprime a árvore parcial
+    source.write_text(PROGRAM.replace("s := 0;", "s := 0 0;"))
+    assert main([str(source), "-o", str(tmp_path), "--ast"]) == 1
+    assert "Partial syntax tree" in capsys.readouterr().out
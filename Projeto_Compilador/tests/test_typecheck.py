@@ -0,0 +1,74 @@
+"""typecheck.py: types are checked once, before code generation."""
+import pytest
+
+from conftest import build, run_program
+
+
+def test_char_argument_to_integer_parameter():
+    text = """
+    program Codigo;
+    var r: integer;
+    function seguinte(c: integer): integer;
+    begin
+      seguinte := c + 1
+    end;
+    begin
+      r := seguinte('A');
+      writeln(r)
+    end.
+    """
+    assert run_program(text) == "66\n"
+
+
+def test_call_result_written():
+    text = """
+    program Escreve;
+    function dobro(x: integer): integer;
+    begin
+      dobro := x + x
+    end;
+    begin
+      writeln(dobro(21))
+    end.
+    """
+    assert run_program(text) == "42\n"
+
+
+def test_every_type_error_reported():
+    from errors import SemanticError
+    text = """
+    program Erros;
+    var r: integer; s: string;
+    function dobro(x: integer): integer;
+    begin
+      dobro := x + x
+    end;
+    begin
+      r := dobro(s);
+      r := s;
+      s := r + 1
+    end.
+    """
+    with pytest.raises(SemanticError) as error:
+        build(text)
+    assert [d.line for d in error.value.diagnostics] == [9, 10, 11]
+
+
+def test_annotates_expressions():
+    ast = build("""
+    program Tipos;
+    var i: integer; b: boolean;
+    begin
+      i := 1 + 2;
+      b := i < 3
+    end.
+    """).ast
+    from tree import Node
+    types = {}
+    pending = [ast]
+    while pending:
+        node = pending.pop()
+        if node.label in ("AddExpression", "RelExpression"):
+            types[node.label] = node.type
+        pending.extend(arg for arg in node.args if isinstance(arg, Node))
+    assert types == {"AddExpression": "Integer", "RelExpression": "Boolean"}
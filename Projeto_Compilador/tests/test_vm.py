@@ -0,0 +1,119 @@
+"""vm.py: the local EWVM interpreter and its Profiler."""
+import io
+
+import pytest
+
+import vm
+from conftest import build, run_code
+
+LOOP = """
+START
+PUSHI 0
+PUSHI 3
+ciclo:
+DUP 1
+JZ fim
+// escreve e decrementa
+DUP 1
+WRITEI
+WRITELN
+PUSHI 1
+SUB
+JUMP ciclo
+fim:
+STOP
+"""
+
+
+def test_parse_program():
+    program = vm.parse_program(LOOP)
+    # comentários e labels não são instruções; as labels apontam para a seguinte
+    assert len(program.code) == 12
+    assert program.labels == {"ciclo": 3, "fim": 11}
+    assert program.code[4] == (vm.JZ, 11)
+    assert program.code[10] == (vm.JUMP, 3)
+
+
+def test_run_counts_steps():
+    out = io.StringIO()
+    machine = vm.VM(vm.parse_program(LOOP), stdin=io.StringIO(), stdout=out)
+    machine.run()
+    assert out.getvalue() == "3\n2\n1\n"
+    # 3 instruções antes do ciclo, 3 voltas de 8, a saída (DUP, JZ) e STOP
+    assert machine.steps == 3 + 3 * 8 + 2 + 1
+
+
+def test_load_code_same_as_text():
+    text = """
+    program Soma;
+    var i, s: integer;
+    begin
+      s := 0;
+      for i := 1 to 5 do
+        s := s + i * i;
+      writeln(s)
+    end.
+    """
+    from emitter import CodeEmitter
+    from generator import CodeGenerator
+
+    result = build(text)
+    em = CodeEmitter()
+    CodeGenerator(em).generate(result.ast)
+    from_text = vm.parse_program(result.code)
+    from_ir = vm.load_code(em.code)
+    assert from_ir.code == from_text.code
+    assert from_ir.labels == from_text.labels
+
+
+def test_integer_division_truncates():
+    code = "START\nPUSHI -7\nPUSHI 2\nDIV\nWRITEI\nWRITELN\nPUSHI -7\nPUSHI 2\nMOD\nWRITEI\nSTOP\n"
+    # como em Pascal: div trunca para zero e mod tem o sinal do dividendo
+    assert run_code(code) == "-3\n-1"
+
+
+def test_errors():
+    with pytest.raises(vm.VMError, match="division by zero"):
+        run_code("START\nPUSHI 1\nPUSHI 0\nDIV\nSTOP\n")
+    with pytest.raises(vm.VMError, match="unknown instruction"):
+        vm.parse_program("START\nPUSHX 1\nSTOP\n")
+    with pytest.raises(vm.VMError, match="undefined label"):
+        vm.parse_program("START\nJUMP nenhuma\nSTOP\n")
+
+
+def test_profiler():
+    program = vm.parse_program(LOOP)
+    machine = vm.VM(program, stdin=io.StringIO(), stdout=io.StringIO())
+    profiler = vm.Profiler(program)
+    machine.run(trace=profiler)
+    profiler.finish()
+
+    assert sum(profiler.counts) == machine.steps
+    by_opcode = profiler.by_opcode()
+    assert by_opcode["WRITEI"][0] == 3
+    assert by_opcode["JZ"][0] == 4
+    by_label = profiler.by_label()
+    # (vezes que a label é atingida, instruções executadas a partir dela)
+    assert by_label["ciclo"][:2] == (4, 3 * 8 + 2)
+    assert by_label["fim"][:2] == (1, 1)
+    assert by_label["<inicio>"][1] == 3
+
+    report = io.StringIO()
+    profiler.report(out=report)
+    assert f"{machine.steps} instruções executadas" in report.getvalue()
+
+
+def test_main(tmp_path, capfd):
+    path = tmp_path / "loop.out"
+    path.write_text(LOOP)
+    assert vm.main([str(path)]) == 0
+    captured = capfd.readouterr()
+    assert captured.out == "3\n2\n1\n"
+    assert "30 instruções" in captured.err
+
+    assert vm.main([str(path), "--profile"]) == 0
+    assert "WRITEI" in capfd.readouterr().err
+
+    path.write_text("START\nPUSHI 1\nPUSHI 0\nDIV\nSTOP\n")
+    assert vm.main([str(path)]) == 1
+    assert "division by zero" in capfd.readouterr().err